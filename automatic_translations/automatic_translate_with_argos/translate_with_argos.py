@@ -1,18 +1,105 @@
+import argparse
+import atexit
+import contextlib
+import io
+import json
 import os
+import re
+import shutil
 import sys
+import time
 import yaml
-import argostranslate.translate
+import zipfile
 from pathlib import Path
 
-# Dieses Skript geht davon aus, dass die benötigten Argos-Modelle
-# bereits im GitHub Actions Workflow installiert wurden.
+# Gemeinsame Module liegen entweder neben dem Skript (.github/scripts/)
+# oder eine Ebene höher (Repository-Layout unter automatic_translations/).
+_SCRIPT_DIR = Path(__file__).resolve().parent
+for _candidate in (_SCRIPT_DIR, _SCRIPT_DIR.parent):
+    if (_candidate / "translation_common").is_dir():
+        sys.path.insert(0, str(_candidate))
+        break
 
-def load_config():
-    """Lädt die Konfiguration aus der config.yaml-Datei."""
+from translation_common import manifest as translation_manifest
+from translation_common.atomic_io import AtomicTextWriter, write_text_atomic
+from translation_common import daemon
+from translation_common.glossary import load_glossary
+from translation_common import metrics
+from translation_common.markdown_segments import Segment, iter_parts, render_markdown, segment_markdown, segments_of
+from translation_common.model_cache import ModelCache
+from translation_common.model_store import ModelStore, download, is_offline, open_model_store
+from translation_common.parallel import create_pool, limit_threads, threads_per_worker
+from translation_common.segment_plan import DEFAULT_MAX_SEGMENTS, SegmentPlan, plan_windows
+from translation_common.streaming import (
+    StrippedWriter, iter_windows, read_front_matter, skip_leading_whitespace, window_limits)
+from translation_common.translation_memory import open_translation_memory, translate_segments
+
+# Die benötigten Argos-Pakete kommen aus dem Modellspeicher (model_store,
+# siehe provide_packages) oder sind bereits installiert. argostranslate
+# (und damit ctranslate2, sentencepiece, stanza) wird erst importiert, wenn
+# ein Segment tatsächlich übersetzt werden muss.
+
+# Paketindex von argospm (überschreibbar über `argos_index_url`)
+ARGOS_INDEX_URL = "https://raw.githubusercontent.com/argosopentech/argospm-index/main/index.json"
+
+# Wird erhöht, wenn sich die erzeugte Ausgabe ändert (invalidiert das Manifest).
+PIPELINE_VERSION = 6
+
+# Token-Budget eines Chunks; ctranslate2 schneidet längere Eingaben ab (max_input_length)
+DEFAULT_MAX_CHUNK_TOKENS = 1024
+# Satzende innerhalb einer Zeile; der Leerraum danach gehört zum vorherigen Satz
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"\s*\S+\s*")
+
+# Konfigurationsschlüssel, die das Übersetzungsergebnis beeinflussen.
+OUTPUT_CONFIG_KEYS = (
+    "src_language",
+    "insert_warnings",
+    "warnings_mapping",
+    "front_matter_transparent_keys",
+    "front_matter_key_value_keys",
+    "max_chunk_length",
+    "max_chunk_tokens",
+    "glossary",
+)
+
+def parse_args(argv=None):
+    """Liest die Kommandozeilenoptionen."""
+    parser = argparse.ArgumentParser(description="Übersetzt Markdown-Dateien mit Argos Translate.")
+    parser.add_argument("--force", action="store_true",
+                        help="Alle Dateien übersetzen, auch wenn das Manifest sie als aktuell führt.")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Anzahl paralleler Worker-Prozesse (Standard: 1, seriell).")
+    parser.add_argument("--metrics", metavar="DATEI",
+                        help="Messwerte (Zeit pro Stufe, Tokens/s, Speicher) als JSON oder, bei .prom, "
+                             "im Prometheus-Textformat schreiben.")
+    parser.add_argument("--profile", metavar="DATEI",
+                        help="Lauf mit cProfile aufzeichnen und die Statistik in DATEI schreiben.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Pakete nur aus dem Modellspeicher verwenden, nichts herunterladen.")
+    parser.add_argument("--refresh-models", action="store_true",
+                        help="Paketindex abfragen und neuere Paketversionen in den Modellspeicher laden.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Als Übersetzungsdienst laufen: Modelle geladen halten und Anfragen über den Socket beantworten.")
+    parser.add_argument("--preview", metavar="DATEI",
+                        help="Nur DATEI übersetzen und auf stdout ausgeben (über den Dienst, falls er läuft).")
+    parser.add_argument("--lang", metavar="SPRACHE",
+                        help="Zielsprache für --preview (Standard: erste Sprache aus target_langs).")
+    parser.add_argument("--output", metavar="DATEI",
+                        help="Ergebnis von --preview in DATEI schreiben statt auf stdout.")
+    parser.add_argument("--address", metavar="ADRESSE",
+                        help="Socket des Dienstes (Pfad oder host:port, Standard: daemon.address aus config.yaml).")
+    return parser.parse_args(argv)
+
+def load_config(args=None):
+    """Lädt die Konfiguration aus der config.yaml-Datei und wendet --offline an."""
     print("Lade config.yaml...")
     try:
         with open("config.yaml", "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+            config = yaml.safe_load(f)
+        if args is not None and args.offline:
+            config["model_store"] = dict(config.get("model_store") or {}, offline=True)
+        return config
     except FileNotFoundError:
         print("FEHLER: config.yaml nicht gefunden!", file=sys.stderr)
         sys.exit(1)
@@ -20,173 +107,845 @@ def load_config():
         print(f"FEHLER: Fehler beim Parsen von config.yaml: {e}", file=sys.stderr)
         sys.exit(1)
 
-def chunk_text(text: str, max_length: int) -> list:
-    """Teilt Text in handhabbare Chunks basierend auf Zeilenumbrüchen."""
+def _sentence_units(text: str) -> list:
+    """Zerlegt Text in Zeilen und diese in Sätze; zusammengesetzt ergibt sich wieder `text`."""
+    units = []
+    for line in text.splitlines(keepends=True):
+        start = 0
+        for match in SENTENCE_END.finditer(line):
+            units.append(line[start:match.end()])
+            start = match.end()
+        if start < len(line):
+            units.append(line[start:])
+    return units
+
+def _split_unit(unit: str, budget: int, count_tokens) -> list:
+    """Teilt einen Satz, der allein über dem Budget liegt, an Wortgrenzen ([(Teil, Größe), ...])."""
+    pieces = []
+    words, size = [], 0
+    for word in WORD.findall(unit) or [unit]:
+        word_size = count_tokens(word)
+        if words and size + word_size > budget:
+            pieces.append(("".join(words), size))
+            words, size = [], 0
+        words.append(word)
+        size += word_size
+    if words:
+        pieces.append(("".join(words), size))
+    return pieces
+
+def chunk_text(text: str, budget: int, count_tokens=len) -> list:
+    """
+    Teilt Text in Chunks von höchstens `budget` Tokens und liefert
+    [(Chunk, Größe), ...]. Zeilen und Sätze werden genau einmal mit
+    `count_tokens` gemessen (SentencePiece des Pakets, ohne Tokenizer die
+    Zeichenzahl) und der Reihe nach gepackt, bis das Budget erreicht ist;
+    ein einzelner Satz über dem Budget wird an Wortgrenzen geteilt. Die
+    Chunks ergeben zusammengesetzt wieder `text`.
+    """
     if not text or not text.strip():
-        return [""]
-    if len(text) <= max_length:
-        return [text]
+        return [("", 0)]
+    units = _sentence_units(text)
+    sizes = [count_tokens(unit) for unit in units]
+    if sum(sizes) <= budget:
+        return [(text, sum(sizes))]
 
     chunks = []
-    current_chunk = ""
-    for line in text.splitlines(keepends=True):
-        if len(current_chunk) + len(line) <= max_length:
-            current_chunk += line
-        else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = line
-    if current_chunk:
-        chunks.append(current_chunk)
+    current, current_size = [], 0
+    for unit, size in zip(units, sizes):
+        if current and current_size + size > budget:
+            chunks.append(("".join(current), current_size))
+            current, current_size = [], 0
+        if size > budget:
+            chunks.extend(_split_unit(unit, budget, count_tokens))
+            continue
+        current.append(unit)
+        current_size += size
+    if current:
+        chunks.append(("".join(current), current_size))
     return chunks
 
-def load_translation_models(src_lang, target_langs, pivot_lang="en"):
+def _argos_packages_dir() -> Path:
+    """Installationsordner der Argos-Pakete (wie argostranslate.settings.package_data_dir)."""
+    configured = os.getenv("ARGOS_PACKAGES_DIR")
+    if configured:
+        return Path(configured)
+    data_home = Path(os.getenv("XDG_DATA_HOME", Path.home() / ".local" / "share"))
+    return data_home / "argos-translate" / "packages"
+
+_INSTALLED_PACKAGES = None
+
+def installed_packages() -> dict:
     """
-    Lädt alle benötigten Übersetzungsmodelle einmalig vorab.
-    Gibt ein Dictionary zurück, das für jede Zielsprache entweder ein
-    direktes Modell oder ein Tupel aus zwei Pivot-Modellen enthält.
+    Liefert {(from_code, to_code): Paketversion} aller installierten Pakete.
+    Gelesen werden nur die metadata.json-Dateien der Pakete, damit ein Lauf
+    ohne Arbeit argostranslate gar nicht erst importieren muss. Fehlt der
+    Ordner, ist noch kein Paket installiert.
     """
-    print("Lade Übersetzungsmodelle vorab...")
-    loaded_models = {}
-    
-    # Lade das Pivot-Modell von der Quelle zur Pivot-Sprache, falls nötig
-    src_to_pivot_model = None
+    global _INSTALLED_PACKAGES
+    if _INSTALLED_PACKAGES is not None:
+        return _INSTALLED_PACKAGES
+    packages = {}
+    packages_dir = _argos_packages_dir()
+    if packages_dir.is_dir():
+        for metadata_path in sorted(packages_dir.glob("*/metadata.json")):
+            try:
+                metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+                packages[(metadata["from_code"], metadata["to_code"])] = str(metadata.get("package_version", "unknown"))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"WARNUNG: Paket-Metadaten {metadata_path} nicht lesbar: {e}", file=sys.stderr)
+    _INSTALLED_PACKAGES = packages
+    return packages
+
+def _fetch_package_index(config: dict, store: ModelStore) -> dict:
+    """Lädt den argospm-Index und liefert {(from_code, to_code): Eintrag}."""
+    url = config.get("argos_index_url", ARGOS_INDEX_URL)
+    print(f"Lade Paketindex {url}...")
+    index_dir = store.staging()
     try:
-        src_to_pivot_model = argostranslate.translate.get_translation_from_codes(src_lang, pivot_lang)
-    except Exception as e:
-        print(f"WARNUNG: Konnte das Quell-zu-Pivot-Modell ({src_lang}->{pivot_lang}) nicht laden: {e}", file=sys.stderr)
+        download(url, index_dir / "index.json", timeout=60)
+        packages = json.loads((index_dir / "index.json").read_text(encoding="utf-8"))
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return {(package["from_code"], package["to_code"]): package for package in packages}
 
-    for lang in target_langs:
-        # 1. Versuche direkte Übersetzung
+def _download_package(store: ModelStore, package: dict):
+    """Lädt ein Paket aus dem Index, prüft das ZIP-Archiv und legt es entpackt im Modellspeicher ab."""
+    url = package["links"][0]
+    name = f"argos:{package['from_code']}-{package['to_code']}"
+    print(f"  -> Lade {name} {package['package_version']} von {url}...")
+    staging = store.staging()
+    archive = staging.with_suffix(".argosmodel")
+    try:
+        with metrics.stage("model_download"):
+            download(url, archive)
+        if not zipfile.is_zipfile(archive):
+            raise ValueError(f"{url} ist kein gültiges ZIP-Archiv")
+        with zipfile.ZipFile(archive) as zip_file:
+            bad_file = zip_file.testzip()
+            if bad_file is not None:
+                raise ValueError(f"{url} ist beschädigt ({bad_file})")
+            zip_file.extractall(staging)
+        store.add(name, str(package["package_version"]), staging)
+        metrics.count("model_store_downloads")
+    finally:
+        if archive.exists():
+            archive.unlink()
+        shutil.rmtree(staging, ignore_errors=True)
+
+def _install_from_store(package_dir: Path, from_code: str, to_code: str):
+    """
+    Macht ein Paket aus dem Modellspeicher für argostranslate sichtbar (als
+    symbolischer Link im Paketordner, sonst als Kopie). Andere Versionen
+    desselben Sprachpaars werden ersetzt.
+    """
+    packages_dir = _argos_packages_dir()
+    packages_dir.mkdir(parents=True, exist_ok=True)
+    target = packages_dir / package_dir.name
+    for metadata_path in packages_dir.glob("*/metadata.json"):
+        installed = metadata_path.parent
         try:
-            model = argostranslate.translate.get_translation_from_codes(src_lang, lang)
-            loaded_models[lang] = model
-            print(f"  -> Modell für direkte Übersetzung geladen: {src_lang}->{lang}")
+            metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
             continue
-        except Exception:
-            pass # Weiter zur Pivot-Logik
+        if (metadata.get("from_code"), metadata.get("to_code")) != (from_code, to_code):
+            continue
+        if installed.resolve() == package_dir.resolve():
+            return
+        print(f"  -> Ersetze installiertes Paket {installed.name}")
+        if installed.is_symlink():
+            installed.unlink()
+        else:
+            shutil.rmtree(installed)
+    try:
+        target.symlink_to(package_dir.resolve(), target_is_directory=True)
+    except OSError:
+        shutil.copytree(str(package_dir), str(target))
+
+def provide_packages(store: ModelStore, config: dict, src_lang: str, target_langs, refresh: bool = False,
+                     pivot_lang: str = "en"):
+    """
+    Stellt die Pakete der benötigten Routen (direkt oder über die
+    Pivot-Sprache) aus dem Modellspeicher bereit. Fehlende Pakete (mit
+    `refresh` auch veraltete) werden über den argospm-Index geladen, außer
+    im Offline-Modus.
+    """
+    global _INSTALLED_PACKAGES
+    offline = is_offline(config)
+    index = None
+    pairs = []
 
-        # 2. Versuche Pivot-Übersetzung
-        if lang != pivot_lang and src_to_pivot_model:
+    def stored(route):
+        return all(store.version(f"argos:{from_code}-{to_code}") is not None for from_code, to_code in route)
+
+    for lang in target_langs:
+        if lang == src_lang:
+            continue
+        candidates = [[(src_lang, lang)]]
+        if lang != pivot_lang:
+            candidates.append([(src_lang, pivot_lang), (pivot_lang, lang)])
+        route = next((route for route in candidates if stored(route)), None)
+        if (route is None or refresh) and not offline:
             try:
-                pivot_to_target_model = argostranslate.translate.get_translation_from_codes(pivot_lang, lang)
-                loaded_models[lang] = (src_to_pivot_model, pivot_to_target_model)
-                print(f"  -> Modelle für Pivot-Übersetzung geladen: {src_lang}->{pivot_lang}->{lang}")
-            except Exception as e:
-                print(f"FEHLER: Pivot-Modell {pivot_lang}->{lang} nicht gefunden: {e}", file=sys.stderr)
-                loaded_models[lang] = None
-        else:
+                if index is None:
+                    index = {} # Bei einem Fehler nicht für jede Sprache erneut versuchen
+                    index = _fetch_package_index(config, store)
+                route = next((route for route in candidates if all(pair in index for pair in route)), route)
+                for pair in route or []:
+                    package = index.get(pair)
+                    if package is not None and store.version(f"argos:{pair[0]}-{pair[1]}") != str(package["package_version"]):
+                        _download_package(store, package)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"WARNUNG: Pakete für {src_lang}->{lang} konnten nicht geladen werden: {e}", file=sys.stderr)
+        if route is None:
+            print(f"WARNUNG: Kein Paket für {src_lang}->{lang} im Modellspeicher"
+                  f"{' (offline)' if offline else ''}.", file=sys.stderr)
+            continue
+        pairs.extend(pair for pair in route if pair not in pairs)
+
+    for from_code, to_code in pairs:
+        object_dir = store.resolve(f"argos:{from_code}-{to_code}")
+        if object_dir is None:
+            continue # Beschädigt und entfernt; beim nächsten Lauf mit Netzwerk neu laden
+        package_dir = next((path.parent for path in object_dir.glob("*/metadata.json")), None)
+        if package_dir is None:
+            print(f"WARNUNG: argos:{from_code}-{to_code} im Modellspeicher enthält kein Paket.", file=sys.stderr)
+            continue
+        _install_from_store(package_dir, from_code, to_code)
+    _INSTALLED_PACKAGES = None
+
+def load_translation_models(src_lang, target_langs, pivot_lang="en"):
+    """
+    Bestimmt für jede Zielsprache ihre Route anhand der installierten Pakete:
+    eine Liste von Übersetzungsschritten (from_code, to_code), also einen
+    direkten Schritt oder zwei Pivot-Schritte. None, wenn kein Modell
+    verfügbar ist. Die Modelle selbst lädt erst `get_model()` beim ersten
+    Segment, das sie braucht.
+    """
+    print("Bestimme Übersetzungsrouten...")
+    packages = installed_packages()
+    routes = {}
+    for lang in target_langs:
+        routes[lang] = find_route(packages, src_lang, lang, pivot_lang)
+        if routes[lang] is None:
             print(f"WARNUNG: Kein direktes oder Pivot-Modell für {src_lang}->{lang} verfügbar.", file=sys.stderr)
-            loaded_models[lang] = None
-            
-    return loaded_models
+        elif len(routes[lang]) == 1:
+            print(f"  -> Direkte Übersetzung: {src_lang}->{lang}")
+        else:
+            print(f"  -> Pivot-Übersetzung: {src_lang}->{pivot_lang}->{lang}")
+    return routes
+
+def find_route(packages, src_lang, lang, pivot_lang="en"):
+    """Route einer Zielsprache über die Sprachpaare in `packages` oder None."""
+    # 1. Direkte Übersetzung (für die Pivot-Sprache identisch mit dem Pivot-Schritt)
+    if (src_lang, lang) in packages:
+        return [(src_lang, lang)]
+    # 2. Pivot-Übersetzung
+    if lang != pivot_lang and (src_lang, pivot_lang) in packages and (pivot_lang, lang) in packages:
+        return [(src_lang, pivot_lang), (pivot_lang, lang)]
+    return None
+
+def _load_model(step):
+    """Lädt das Argos-Modell eines Übersetzungsschritts (from_code, to_code)."""
+    from_code, to_code = step
+    print(f"  -> Lade Modell {from_code}->{to_code}...")
+    with metrics.stage("model_load"):
+        import argostranslate.translate
+        model = argostranslate.translate.get_translation_from_codes(from_code, to_code)
+        TOKEN_COUNTERS[step] = _token_counter(model)
+        if TOKEN_COUNTERS[step] is None:
+            print(f"WARNUNG: Kein SentencePiece-Modell im Paket {from_code}->{to_code}, "
+                  f"Chunks nach max_chunk_length Zeichen.", file=sys.stderr)
+        return model
+
+def _token_counter(model):
+    """
+    Liefert eine Funktion, die Tokens mit dem SentencePiece-Modell des
+    geladenen Argos-Pakets zählt, so wie argostranslate die Eingabe für
+    ctranslate2 tokenisiert. None, wenn das Paket keins hat (dann wird nach
+    Zeichen gepackt).
+    """
+    translation = getattr(model, "underlying", model) # CachedTranslation
+    package_path = getattr(getattr(translation, "pkg", None), "package_path", None)
+    if package_path is None or not (Path(package_path) / "sentencepiece.model").is_file():
+        return None
+    import sentencepiece
+    processor = sentencepiece.SentencePieceProcessor(model_file=str(Path(package_path) / "sentencepiece.model"))
+    return lambda text: len(processor.encode(text))
+
+# Token-Zähler pro Übersetzungsschritt, gesetzt beim Laden des Modells
+TOKEN_COUNTERS = {}
+
+# Geladene Modelle, begrenzt über `model_cache_size` (siehe configure_model_cache)
+MODELS = ModelCache(_load_model)
+
+def configure_model_cache(config: dict, routes: dict):
+    """Setzt die Cache-Größe; ohne Angabe passen alle Schritte der Routen hinein."""
+    steps = {step for route in routes.values() if route for step in route}
+    MODELS.max_size = max(1, int(config.get("model_cache_size") or len(steps) or 1))
+
+# Glossar der Konfiguration (geschützte Begriffe, feste Übersetzungen), siehe configure_glossary
+GLOSSARY = None
 
-def translate_content(text: str, model, max_chunk_length: int) -> str:
-    """Übersetzt Text mit einem oder zwei (Pivot) vorab geladenen Modellen."""
+def configure_glossary(config: dict):
+    """Baut das Glossar aus `glossary` einmal pro Prozess auf."""
+    global GLOSSARY
+    GLOSSARY = load_glossary(config)
+
+def get_model(from_code, to_code):
+    """Liefert das (bei Bedarf geladene) Modell eines Schritts oder None."""
+    return MODELS.get((from_code, to_code))
+
+def _package_version(from_code, to_code) -> str:
+    """Liefert die Version des installierten Argos-Pakets für ein Sprachpaar."""
+    return installed_packages().get((from_code, to_code), "unknown")
+
+def get_step_model_id(from_code, to_code) -> str:
+    """Beschreibt das Modell eines einzelnen Übersetzungsschritts (Schlüssel der Translation Memory)."""
+    return f"argos:{from_code}-{to_code}@{_package_version(from_code, to_code)}"
+
+def get_model_id(route) -> str:
+    """Beschreibt die Route einer Zielsprache (inkl. Paketversionen) für das Manifest."""
+    return "argos:" + "+".join(f"{from_code}-{to_code}@{_package_version(from_code, to_code)}"
+                               for from_code, to_code in route)
+
+def translate_content(text: str, model, budget: int, count_tokens=None) -> str:
+    """
+    Übersetzt Text mit einem vorab geladenen Modell (ein Übersetzungsschritt).
+    Mit `count_tokens` sind die Chunks bis zu `budget` Tokens groß, sonst
+    bis zu `budget` Zeichen; ihre Größen gehen in die Messwerte ein. Argos
+    liefert Übersetzungen ohne Rand-Leerraum, daher bekommt das Modell jeden
+    Chunk ohne ihn, und der Leerraum an den Schnittstellen (nach Satzenden,
+    zwischen Wörtern) wird um die Übersetzung wieder eingesetzt.
+    """
     if not text or not text.strip() or not model:
         return text or ""
+    with metrics.stage("chunking"):
+        chunks = chunk_text(text, budget, count_tokens or len)
+    for _, size in chunks:
+        metrics.observe("chunk_tokens" if count_tokens else "chunk_chars", size, budget)
+    with metrics.stage("inference"):
+        translated_chunks = []
+        for chunk, _ in chunks:
+            stripped = chunk.strip()
+            if not stripped:
+                translated_chunks.append(chunk)
+                continue
+            leading = chunk[:len(chunk) - len(chunk.lstrip())]
+            trailing = chunk[len(chunk.rstrip()):]
+            translated_chunks.append(leading + model.translate(stripped) + trailing)
+    return "".join(translated_chunks)
 
-    # Pivot-Übersetzung
-    if isinstance(model, tuple):
-        model1, model2 = model
-        # Erster Schritt der Pivot-Übersetzung
-        chunks1 = chunk_text(text, max_chunk_length)
-        translated_chunks1 = [model1.translate(chunk) for chunk in chunks1]
-        intermediate_text = "".join(translated_chunks1)
-        
-        # Zweiter Schritt der Pivot-Übersetzung
-        chunks2 = chunk_text(intermediate_text, max_chunk_length)
-        translated_chunks2 = [model2.translate(chunk) for chunk in chunks2]
-        return "".join(translated_chunks2)
-    
-    # Direkte Übersetzung
+def translate_batch(texts: list, model, from_code: str, to_code: str, config: dict) -> list:
+    """
+    Übersetzt mehrere Texte mit einem Modell und meldet Segmente, Tokens und
+    Zeit des Sprachpaars an die Messwerte. Als Tokens zählen hier die
+    Wörter des Quelltexts (Argos tokenisiert erst intern). Die Chunks
+    richten sich nach dem Token-Budget `max_chunk_tokens`, ohne Tokenizer
+    nach `max_chunk_length` Zeichen.
+    """
+    start = time.perf_counter()
+    count_tokens = TOKEN_COUNTERS.get((from_code, to_code))
+    if count_tokens is not None:
+        budget = int(config.get("max_chunk_tokens", DEFAULT_MAX_CHUNK_TOKENS))
     else:
-        chunks = chunk_text(text, max_chunk_length)
-        translated_chunks = [model.translate(chunk) for chunk in chunks]
-        return "".join(translated_chunks)
+        budget = int(config.get("max_chunk_length", 2000))
+    translations = [translate_content(text, model, budget, count_tokens) for text in texts]
+    metrics.record_pair(from_code, to_code, sum(1 for text in texts if text.strip()),
+                        sum(len(text.split()) for text in texts), time.perf_counter() - start)
+    return translations
 
-def main():
-    """Hauptfunktion des Übersetzungsskripts."""
-    config = load_config()
+def translate_graph(segments: list, routes: dict, target_langs: list, config: dict, memory) -> dict:
+    """
+    Übersetzt die Segmente einer Datei entlang eines Übersetzungsgraphen.
+    Jede Sprache (auch eine Zwischensprache) wird genau einmal erzeugt und
+    dann für alle Zielsprachen verwendet, die von ihr abhängen: Bei der
+    Pivot-Übersetzung läuft der Schritt de->en nur einmal für fr, es und
+    eine direkte en-Ausgabe. Gibt {Sprache: übersetzte Segmente} zurück;
+    Sprachen, deren Modell nicht geladen werden konnte, fehlen darin.
+    """
+    src_lang = config.get("src_language", "de")
+    texts = {src_lang: segments}
+    for lang in target_langs:
+        for from_code, to_code in routes[lang]:
+            if to_code in texts:
+                continue
+            if from_code not in texts:
+                break
+            if not segments:
+                texts[to_code] = [] # Kein Modell nötig
+                continue
+            model = get_model(from_code, to_code)
+            if model is None:
+                print(f"FEHLER: Modell {from_code}->{to_code} nicht verfügbar, überspringe {lang}.", file=sys.stderr)
+                break
+            texts[to_code] = translate_segments(
+                texts[from_code], from_code, to_code, get_step_model_id(from_code, to_code),
+                lambda batch: translate_batch(batch, model, from_code, to_code, config), memory)
+    return texts
+
+def _is_translatable_front_matter(key, value, config: dict) -> bool:
+    """Alle String-Werte außer den transparenten Schlüsseln werden übersetzt (nicht nur key_value_keys)."""
+    transparent_keys = config.get("front_matter_transparent_keys", [])
+    return key not in transparent_keys and isinstance(value, str) and bool(value.strip())
+
+def _front_matter_parts(front_matter: dict, config: dict) -> dict:
+    """Die übersetzbaren Front-Matter-Werte, segmentiert ({Schlüssel: Teile})."""
+    return {key: segment_markdown(value, GLOSSARY) for key, value in front_matter.items()
+            if _is_translatable_front_matter(key, value, config)}
+
+def _output_header(front_matter: dict, front_matter_parts: dict, translations, lang: str, config: dict) -> str:
+    """Übersetztes Front Matter und Warnhinweis am Anfang einer Ausgabedatei."""
+    translated_front_matter = {}
+    for key, value in front_matter.items():
+        if key in front_matter_parts:
+            translated_front_matter[key] = render_markdown(front_matter_parts[key], translations, lang)
+        else:
+            translated_front_matter[key] = value
+
+    output_content_parts = []
+    if translated_front_matter:
+        output_content_parts.append("---")
+        # allow_unicode=True ist wichtig für Umlaute etc.
+        output_content_parts.append(yaml.safe_dump(translated_front_matter, allow_unicode=True, sort_keys=False).strip())
+        output_content_parts.append("---")
+
+    if config.get("insert_warnings", True):
+        warnings_mapping = config.get("warnings_mapping", {})
+        if lang in warnings_mapping:
+            output_content_parts.append("\n" + warnings_mapping[lang])
+
+    # Der Hauptinhalt folgt nach "\n" + "\n" (wie beim Zusammenfügen mit "\n".join)
+    header = "\n".join(output_content_parts)
+    return (header + "\n" if output_content_parts else "") + "\n"
+
+def translate_file(md_file_path: Path, outputs: list, routes: dict, config: dict, memory) -> list:
+    """
+    Übersetzt eine Datei in alle Zielsprachen aus `outputs` ([(Sprache,
+    Ausgabepfad), ...]) und schreibt die Ergebnisse atomar. Die Datei wird
+    als Strom verarbeitet: Zuerst wird nur das Front Matter gelesen und
+    übersetzt, danach läuft der Hauptinhalt in Fenstern von
+    `stream_window_segments` Segmenten durch den Übersetzungsgraphen und
+    wird sofort in die temporären Ausgabedateien geschrieben. Der
+    Speicherbedarf hängt so nicht von der Dateigröße ab.
+    Gibt die geschriebenen Sprachen zurück.
+    """
+    target_langs = [lang for lang, _ in outputs]
+    max_segments, max_bytes = window_limits(config)
+    writers = {}
+    written_langs = []
+    try:
+        with open(md_file_path, "r", encoding="utf-8") as f:
+            front_matter, body, has_front_matter = read_front_matter(f, md_file_path)
+            if has_front_matter:
+                body = skip_leading_whitespace(body)
+
+            # Front Matter: übersetzbare Werte segmentieren und gemeinsam übersetzen
+            front_matter_parts = _front_matter_parts(front_matter, config)
+            segments = [segment.text for parts in front_matter_parts.values() for segment in segments_of(parts)]
+            texts = translate_graph(segments, routes, target_langs, config, memory)
+
+            for lang, output_file_path in outputs:
+                if lang not in texts:
+                    continue
+                print(f"  -> Schreibe {lang}: {output_file_path}")
+                try:
+                    writer = AtomicTextWriter(output_file_path)
+                except OSError as e:
+                    print(f"FEHLER beim Schreiben der Datei {output_file_path}: {e}", file=sys.stderr)
+                    continue
+                # Wie bisher: die gesamte Ausgabe ohne Leerraum am Anfang und Ende, plus "\n"
+                body_writer = StrippedWriter(writer, lstrip=True, rstrip=True)
+                body_writer.write(_output_header(front_matter, front_matter_parts, iter(texts[lang]), lang, config))
+                writers[lang] = (writer, body_writer)
+
+            # Hauptinhalt fensterweise durch den Übersetzungsgraphen
+            for window in iter_windows(iter_parts(body, GLOSSARY), max_segments, max_bytes):
+                texts = translate_graph([segment.text for segment in segments_of(window)],
+                                        routes, list(writers), config, memory)
+                for lang in list(writers):
+                    if lang not in texts:
+                        writers.pop(lang)[0].discard()
+                        continue
+                    with metrics.stage("file_write"):
+                        writers[lang][1].write(render_markdown(window, texts[lang], lang))
+
+        for lang, (writer, body_writer) in writers.items():
+            try:
+                with metrics.stage("file_write"):
+                    body_writer.close()
+                    writer.write("\n")
+                    writer.commit()
+            except OSError as e:
+                print(f"FEHLER beim Schreiben der Datei {writer.path}: {e}", file=sys.stderr)
+                continue
+            metrics.count("outputs_written")
+            written_langs.append(lang)
+    finally:
+        for writer, _ in writers.values():
+            writer.discard() # Nach commit() ohne Wirkung
+    return written_langs
+
+def iter_file_segments(md_file_path: Path, config: dict):
+    """Die Segmente einer Datei (Front Matter und Hauptinhalt, wie in translate_file)."""
+    with open(md_file_path, "r", encoding="utf-8") as f:
+        front_matter, body, has_front_matter = read_front_matter(f, md_file_path)
+        if has_front_matter:
+            body = skip_leading_whitespace(body)
+        for parts in _front_matter_parts(front_matter, config).values():
+            for segment in segments_of(parts):
+                yield segment.text
+        for part in iter_parts(body, GLOSSARY):
+            if isinstance(part, Segment):
+                yield part.text
+
+def _record_graph(plan: SegmentPlan, texts: dict, routes: dict, target_langs):
+    """Übernimmt die Ergebnisse aller Schritte eines Übersetzungsgraphen in den Plan."""
+    for lang in target_langs:
+        for from_code, to_code in routes[lang]:
+            if from_code in texts and to_code in texts:
+                plan.record(texts[from_code], texts[to_code], from_code, to_code, get_step_model_id(from_code, to_code))
+
+def _planned_segments(task, config: dict):
+    """Segmente und Zielsprachen einer Aufgabe für den Plan (siehe plan_windows)."""
+    md_file_path, outputs = task
+
+    def segments():
+        with metrics.stage("planning"):
+            yield from iter_file_segments(md_file_path, config)
+    return segments(), [lang for lang, _ in outputs]
+
+def translate_plan(plan: SegmentPlan, routes: dict, config: dict, memory, jobs: int):
+    """
+    Duplikaterkennung: Schickt jedes einmalige Segment eines Fensters von
+    Dateien genau einmal durch den Übersetzungsgraphen seiner Zielsprachen,
+    in Paketen von `stream_window_segments` (bei jobs > 1 in
+    Worker-Prozessen). Die Dateien des Fensters erhalten ihre Übersetzungen
+    danach aus dem Plan.
+    """
+    max_segments, _ = window_limits(config)
+    work = [(langs, segments[start:start + max_segments])
+            for langs, segments in plan.groups().items()
+            for start in range(0, len(segments), max_segments)]
+    print(f"\nÜbersetze {len(plan)} einmalige Segmente...")
+
+    if jobs > 1 and len(work) > 1:
+        jobs = min(jobs, len(work))
+        print(f"Verteile {len(work)} Pakete auf {jobs} Worker-Prozesse...")
+        with create_pool(jobs, _init_worker, (config, threads_per_worker(jobs))) as pool:
+            results = list(pool.map(_translate_segments_task, work))
+        for (langs, _), (texts, hits, misses, worker_metrics) in zip(work, results):
+            _record_graph(plan, texts, routes, langs)
+            metrics.METRICS.merge(worker_metrics)
+            if memory is not None:
+                memory.hits += hits
+                memory.misses += misses
+    else:
+        for langs, segments in work:
+            translate_graph(segments, routes, list(langs), config, plan)
+    plan.seal()
+
+def render_document(text: str, lang: str, translate, config: dict) -> str:
+    """
+    Übersetzt ein Dokument aus dem Speicher und liefert genau den Inhalt, den
+    translate_file() schreiben würde. `translate(texts)` übersetzt die
+    Segment-Texte von Front Matter und Hauptinhalt in einem Aufruf (im
+    Prozess oder über den Übersetzungsdienst).
+    """
+    front_matter, body, has_front_matter = read_front_matter(io.StringIO(text))
+    if has_front_matter:
+        body = skip_leading_whitespace(body)
+    front_matter_parts = _front_matter_parts(front_matter, config)
+    front_matter_segments = [segment.text for parts in front_matter_parts.values() for segment in segments_of(parts)]
+    parts = list(iter_parts(body, GLOSSARY))
+    translations = translate(front_matter_segments + [segment.text for segment in segments_of(parts)])
+    output = io.StringIO()
+    body_writer = StrippedWriter(output, lstrip=True, rstrip=True)
+    body_writer.write(_output_header(front_matter, front_matter_parts,
+                                     iter(translations[:len(front_matter_segments)]), lang, config))
+    body_writer.write(render_markdown(parts, translations[len(front_matter_segments):], lang))
+    body_writer.close()
+    output.write("\n")
+    return output.getvalue()
+
+def service_digest(config: dict, routes: dict) -> str:
+    """Kennung von Konfiguration und Paketen; Dienst und Client müssen übereinstimmen."""
+    model_ids = {lang: get_model_id(route) for lang, route in routes.items() if route}
+    return translation_manifest.config_digest(dict(config, model_ids=model_ids),
+                                              OUTPUT_CONFIG_KEYS + ("model_ids",), PIPELINE_VERSION)
+
+# Zustand des Übersetzungsdienstes (--serve) bzw. einer Vorschau (--preview)
+_SERVICE = {}
+
+def _prepare_service(args, config: dict) -> dict:
+    """Pakete aus dem Modellspeicher bereitstellen und die Routen bestimmen."""
+    store = open_model_store(config)
+    if store is not None:
+        provide_packages(store, config, config.get("src_language", "de"), config.get("target_langs", []),
+                         refresh=args.refresh_models)
+        store.close()
+    routes = load_translation_models(config.get("src_language", "de"), config.get("target_langs", []))
+    configure_model_cache(config, routes)
+    configure_glossary(config)
+    _SERVICE.update(config=config, routes=routes)
+    return routes
+
+def translate_for_service(texts: list, lang: str) -> list:
+    """Übersetzt Segment-Texte für den Dienst bzw. --preview (mit Translation Memory)."""
+    texts_by_lang = translate_graph(texts, _SERVICE["routes"], [lang], _SERVICE["config"], _SERVICE.get("memory"))
+    if lang not in texts_by_lang:
+        raise RuntimeError(f"Modell für {lang} nicht verfügbar.")
+    return texts_by_lang[lang]
+
+def _start_service():
+    """Im Inferenz-Thread des Dienstes: Translation Memory öffnen, alle Modelle laden."""
+    _SERVICE["memory"] = open_translation_memory(_SERVICE["config"])
+    for route in _SERVICE["routes"].values():
+        for step in route or []:
+            get_model(*step)
+
+def _stop_service():
+    memory = _SERVICE.pop("memory", None)
+    if memory is not None:
+        memory.close()
+        print(memory.summary())
+
+def serve_translations(args):
+    """
+    --serve: Hält die Modelle aller Routen geladen und beantwortet Anfragen
+    über den Socket (siehe translation_common/daemon.py), bis der Prozess
+    beendet wird.
+    """
+    config = load_config(args)
+    routes = _prepare_service(args, config)
+    langs = [lang for lang, route in routes.items() if route]
+    settings = daemon.daemon_settings(config, "argos")
+    daemon.serve("argos", args.address or settings["address"], langs, translate_for_service,
+                 lambda text, lang, translate: render_document(text, lang, translate, config),
+                 service_digest(config, routes), settings, initialize=_start_service, shutdown=_stop_service)
+
+def preview_file(args) -> str:
+    """
+    --preview: Übersetzt eine einzelne Datei nach --lang, ohne Manifest und
+    ohne DEV/ anzufassen. Läuft ein Übersetzungsdienst mit derselben
+    Konfiguration, übersetzt er; sonst wird im Prozess übersetzt.
+    """
+    config = load_config(args)
+    target_langs = config.get("target_langs", [])
+    lang = args.lang or target_langs[0]
+    if lang not in target_langs:
+        print(f"FEHLER: Zielsprache '{lang}' ist nicht konfiguriert (target_langs: {', '.join(target_langs)}).", file=sys.stderr)
+        sys.exit(1)
+    with open(args.preview, "r", encoding="utf-8") as f:
+        text = f.read()
+    address = args.address or daemon.daemon_settings(config, "argos")["address"]
+    # Die Routen der installierten Pakete genügen für die Kennung; der Dienst hat sie bereitgestellt
+    digest = service_digest(config, load_translation_models(config.get("src_language", "de"), target_langs))
+    try:
+        response = daemon.request(address, {"lang": lang, "markdown": text, "config_digest": digest})
+    except daemon.DaemonError as e:
+        print(f"WARNUNG: Übersetzungsdienst lehnt die Anfrage ab ({e}), übersetze selbst.", file=sys.stderr)
+        response = None
+    if response is not None:
+        print(f"Übersetzt vom Dienst unter {address}.")
+        return response["markdown"]
+
+    routes = _prepare_service(args, config)
+    if not routes.get(lang):
+        print(f"FEHLER: Kein Modell für {lang} installiert.", file=sys.stderr)
+        sys.exit(1)
+    _SERVICE["memory"] = open_translation_memory(config)
+    try:
+        return render_document(text, lang, lambda texts: translate_for_service(texts, lang), config)
+    finally:
+        _stop_service()
+
+# Zustand eines Worker-Prozesses (--jobs): Modelle bleiben für alle Aufgaben geladen.
+_WORKER = {}
+
+def _init_worker(config: dict, threads: int):
+    """
+    Initialisiert einen Worker: Thread-Limit setzen, Routen bestimmen. Die
+    Modelle lädt der Worker beim ersten Segment und behält sie danach; das
+    Thread-Limit greift, weil argostranslate erst dann importiert wird.
+    """
+    limit_threads(threads)
+    _WORKER["config"] = config
+    _WORKER["routes"] = load_translation_models(config.get("src_language", "de"), config.get("target_langs", []))
+    configure_model_cache(config, _WORKER["routes"])
+    configure_glossary(config)
+    _WORKER["memory"] = open_translation_memory(config)
+    if _WORKER["memory"] is not None:
+        # Beim Beenden des Workers schreiben und schließen; verdrängt wird im Hauptprozess
+        atexit.register(_WORKER["memory"].close, evict=False)
+
+def _translate_task(task) -> tuple:
+    """Übersetzt eine Datei in alle offenen Sprachen im Worker."""
+    md_file_path, outputs = task
+    memory = _WORKER["memory"]
+    hits, misses = (memory.hits, memory.misses) if memory is not None else (0, 0)
+    written_langs = translate_file(md_file_path, outputs, _WORKER["routes"], _WORKER["config"], memory)
+    if memory is not None:
+        hits, misses = memory.hits - hits, memory.misses - misses
+    return written_langs, hits, misses, metrics.METRICS.drain()
+
+def _translate_segments_task(task) -> tuple:
+    """Übersetzt ein Paket einmaliger Segmente (Duplikaterkennung) im Worker."""
+    langs, segments = task
+    memory = _WORKER["memory"]
+    hits, misses = (memory.hits, memory.misses) if memory is not None else (0, 0)
+    texts = translate_graph(segments, _WORKER["routes"], list(langs), _WORKER["config"], memory)
+    if memory is not None:
+        hits, misses = memory.hits - hits, memory.misses - misses
+    return texts, hits, misses, metrics.METRICS.drain()
+
+def run(args):
+    """Übersetzt alle geänderten Dateien (siehe main)."""
+    config = load_config(args)
     src_dir = Path(config.get("src_dir", "DE"))
     output_base_dir = Path(config.get("output_dir", "DEV"))
     src_lang = config.get("src_language", "de")
     target_langs = config.get("target_langs", [])
-    max_chunk_length = config.get("max_chunk_length", 2000)
 
-    # Lade alle Modelle, die für die konfigurierten Sprachen benötigt werden
-    translation_models = load_translation_models(src_lang, target_langs)
+    # Routen (direkt oder Pivot) aus den installierten Paketen bestimmen. Aus
+    # dem Modellspeicher bereitgestellt (ggf. mit Paketindex und Download)
+    # werden vorab nur fehlende Routen, mit --refresh-models alle; ein Lauf
+    # ohne Arbeit braucht kein Netzwerk. Modelle werden erst geladen, wenn
+    # eine Datei übersetzt werden muss
+    store = open_model_store(config)
+    provided = []
+    with metrics.stage("initialize"):
+        if store is not None:
+            packages = installed_packages()
+            provided = [lang for lang in target_langs
+                        if args.refresh_models or find_route(packages, src_lang, lang) is None]
+            if provided:
+                provide_packages(store, config, src_lang, provided, refresh=args.refresh_models)
+        routes = load_translation_models(src_lang, target_langs)
+        configure_model_cache(config, routes)
+        configure_glossary(config)
 
     if not src_dir.exists():
         print(f"Quellordner {src_dir} existiert nicht, beende.", file=sys.stderr)
         sys.exit(1)
 
-    for md_file_path in src_dir.rglob("*.md"):
-        relative_path = md_file_path.relative_to(src_dir)
-        print(f"\nVerarbeite Datei: {md_file_path}")
-
-        content = md_file_path.read_text(encoding="utf-8")
-        front_matter = {}
-        main_content = content
+    manifest_file = translation_manifest.manifest_path(config, output_base_dir)
+    manifest = translation_manifest.load_manifest(manifest_file)
+    translation_manifest.prune_deleted_sources(manifest, src_dir, output_base_dir)
+    config_hash = translation_manifest.config_digest(config, OUTPUT_CONFIG_KEYS, PIPELINE_VERSION)
+    model_ids = {lang: get_model_id(route) for lang, route in routes.items() if route}
 
-        if content.startswith('---'):
-            try:
-                parts = content.split('---', 2)
-                if len(parts) > 2:
-                    front_matter = yaml.safe_load(parts[1]) or {}
-                    main_content = parts[2].strip()
-            except yaml.YAMLError as e:
-                print(f"WARNUNG: YAML-Fehler in {md_file_path}: {e}", file=sys.stderr)
-        
+    # Aufgaben sammeln: eine pro Datei mit allen Sprachen, deren Ausgabe nicht aktuell ist
+    tasks = []
+    entries = []
+    for md_file_path in sorted(src_dir.rglob("*.md")):
+        relative_path = md_file_path.relative_to(src_dir)
+        source_digest = translation_manifest.file_digest(md_file_path)
+        outputs = []
+        file_entries = {}
         for lang in target_langs:
-            model = translation_models.get(lang)
-            if not model:
-                print(f"  -> Überspringe Sprache {lang} für {md_file_path.name}, da kein Modell geladen werden konnte.")
+            if not routes.get(lang):
+                print(f"  -> Überspringe Sprache {lang} für {md_file_path.name}, da kein Modell installiert ist.")
                 continue
+            entry = translation_manifest.make_entry(
+                relative_path.as_posix(), lang, model_ids[lang], config_hash, source_digest)
+            output_file_path = output_base_dir / lang / relative_path
+            if not args.force and translation_manifest.is_up_to_date(manifest, entry, output_file_path):
+                continue
+            outputs.append((lang, output_file_path))
+            file_entries[lang] = entry
+        if not outputs:
+            print(f"Überspringe unveränderte Datei: {md_file_path}")
+            metrics.count("files_skipped")
+            continue
+        tasks.append((md_file_path, outputs))
+        entries.append(file_entries)
 
-            target_dir = output_base_dir / lang / relative_path.parent
-            target_dir.mkdir(parents=True, exist_ok=True)
-            output_file_path = target_dir / md_file_path.name
-            
-            print(f"  -> Übersetze nach {lang} für {output_file_path}")
-
-            # Übersetze Front Matter
-            translated_front_matter = {}
-            transparent_keys = config.get("front_matter_transparent_keys", [])
-            key_value_keys = config.get("front_matter_key_value_keys", [])
-            for key, value in front_matter.items():
-                if key in transparent_keys or not isinstance(value, str) or not value.strip():
-                    translated_front_matter[key] = value
-                else:
-                    # Alle anderen Keys werden übersetzt, nicht nur die in key_value_keys
-                    translated_front_matter[key] = translate_content(value, model, max_chunk_length)
-
-            # Übersetze den Hauptinhalt
-            translated_main_content = translate_content(main_content, model, max_chunk_length)
-
-            # Baue den neuen Inhalt zusammen
-            output_content_parts = []
-            if translated_front_matter:
-                output_content_parts.append("---")
-                # allow_unicode=True ist wichtig für Umlaute etc.
-                output_content_parts.append(yaml.safe_dump(translated_front_matter, allow_unicode=True, sort_keys=False).strip())
-                output_content_parts.append("---")
-            
-            if config.get("insert_warnings", True):
-                warnings_mapping = config.get("warnings_mapping", {})
-                if lang in warnings_mapping:
-                    output_content_parts.append("\n" + warnings_mapping[lang])
-
-            output_content_parts.append("\n" + translated_main_content)
-            
-            final_output = "\n".join(output_content_parts).strip() + "\n"
+    # Pakete der Sprachen mit Arbeit aus dem Modellspeicher bereitstellen;
+    # dabei installierte neuere Versionen gehen in die Manifest-Einträge ein
+    pending = sorted({lang for _, outputs in tasks for lang, _ in outputs} - set(provided))
+    if store is not None and pending:
+        with metrics.stage("initialize"):
+            provide_packages(store, config, src_lang, pending)
+            routes.update((lang, route) for lang, route in load_translation_models(src_lang, pending).items() if route)
+            configure_model_cache(config, routes)
+        for file_entries in entries:
+            for lang, entry in file_entries.items():
+                entry["model"] = get_model_id(routes[lang])
 
-            try:
-                output_file_path.write_text(final_output, encoding="utf-8")
-            except Exception as e:
-                print(f"FEHLER beim Schreiben der Datei {output_file_path}: {e}", file=sys.stderr)
+    memory = open_translation_memory(config)
+    plan = None
+    if tasks and config.get("deduplicate_segments", True):
+        plan = SegmentPlan(memory, config.get("dedup_window_segments") or DEFAULT_MAX_SEGMENTS)
+
+    if args.jobs > 1 and len(tasks) > 1 and plan is None:
+        jobs = min(args.jobs, len(tasks))
+        print(f"\nÜbersetze {len(tasks)} Dateien mit {jobs} Worker-Prozessen...")
+        with create_pool(jobs, _init_worker, (config, threads_per_worker(jobs))) as pool:
+            results = list(pool.map(_translate_task, tasks))
+        for _, hits, misses, worker_metrics in results:
+            metrics.METRICS.merge(worker_metrics)
+            if memory is not None:
+                memory.hits += hits
+                memory.misses += misses
+        written = [result[0] for result in results]
+    else:
+        written = []
+        # Mit Duplikaterkennung fensterweise: planen, einmalige Segmente
+        # übersetzen, dann die Dateien des Fensters aus dem Plan schreiben
+        windows = [tasks] if plan is None else plan_windows(plan, tasks, lambda task: _planned_segments(task, config))
+        for window in windows:
+            if plan is not None:
+                translate_plan(plan, routes, config, memory, args.jobs)
+            for md_file_path, outputs in window:
+                print(f"\nVerarbeite Datei: {md_file_path}")
+                written.append(translate_file(md_file_path, outputs, routes, config, plan if plan is not None else memory))
+
+    # Manifest in fester Reihenfolge aktualisieren (unabhängig von der Worker-Reihenfolge)
+    for file_entries, written_langs in zip(entries, written):
+        for lang in written_langs:
+            translation_manifest.record(manifest, file_entries[lang])
 
+    translation_manifest.save_manifest(manifest_file, manifest)
+    metrics.count("files_translated", sum(1 for written_langs in written if written_langs))
+    if plan is not None:
+        metrics.count("segments_total", plan.occurrences)
+        metrics.count("segments_unique", plan.unique)
+        metrics.count("segments_from_plan", plan.hits)
+        print(plan.summary())
+    if memory is not None:
+        metrics.count("tm_hits", memory.hits)
+        metrics.count("tm_misses", memory.misses)
+        memory.close()
+        print(memory.summary())
+    if store is not None:
+        store.close()
+        print(store.summary())
+    print(metrics.METRICS.summary("argos"))
     print("\nÜbersetzungsprozess abgeschlossen.")
 
+def main(argv=None):
+    """Hauptfunktion des Übersetzungsskripts."""
+    args = parse_args(argv)
+    if args.preview:
+        # Auf stdout steht nur die Übersetzung, alle Meldungen gehen nach stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            translated = preview_file(args)
+        if args.output:
+            write_text_atomic(args.output, translated)
+        else:
+            sys.stdout.write(translated)
+        return
+    try:
+        with metrics.profiled(args.profile):
+            if args.serve:
+                serve_translations(args)
+            else:
+                run(args)
+    finally:
+        # Auch bei Abbruch (oder sys.exit) schreiben, damit das Monitoring den Lauf sieht
+        if args.metrics:
+            metrics.write_report(args.metrics, metrics.METRICS, "argos")
+
 if __name__ == "__main__":
     main()
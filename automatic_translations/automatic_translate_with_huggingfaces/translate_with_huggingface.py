@@ -1,10 +1,42 @@
+import argparse
+import atexit
+import contextlib
+import io
 import os
+import shutil
 import sys
+import tempfile
+import time
 import yaml
 import glob
 import re
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-import spacy # NEU: Importiere spaCy
+from collections import OrderedDict
+from pathlib import Path
+# transformers, torch und spaCy werden erst beim ersten Bedarf importiert
+# (siehe _load_translator und get_sentence_segmenter); ihr Import allein
+# dauert mehrere Sekunden.
+
+# Gemeinsame Module liegen entweder neben dem Skript (.github/scripts/)
+# oder eine Ebene höher (Repository-Layout unter automatic_translations/).
+_SCRIPT_DIR = Path(__file__).resolve().parent
+for _candidate in (_SCRIPT_DIR, _SCRIPT_DIR.parent):
+    if (_candidate / "translation_common").is_dir():
+        sys.path.insert(0, str(_candidate))
+        break
+
+from translation_common import manifest as translation_manifest
+from translation_common.atomic_io import AtomicTextWriter, write_text_atomic
+from translation_common import daemon
+from translation_common import metrics
+from translation_common.glossary import load_glossary
+from translation_common.markdown_segments import Segment, iter_parts, render_markdown, segment_markdown, segments_of
+from translation_common.model_cache import ModelCache
+from translation_common.model_store import is_offline, open_model_store
+from translation_common.parallel import create_pool, limit_threads, threads_per_worker
+from translation_common.segment_plan import DEFAULT_MAX_SEGMENTS, SegmentPlan, plan_windows
+from translation_common.streaming import (
+    StrippedWriter, iter_windows, read_front_matter, skip_leading_whitespace, window_limits)
+from translation_common.translation_memory import open_translation_memory, translate_segments
 
 # Standardkonfiguration (wird aus config.yaml geladen)
 CONFIG = {
@@ -23,226 +55,840 @@ CONFIG = {
         "de-fr": "Helsinki-NLP/opus-mt-de-fr",
         "de-es": "Helsinki-NLP/opus-mt-de-es",
     },
-    "max_chunk_length": 100  # Will be updated from config.yaml
+    "max_chunk_length": 100,  # Will be updated from config.yaml
+    "batch_size": 16,
+    "backend": "transformers"
 }
 
-TRANSLATORS = {}
-TOKENIZERS = {}
-SPACY_NLP_MODEL = None # Globale Variable für das spaCy Modell
+# Laufzeiten für die Inferenz (config.yaml: backend)
+BACKENDS = ("transformers", "torch-int8", "ctranslate2")
+# Satzsegmentierung (`sentence_segmenter`): statistischer senter des spaCy
+# Modells, regelbasierter spaCy sentencizer (ohne Modell) oder nur Regex
+SENTENCE_SEGMENTERS = ("senter", "sentencizer", "regex")
+CTRANSLATE2_DEFAULTS = {
+    "compute_type": "int8",
+    "model_dir": ".cache/ctranslate2",
+    "beam_size": 4,
+}
 
-def initialize_translators(config: dict):
-    """Initialisiert die Übersetzer-Pipelines und das spaCy Modell für alle Zielsprachen."""
-    print("Initialisiere Hugging Face Übersetzer-Pipelines...")
-    src_lang = config['src_language']
-    use_multilingual = 'multi' in config['translation_models']
+# Wird erhöht, wenn sich die erzeugte Ausgabe ändert (invalidiert das Manifest).
+PIPELINE_VERSION = 5
+
+# Konfigurationsschlüssel, die das Übersetzungsergebnis beeinflussen.
+OUTPUT_CONFIG_KEYS = (
+    "src_language",
+    "insert_warnings",
+    "warnings_mapping",
+    "max_chunk_length",
+    "sentence_segmenter",
+    "glossary",
+)
+
+# Teil der Fehlermarker in translate_text(); solche Ergebnisse werden nicht gecacht.
+TRANSLATION_ERROR_MARKER = "Übersetzungsfehler: "
+
+SPACY_NLP_MODEL = None # spaCy Modell; None = noch nicht geladen, False = nicht verfügbar
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+') # Regex-Fallback der Satzsegmentierung
+# Satzgrenzen pro Segment-Text; jede Zielsprache nutzt dieselben, ohne neu zu segmentieren
+SENTENCE_CACHE = OrderedDict()
+SENTENCE_CACHE_SIZE = 50000
+TRANSLATION_MEMORY = None # Persistente Translation Memory (siehe open_translation_memory)
+SEGMENT_PLAN = None # Einmalige Segmente des aktuellen Fensters (siehe translate_plan); None = ohne Duplikaterkennung
+GLOSSARY = None # Geschützte Begriffe und feste Übersetzungen (config.yaml: glossary)
+MODEL_PATHS = {} # Modellname -> lokaler Ordner im Modellspeicher (siehe provide_models)
+MODEL_VERSIONS = {} # Modellname -> Commit im Modellspeicher bzw. aus model_revisions (siehe model_version)
+# Nicht benötigte Gewichtsformate (TensorFlow, Flax, Rust, ONNX) werden nicht geladen
+HF_IGNORE_PATTERNS = ["*.h5", "*.msgpack", "*.ot", "*.onnx"]
+
+def parse_args(argv=None):
+    """Liest die Kommandozeilenoptionen."""
+    parser = argparse.ArgumentParser(description="Übersetzt Markdown-Dateien mit Hugging Face Modellen.")
+    parser.add_argument("--force", action="store_true",
+                        help="Alle Dateien übersetzen, auch wenn das Manifest sie als aktuell führt.")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Anzahl paralleler Worker-Prozesse (Standard: 1, seriell).")
+    parser.add_argument("--metrics", metavar="DATEI",
+                        help="Messwerte (Zeit pro Stufe, Tokens/s, Speicher) als JSON oder, bei .prom, "
+                             "im Prometheus-Textformat schreiben.")
+    parser.add_argument("--profile", metavar="DATEI",
+                        help="Lauf mit cProfile aufzeichnen und die Statistik in DATEI schreiben.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Modelle nur aus dem Modellspeicher verwenden, nichts herunterladen.")
+    parser.add_argument("--refresh-models", action="store_true",
+                        help="Neueste Modell-Revisionen abfragen und bei Änderung in den Modellspeicher laden.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Als Übersetzungsdienst laufen: Modelle geladen halten und Anfragen über den Socket beantworten.")
+    parser.add_argument("--preview", metavar="DATEI",
+                        help="Nur DATEI übersetzen und auf stdout ausgeben (über den Dienst, falls er läuft).")
+    parser.add_argument("--lang", metavar="SPRACHE",
+                        help="Zielsprache für --preview (Standard: erste Sprache aus target_langs).")
+    parser.add_argument("--output", metavar="DATEI",
+                        help="Ergebnis von --preview in DATEI schreiben statt auf stdout.")
+    parser.add_argument("--address", metavar="ADRESSE",
+                        help="Socket des Dienstes (Pfad oder host:port, Standard: daemon.address aus config.yaml).")
+    return parser.parse_args(argv)
+
+def _ctranslate2_settings(config: dict) -> dict:
+    settings = dict(CTRANSLATE2_DEFAULTS)
+    settings.update(config.get('ctranslate2') or {})
+    return settings
+
+def model_version(config: dict, model_name: str):
+    """
+    Version (Commit) eines Modells: der in `model_revisions` festgelegte, der
+    von provide_models bereitgestellte oder sonst der neueste im Index des
+    Modellspeichers (ohne Netzwerk). None ohne Modellspeicher.
+    """
+    if model_name not in MODEL_VERSIONS:
+        version = (config.get('model_revisions') or {}).get(model_name)
+        if version is None:
+            store = open_model_store(config)
+            version = store.version(f"hf:{model_name}") if store is not None else None
+        MODEL_VERSIONS[model_name] = version
+    return MODEL_VERSIONS[model_name]
+
+def get_model_id(config: dict, target_lang: str) -> str:
+    """
+    Liefert den Modellnamen, der für eine Zielsprache verwendet wird (für das
+    Manifest und die Translation Memory), samt Version (Commit) des Modells,
+    damit neue Modellstände (--refresh-models, model_revisions) die Ausgaben
+    invalidieren. Andere Backends als `transformers` liefern abweichende
+    Ausgaben und werden daher mit angegeben.
+    """
+    model_name = _model_name(config, target_lang)
+    model_id = f"hf:{model_name}"
+    version = model_version(config, model_name) if model_name else None
+    if version:
+        model_id += f"@{version}"
+    backend = config.get('backend', 'transformers')
+    if backend == 'ctranslate2':
+        settings = _ctranslate2_settings(config)
+        model_id += f"#ctranslate2-{settings['compute_type']}-beam{settings['beam_size']}"
+    elif backend != 'transformers':
+        model_id += f"#{backend}"
+    return model_id
+
+class CTranslate2Translator:
+    """
+    Übersetzer auf Basis von CTranslate2 mit derselben Aufrufschnittstelle wie
+    die transformers-Pipeline: `translator(texts, max_length=..., batch_size=...)`
+    liefert [{'translation_text': ...}, ...], der Tokenizer liegt in `.tokenizer`.
+    """
+
+    def __init__(self, model_dir, tokenizer, compute_type: str, beam_size: int):
+        import ctranslate2
+        self.tokenizer = tokenizer
+        self.beam_size = beam_size
+        # intra_threads=0 übernimmt OMP_NUM_THREADS (siehe --jobs)
+        self.translator = ctranslate2.Translator(
+            str(model_dir), device="cpu", compute_type=compute_type,
+            intra_threads=int(os.environ.get("OMP_NUM_THREADS", 0)))
+
+    def __call__(self, texts, max_length=None, batch_size=None, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        sources = [self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text)) for text in texts]
+        results = self.translator.translate_batch(
+            sources, max_batch_size=batch_size or len(sources), beam_size=self.beam_size,
+            max_decoding_length=max_length or self.tokenizer.model_max_length)
+        return [{'translation_text': self.tokenizer.decode(
+                    self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True)}
+                for result in results]
 
-    for target_lang in config['target_langs']:
-        model_key = 'multi' if use_multilingual else f"{src_lang}-{target_lang}"
-        model_name = config['translation_models'].get(model_key)
+def _converted_model_dir(model_name: str, settings: dict, source: str = None) -> Path:
+    """
+    Liefert das Verzeichnis des nach CTranslate2 konvertierten Modells und
+    konvertiert es beim ersten Mal. Konvertiert wird in ein temporäres
+    Verzeichnis, das danach umbenannt wird; parallele Worker sehen so nie ein
+    halb geschriebenes Modell. Kommt das Modell aus dem Modellspeicher
+    (`source`), enthält der Name den Anfang seiner Prüfsumme, damit eine neue
+    Version neu konvertiert wird.
+    """
+    cache_dir = Path(settings['model_dir'])
+    model_dir = cache_dir / f"{model_name.replace('/', '--')}-{settings['compute_type']}"
+    if source:
+        model_dir = model_dir.with_name(f"{model_dir.name}-{Path(source).name[:12]}")
+    if (model_dir / "model.bin").exists():
+        return model_dir
+
+    import ctranslate2
+    print(f"Konvertiere {model_name} nach CTranslate2 ({settings['compute_type']}), Ziel: {model_dir}...")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".convert-", dir=str(cache_dir))
+    try:
+        converter = ctranslate2.converters.TransformersConverter(source or model_name)
+        converter.convert(tmp_dir, quantization=settings['compute_type'], force=True)
+        os.rename(tmp_dir, model_dir)
+    except OSError:
+        if not (model_dir / "model.bin").exists():
+            raise
+        # Ein anderer Worker war schneller
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return model_dir
+
+def _load_translator(target_lang: str):
+    """Lädt die Übersetzer-Pipeline für eine Zielsprache (None, wenn kein Modell konfiguriert ist)."""
+    src_lang = CONFIG['src_language']
+    use_multilingual = 'multi' in CONFIG['translation_models']
+    model_key = 'multi' if use_multilingual else f"{src_lang}-{target_lang}"
+    model_name = _model_name(CONFIG, target_lang)
+
+    if not model_name:
+        print(f"WARNUNG: Kein Modell für '{model_key}' gefunden. Sprache '{target_lang}' wird übersprungen.", file=sys.stderr)
+        return None
+
+    backend = CONFIG.get('backend', 'transformers')
+    print(f"Lade Modell: {model_name} für {src_lang} nach {target_lang} (Backend: {backend})...")
+    try:
+        with metrics.stage("model_load"):
+            translator = _create_translator(model_name, src_lang, target_lang, use_multilingual, backend)
+    except Exception as e:
+        print(f"FEHLER: Modell {model_name} konnte nicht geladen werden: {e}. Sprache '{target_lang}' wird übersprungen.", file=sys.stderr)
+        return None
+    print(f"Modell {model_name} erfolgreich geladen.")
+    return translator
+
+def _create_translator(model_name: str, src_lang: str, target_lang: str, use_multilingual: bool, backend: str):
+    """Erzeugt die Pipeline (bzw. den CTranslate2-Übersetzer) für ein Modell."""
+    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+    source = MODEL_PATHS.get(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(source or model_name)
+    if backend == 'ctranslate2':
+        settings = _ctranslate2_settings(CONFIG)
+        return CTranslate2Translator(_converted_model_dir(model_name, settings, source), tokenizer,
+                                     settings['compute_type'], int(settings['beam_size']))
+    model = AutoModelForSeq2SeqLM.from_pretrained(source or model_name)
+    if backend == 'torch-int8':
+        # Dynamische Quantisierung: Gewichte der Linear-Schichten als int8
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline(
+        "translation", model=model, tokenizer=tokenizer,
+        src_lang=src_lang if use_multilingual else None,
+        tgt_lang=target_lang if use_multilingual else None,
+        device=-1 # Use CPU by default in CI/CD
+    )
 
-        if not model_name:
-            print(f"WARNUNG: Kein Modell für '{model_key}' gefunden. Sprache '{target_lang}' wird übersprungen.", file=sys.stderr)
+def _model_name(config: dict, target_lang: str):
+    """Name des Hugging Face Modells für eine Zielsprache (None, wenn keins konfiguriert ist)."""
+    models = config['translation_models']
+    return models.get('multi' if 'multi' in models else f"{config['src_language']}-{target_lang}")
+
+def _download_model(store, model_name: str, revision=None):
+    """
+    Lädt einen Snapshot des Modells (ohne nicht benötigte Gewichtsformate) in
+    den Modellspeicher; die Version ist der Commit des Modell-Repositorys.
+    Ist genau dieser Commit schon gespeichert, wird nichts geladen.
+    """
+    from huggingface_hub import HfApi, snapshot_download
+    version = HfApi().model_info(model_name, revision=revision).sha
+    path = store.resolve(f"hf:{model_name}", version)
+    if path is not None:
+        return path
+    print(f"  -> Lade {model_name} ({version[:12]}) in den Modellspeicher...")
+    staging = store.staging()
+    kwargs = dict(repo_id=model_name, revision=version, local_dir=str(staging), ignore_patterns=HF_IGNORE_PATTERNS)
+    try:
+        with metrics.stage("model_download"):
+            try:
+                snapshot_download(local_dir_use_symlinks=False, **kwargs)
+            except TypeError: # Neuere Versionen kennen den Parameter nicht mehr und kopieren immer
+                snapshot_download(**kwargs)
+        shutil.rmtree(staging / ".cache", ignore_errors=True) # Download-Metadaten von huggingface_hub
+        path = store.add(f"hf:{model_name}", version, staging)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    metrics.count("model_store_downloads")
+    return path
+
+def provide_models(store, langs, refresh: bool = False):
+    """
+    Stellt die Modelle der Sprachen `langs` aus dem Modellspeicher bereit
+    (MODEL_PATHS). Fehlende Modelle (mit `refresh` auch veraltete) werden
+    heruntergeladen, außer im Offline-Modus; `model_revisions` in der
+    config.yaml kann ein Modell auf einen Commit festlegen.
+    """
+    offline = is_offline(CONFIG)
+    revisions = CONFIG.get('model_revisions') or {}
+    for model_name in sorted({_model_name(CONFIG, lang) for lang in langs} - {None}):
+        revision = revisions.get(model_name)
+        path = None if refresh and not offline else store.resolve(f"hf:{model_name}", revision)
+        if path is None and not offline:
+            try:
+                path = _download_model(store, model_name, revision)
+            except Exception as e:
+                print(f"WARNUNG: {model_name} konnte nicht in den Modellspeicher geladen werden: {e}", file=sys.stderr)
+                path = store.resolve(f"hf:{model_name}", revision)
+        if path is None:
+            print(f"WARNUNG: {model_name} ist nicht im Modellspeicher"
+                  f"{' (offline)' if offline else ''}.", file=sys.stderr)
             continue
+        MODEL_PATHS[model_name] = str(path.resolve())
+        MODEL_VERSIONS[model_name] = revision or store.version(f"hf:{model_name}")
+
+# Übersetzer-Pipelines pro Zielsprache; werden beim ersten Segment geladen,
+# das sie braucht, und bleiben bis zu `model_cache_size` Stück im Speicher.
+TRANSLATORS = ModelCache(_load_translator)
 
-        print(f"Lade Modell: {model_name} für {src_lang} nach {target_lang}...")
+def initialize_translators(config: dict):
+    """
+    Bereitet das Laden der Übersetzer vor. Geladen wird nichts: Modelle und
+    spaCy folgen erst, wenn ein Segment einer Sprache übersetzt werden muss.
+    """
+    global SPACY_NLP_MODEL, GLOSSARY
+    backend = config.get('backend', 'transformers')
+    if backend not in BACKENDS:
+        print(f"FEHLER: Unbekanntes Backend '{backend}' (erlaubt: {', '.join(BACKENDS)}).", file=sys.stderr)
+        sys.exit(1)
+    segmenter = config.get('sentence_segmenter', 'senter')
+    if segmenter not in SENTENCE_SEGMENTERS:
+        print(f"FEHLER: Unbekannte Satzsegmentierung '{segmenter}' (erlaubt: {', '.join(SENTENCE_SEGMENTERS)}).", file=sys.stderr)
+        sys.exit(1)
+    TRANSLATORS.clear()
+    TRANSLATORS.max_size = int(config.get('model_cache_size') or len(config['target_langs']) or 1)
+    SPACY_NLP_MODEL = None
+    SENTENCE_CACHE.clear()
+    GLOSSARY = load_glossary(config)
+
+def get_sentence_segmenter():
+    """
+    Lädt beim ersten Aufruf die spaCy Pipeline für `sentence_segmenter`:
+    bei "senter" das Modell der Quellsprache nur mit der Satzsegmentierung
+    (Parser, Tagger, NER usw. werden gar nicht erst geladen), bei
+    "sentencizer" eine leere Pipeline mit regelbasiertem sentencizer (kein
+    Modell nötig). Gibt None zurück, wenn spaCy nicht verfügbar ist oder
+    "regex" eingestellt ist.
+    """
+    global SPACY_NLP_MODEL
+    segmenter = CONFIG.get('sentence_segmenter', 'senter')
+    if SPACY_NLP_MODEL is None and segmenter == 'regex':
+        SPACY_NLP_MODEL = False
+    if SPACY_NLP_MODEL is None:
+        spacy_model_name = f"{CONFIG['src_language']}_core_news_sm" # Beispiel: de_core_news_sm
+        if segmenter == 'sentencizer':
+            spacy_model_name = f"spacy.blank('{CONFIG['src_language']}') + sentencizer"
+        print(f"Lade spaCy Modell: {spacy_model_name} für Satzsegmentierung...")
         try:
-            tokenizer = AutoTokenizer.from_pretrained(model_name)
-            model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-            TRANSLATORS[target_lang] = pipeline(
-                "translation", model=model, tokenizer=tokenizer,
-                src_lang=src_lang if use_multilingual else None,
-                tgt_lang=target_lang if use_multilingual else None,
-                device=-1 # Use CPU by default in CI/CD
-            )
-            TOKENIZERS[target_lang] = tokenizer
-            print(f"Modell {model_name} erfolgreich geladen.")
+            with metrics.stage("model_load"):
+                import spacy
+                if segmenter == 'sentencizer':
+                    SPACY_NLP_MODEL = spacy.blank(CONFIG['src_language'])
+                    SPACY_NLP_MODEL.add_pipe("sentencizer")
+                else:
+                    SPACY_NLP_MODEL = spacy.load(spacy_model_name, exclude=[
+                        "parser", "tagger", "morphologizer", "attribute_ruler", "lemmatizer", "ner"])
+                    if "senter" in SPACY_NLP_MODEL.component_names:
+                        SPACY_NLP_MODEL.enable_pipe("senter")
+                    else:
+                        SPACY_NLP_MODEL.add_pipe("sentencizer")
+            print(f"spaCy Modell '{spacy_model_name}' erfolgreich geladen ({', '.join(SPACY_NLP_MODEL.pipe_names)}).")
         except Exception as e:
-            print(f"FEHLER: Modell {model_name} konnte nicht geladen werden: {e}. Sprache '{target_lang}' wird übersprungen.", file=sys.stderr)
-            TRANSLATORS[target_lang] = None
-            TOKENIZERS[target_lang] = None
-    
-    # NEU: Lade spaCy Modell für die Quellsprache
-    try:
-        global SPACY_NLP_MODEL
-        spacy_model_name = f"{src_lang}_core_news_sm" # Beispiel: de_core_news_sm
-        print(f"Lade spaCy Modell: {spacy_model_name} für Satzsegmentierung...")
-        SPACY_NLP_MODEL = spacy.load(spacy_model_name)
-        print(f"spaCy Modell '{spacy_model_name}' erfolgreich geladen.")
-    except Exception as e:
-        print(f"FEHLER: spaCy Modell konnte nicht geladen werden: {e}. Die Satzsegmentierung wird auf Regex-Fallback beschränkt.", file=sys.stderr)
-        SPACY_NLP_MODEL = None
+            print(f"FEHLER: spaCy Modell konnte nicht geladen werden: {e}. Die Satzsegmentierung wird auf Regex-Fallback beschränkt.", file=sys.stderr)
+            SPACY_NLP_MODEL = False
+    return SPACY_NLP_MODEL or None
 
+def _regex_sentences(text: str) -> list:
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence.strip()]
 
-def chunk_text(text: str, max_chunk_length_config: int, tokenizer) -> list:
+def _sentence_gaps(text: str, sentences: list) -> list:
     """
-    Zerlegt einen langen Text in kleinere Chunks, basierend auf Satzgrenzen
-    und dem Token-Limit des Modells. Verwendet spaCy für die Satzsegmentierung.
-    max_chunk_length_config: Der Wert von max_chunk_length aus CONFIG (Benutzerpräferenz).
+    Der Leerraum zwischen aufeinanderfolgenden Sätzen im Originaltext (nach
+    dem letzten Satz ""). Lässt sich ein Satz nicht wiederfinden, gilt " ".
     """
-    if not text.strip():
-        return [""]
+    gaps = []
+    position = 0
+    ends = []
+    for sentence in sentences:
+        start = text.find(sentence, position)
+        if start < 0:
+            ends.append(None)
+            continue
+        ends.append((start, start + len(sentence)))
+        position = start + len(sentence)
+    for current, following in zip(ends, ends[1:]):
+        gap = text[current[1]:following[0]] if current and following else " "
+        gaps.append(gap if not gap.strip() else " ")
+    return gaps + [""]
 
-    sentences = []
-    # NEU: Verwende spaCy für die Satzsegmentierung
-    if SPACY_NLP_MODEL:
+def _segment_sentences(texts: list) -> list:
+    """Segmentiert mehrere Texte in einem `nlp.pipe`-Durchlauf (oder per Regex)."""
+    nlp = get_sentence_segmenter()
+    if nlp:
         try:
-            doc = SPACY_NLP_MODEL(text)
-            sentences = [sent.text for sent in doc.sents]
+            return [[sent.text.strip() for sent in doc.sents if sent.text.strip()] for doc in nlp.pipe(texts)]
         except Exception as e:
             print(f"WARNUNG: spaCy Satzsegmentierung fehlgeschlagen ({e}). Fallback auf Regex-basierte Segmentierung.", file=sys.stderr)
-            sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    else:
-        print("WARNUNG: spaCy Modell nicht geladen. Fallback auf Regex-basierte Segmentierung für Satzsegmentierung.", file=sys.stderr)
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    # Ohne spaCy wurde beim Laden bereits gewarnt.
+    return [_regex_sentences(text) for text in texts]
 
-    # Fallback für den Fall, dass spaCy oder Regex keine Sätze findet
-    if not sentences or (len(sentences) == 1 and len(sentences[0]) == len(text.strip())):
-        print("WARNUNG: Satzsegmentierung unzureichend. Fallback auf Zeichen-basierte Segmentierung.", file=sys.stderr)
-        # Calculate effective max chunk length based on model's actual max_length
-        effective_max_chunk_length = min(max_chunk_length_config, tokenizer.model_max_length - 50)
-        sentences = [text[i:i + effective_max_chunk_length] for i in range(0, len(text), effective_max_chunk_length)]
+def split_sentences(texts: list) -> list:
+    """
+    Liefert die Sätze mehrerer Texte. Noch nicht segmentierte Texte gehen
+    gemeinsam durch spaCy; die Ergebnisse werden in SENTENCE_CACHE gehalten,
+    sodass jede Zielsprache dieselben Satzgrenzen verwendet.
+    """
+    found = {}
+    for text in texts:
+        if text in SENTENCE_CACHE:
+            SENTENCE_CACHE.move_to_end(text)
+            found[text] = SENTENCE_CACHE[text]
+    missing = [text for text in dict.fromkeys(texts) if text not in found]
+    if missing:
+        with metrics.stage("sentence_segmentation"):
+            for text, sentences in zip(missing, _segment_sentences(missing)):
+                found[text] = SENTENCE_CACHE[text] = sentences
+        while len(SENTENCE_CACHE) > SENTENCE_CACHE_SIZE:
+            SENTENCE_CACHE.popitem(last=False)
+    return [found[text] for text in texts]
 
 
-    chunks = []
-    current_chunk_sentences = []
-    
+def chunk_text(text: str, max_chunk_length_config: int, tokenizer, sentences=None) -> list:
+    """
+    Zerlegt einen langen Text in kleinere Chunks, basierend auf Satzgrenzen
+    und dem Token-Limit des Modells. Die Sätze kommen aus `sentences` oder
+    werden mit `split_sentences()` (spaCy bzw. Regex) bestimmt.
+    max_chunk_length_config: Der Wert von max_chunk_length aus CONFIG (Benutzerpräferenz).
+
+    Jeder Satz wird genau einmal tokenisiert; die Chunk-Länge ergibt sich als
+    laufende Summe der Satzlängen. Gibt eine Liste von (Chunk, Token-Anzahl,
+    Trenner) zurück, damit die Übersetzung nicht erneut tokenisieren muss;
+    der Trenner ist der Leerraum, der im Originaltext auf den Chunk folgt.
+    """
+    if not text.strip():
+        return []
+
+    if sentences is None:
+        sentences = split_sentences([text])[0]
+    if not sentences:
+        return []
+
     # Effektive maximale Chunk-Länge basierend auf der tatsächlichen max_length des Modells
     # und einem Puffer für spezielle Tokens. Dies ist die harte Grenze für Chunks.
     # Opus-MT Modelle haben typischerweise eine max_length von 512. Ein Puffer von 50 ist konservativ.
-    effective_max_chunk_length = min(max_chunk_length_config, tokenizer.model_max_length - 50) 
+    effective_max_chunk_length = min(max_chunk_length_config, tokenizer.model_max_length - 50)
 
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-        
-        # Überprüfe die Token-Länge des aktuellen Satzes
-        sentence_tokens_length = len(tokenizer.encode(sentence, truncation=True, max_length=effective_max_chunk_length))
-        
-        # Wenn ein einzelner Satz bereits zu lang für einen Chunk ist, füge ihn als separaten Chunk hinzu
-        # und er wird vom Tokenizer des Modells gekürzt, wenn er an die Pipeline übergeben wird.
+    # Alle Sätze in einem Aufruf tokenisieren (ohne Spezial-Tokens, die kommen pro Chunk einmal hinzu)
+    with metrics.stage("tokenization"):
+        sentence_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+
+    gaps = _sentence_gaps(text, sentences)
+    chunks = []
+    current_chunk_sentences = []
+    current_chunk_tokens = 0
+    current_chunk_gap = ""
+
+    for sentence, ids, gap in zip(sentences, sentence_ids, gaps):
+        sentence_tokens_length = len(ids)
+
+        # Ein einzelner Satz, der zu lang für einen Chunk ist, wird anhand seiner
+        # Token-IDs in Stücke der effektiven Länge geteilt, statt abgeschnitten zu werden.
         if sentence_tokens_length > effective_max_chunk_length:
             if current_chunk_sentences: # Füge den vorherigen Chunk hinzu, falls nicht leer
-                chunks.append(" ".join(current_chunk_sentences))
+                chunks.append((" ".join(current_chunk_sentences), current_chunk_tokens + 1, current_chunk_gap))
                 current_chunk_sentences = []
-            chunks.append(sentence) # Füge den langen Satz als eigenen Chunk hinzu
-            print(f"WARNUNG: Einzelner Satz ist länger als effektive max_chunk_length ({sentence_tokens_length} > {effective_max_chunk_length}). Er wird vom Modell gekürzt.", file=sys.stderr)
+                current_chunk_tokens = 0
+            print(f"WARNUNG: Einzelner Satz ist länger als effektive max_chunk_length ({sentence_tokens_length} > {effective_max_chunk_length}). Er wird an Token-Grenzen geteilt.", file=sys.stderr)
+            for piece_start in range(0, sentence_tokens_length, effective_max_chunk_length):
+                piece = ids[piece_start:piece_start + effective_max_chunk_length]
+                is_last_piece = piece_start + effective_max_chunk_length >= sentence_tokens_length
+                chunks.append((tokenizer.decode(piece, skip_special_tokens=True), len(piece) + 1,
+                               gap if is_last_piece else " "))
             continue # Gehe zum nächsten Satz
 
-        # Versuche, den Satz zum aktuellen Chunk hinzuzufügen
-        prospective_chunk_content = " ".join(current_chunk_sentences + [sentence])
-        
-        # Überprüfe die Token-Länge des potenziellen Chunks
-        prospective_chunk_tokens_length = len(tokenizer.encode(prospective_chunk_content, truncation=True, max_length=effective_max_chunk_length))
+        # Wenn das Hinzufügen des Satzes das Limit überschreitet, schließe den aktuellen Chunk ab
+        if current_chunk_sentences and current_chunk_tokens + sentence_tokens_length > effective_max_chunk_length:
+            chunks.append((" ".join(current_chunk_sentences), current_chunk_tokens + 1, current_chunk_gap))
+            current_chunk_sentences = []
+            current_chunk_tokens = 0
 
-        if prospective_chunk_tokens_length <= effective_max_chunk_length:
-            current_chunk_sentences.append(sentence)
-        else:
-            # Wenn das Hinzufügen des Satzes das Limit überschreitet, schließe den aktuellen Chunk ab
-            if current_chunk_sentences:
-                chunks.append(" ".join(current_chunk_sentences))
-            
-            # Starte einen neuen Chunk mit dem aktuellen Satz
-            current_chunk_sentences = [sentence]
-    
-    # Füge den letzten verbleibenden Chunk hinzu
+        current_chunk_sentences.append(sentence)
+        current_chunk_tokens += sentence_tokens_length
+        current_chunk_gap = gap
+
+    # Füge den letzten verbleibenden Chunk hinzu (+1 für das EOS-Token)
     if current_chunk_sentences:
-        chunks.append(" ".join(current_chunk_sentences))
-    
-    return chunks
+        chunks.append((" ".join(current_chunk_sentences), current_chunk_tokens + 1, current_chunk_gap))
 
-def translate_text(text: str, src_lang: str, target_lang: str) -> str:
-    """Übersetzt Text mit Hugging Face, unter Berücksichtigung von Chunking."""
-    if not text.strip():
-        return ""
+    return chunks
 
+def translate_texts(texts: list, src_lang: str, target_lang: str) -> list:
+    """
+    Übersetzt mehrere Texte mit Hugging Face in gemeinsamen Batches.
+    Alle Chunks werden gesammelt, nach Token-Länge sortiert (wenig Padding)
+    und in Batches der Größe `batch_size` durch die Pipeline geschickt.
+    Die Ergebnisse werden anschließend wieder ihren Texten zugeordnet.
+    """
     translator = TRANSLATORS.get(target_lang)
-    tokenizer = TOKENIZERS.get(target_lang)
+    tokenizer = getattr(translator, 'tokenizer', None)
 
     if not translator or not tokenizer:
         print(f"Fehler: Übersetzer/Tokenizer für {target_lang} nicht verfügbar.", file=sys.stderr)
-        return f"[[Übersetzungsfehler: Kein Übersetzer für {target_lang}]] {text}"
+        return [f"[[Übersetzungsfehler: Kein Übersetzer für {target_lang}]] {text}" if text.strip() else ""
+                for text in texts]
 
     # Verwende die maximale Länge des Modells für die Ausgabe, da dies die absolute Grenze ist.
-    # Die Eingabe-Chunking-Logik kümmert sich um die Eingabelänge.
-    output_max_length = tokenizer.model_max_length 
+    # Die Eingabe-Chunking-Logik kümmert sich um die Eingabelänge; chunk_text() liefert
+    # bereits Chunks innerhalb des Eingabelimits samt ihrer Token-Anzahl.
+    output_max_length = tokenizer.model_max_length
 
-    chunks = chunk_text(text, CONFIG['max_chunk_length'], tokenizer) # Übergabe der ursprünglichen max_chunk_length für die Chunking-Logik
-    translated_chunks = []
+    # Satzgrenzen aller Texte in einem Durchlauf (bzw. aus dem Cache einer anderen Sprache)
+    indices = [text_index for text_index, text in enumerate(texts) if text.strip()]
+    sentences_by_index = dict(zip(indices, split_sentences([texts[text_index] for text_index in indices])))
 
-    for i, chunk in enumerate(chunks):
-        if not chunk.strip():
-            translated_chunks.append("")
-            continue
-        
-        # Stelle sicher, dass der an den Übersetzer übergebene Chunk innerhalb des tatsächlichen Eingabelimits des Modells liegt
-        # Verwende einen kleinen Puffer für interne Tokens (z.B. 10 Tokens)
-        input_max_length_for_model = tokenizer.model_max_length - 10
-        chunk_tokens = tokenizer.encode(chunk, truncation=True, max_length=input_max_length_for_model) 
-        chunk_to_translate = tokenizer.decode(chunk_tokens, skip_special_tokens=True)
-        
-        chunk_tokens_length = len(tokenizer.encode(chunk_to_translate))
-        print(f"  Übersetze Chunk {i+1}/{len(chunks)} nach {target_lang} (Länge: {chunk_tokens_length} Tokens)...")
-        
+    # Sammle alle Chunks aller Texte: (Textindex, Position, Chunk, Token-Länge)
+    pending = []
+    translated_chunks = [[] for _ in texts]
+    separators = [[] for _ in texts]
+    for text_index in indices:
+        # Übergabe der ursprünglichen max_chunk_length für die Chunking-Logik
+        chunks = chunk_text(texts[text_index], CONFIG['max_chunk_length'], tokenizer, sentences_by_index[text_index])
+        translated_chunks[text_index] = [""] * len(chunks)
+        separators[text_index] = [separator for _, _, separator in chunks]
+        for slot, (chunk, chunk_tokens_length, _) in enumerate(chunks):
+            pending.append((text_index, slot, chunk, chunk_tokens_length))
+
+    # Längensortierung: ähnlich lange Chunks landen im selben Batch
+    pending.sort(key=lambda item: item[3])
+    batch_size = max(1, int(CONFIG.get('batch_size', 1)))
+    batch_count = (len(pending) + batch_size - 1) // batch_size
+    inference_seconds = 0.0
+    inference_tokens = 0
+
+    for batch_number, start in enumerate(range(0, len(pending), batch_size), 1):
+        batch = pending[start:start + batch_size]
+        inputs = [item[2] for item in batch]
+        print(f"  Übersetze Batch {batch_number}/{batch_count} nach {target_lang} "
+              f"({len(batch)} Chunks, max. {batch[-1][3]} Tokens)...")
+        t0 = time.perf_counter()
         try:
-            # Übergabe des gekürzten Chunks und der bestimmten output_max_length
-            translated_result = translator(chunk_to_translate, max_length=output_max_length)
-            translated_chunks.append(translated_result[0]['translation_text'])
+            # Übergabe der Chunks und der bestimmten output_max_length
+            with metrics.stage("inference"):
+                results = translator(inputs, max_length=output_max_length, batch_size=len(inputs))
+                outputs = [result['translation_text'] for result in results]
+            inference_seconds += time.perf_counter() - t0
+            inference_tokens += sum(item[3] for item in batch)
         except Exception as e:
-            print(f"FEHLER bei Chunk-Übersetzung nach {target_lang} (Chunk {i+1}): {e}", file=sys.stderr)
-            translated_chunks.append(f"[[Chunk-Übersetzungsfehler: {e}]] {chunk}")
+            print(f"FEHLER bei Batch-Übersetzung nach {target_lang} (Batch {batch_number}): {e}", file=sys.stderr)
+            outputs = [f"[[Chunk-Übersetzungsfehler: {e}]] {chunk}" for chunk in inputs]
+        for (text_index, slot, _, _), output in zip(batch, outputs):
+            translated_chunks[text_index][slot] = output
 
-    return "\n\n".join(translated_chunks)
+    metrics.record_pair(src_lang, target_lang, sum(1 for text in texts if text.strip()), inference_tokens, inference_seconds)
+    # Die Chunks wieder mit dem Leerraum verbinden, der im Original zwischen ihnen stand
+    return ["".join(chunk + separator for chunk, separator in zip(chunks, text_separators))
+            for chunks, text_separators in zip(translated_chunks, separators)]
 
-def process_markdown_file(file_path: str):
-    """Verarbeitet eine Markdown-Datei: Liest, übersetzt und schreibt neue Dateien."""
-    print(f"\nVerarbeite Datei: {file_path}")
+def translate_text(text: str, src_lang: str, target_lang: str) -> str:
+    """Übersetzt einen einzelnen Text mit Hugging Face, unter Berücksichtigung von Chunking."""
+    if not text.strip():
+        return ""
+    return translate_texts([text], src_lang, target_lang)[0]
 
+def _is_cacheable(translation: str) -> bool:
+    return TRANSLATION_ERROR_MARKER not in translation
+
+def translate_segment_texts(texts: list, src_lang: str, target_lang: str, memory) -> list:
+    """
+    Übersetzt (maskierte) Segment-Texte: nur Texte ohne Eintrag in `memory`
+    (Translation Memory oder Plan der Duplikaterkennung) gehen gebündelt an
+    `translate_texts()`. Gibt die Übersetzungen in derselben Reihenfolge zurück.
+    """
+    return translate_segments(
+        texts, src_lang, target_lang, get_model_id(CONFIG, target_lang),
+        lambda batch: translate_texts(batch, src_lang, target_lang),
+        memory, is_cacheable=_is_cacheable)
+
+def translate_parts(parts: list, src_lang: str, target_lang: str) -> list:
+    """
+    Übersetzt die Prosa-Segmente einer Teil-Liste (siehe markdown_segments)
+    und gibt die Übersetzungen in Dokumentreihenfolge zurück. Mit
+    Duplikaterkennung kommen sie aus dem Plan des Laufs.
+    """
+    memory = SEGMENT_PLAN if SEGMENT_PLAN is not None else TRANSLATION_MEMORY
+    return translate_segment_texts([segment.text for segment in segments_of(parts)], src_lang, target_lang, memory)
+
+def translate_markdown(text: str, src_lang: str, target_lang: str) -> str:
+    """
+    Übersetzt Markdown segmentweise: Codeblöcke, Tabellen, Inline-Code und
+    Link-Ziele bleiben unangetastet, nur Prosa wird übersetzt.
+    """
+    if not text.strip():
+        return ""
+    parts = segment_markdown(text, GLOSSARY)
+    return render_markdown(parts, translate_parts(parts, src_lang, target_lang), target_lang)
+
+def read_markdown(file_path: str):
+    """Liest eine Markdown-Datei und trennt Front Matter und Hauptinhalt."""
     with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+        front_matter, body, has_front_matter = read_front_matter(f, file_path)
+        if not has_front_matter:
+            return front_matter, "".join(body)
+        return front_matter, "".join(skip_leading_whitespace(body)).rstrip()
 
-    front_matter = {}
-    main_content = content
+def _output_header(front_matter: dict, target_lang: str) -> str:
+    """Front Matter (unübersetzt) und Warnhinweis am Anfang einer Ausgabedatei."""
+    header = ""
+    if front_matter:
+        header += "---\n"
+        header += yaml.safe_dump(front_matter, allow_unicode=True, default_flow_style=False)
+        header += "---\n"
+    if CONFIG['insert_warnings'] and target_lang in CONFIG['warnings_mapping']:
+        header += CONFIG['warnings_mapping'][target_lang] + "\n\n"
+    return header
 
-    if content.startswith('---'):
-        try:
-            parts = content.split('---', 2)
-            if len(parts) > 2:
-                front_matter = yaml.safe_load(parts[1]) or {}
-                main_content = parts[2].strip()
-        except yaml.YAMLError as e:
-            print(f"Warnung: YAML Fehler in {file_path}: {e}", file=sys.stderr)
+def process_markdown_file(file_path: str, target_langs=None) -> list:
+    """
+    Verarbeitet eine Markdown-Datei: Liest, übersetzt und schreibt neue Dateien.
+    Die Datei wird als Strom verarbeitet: Front Matter zuerst, danach der
+    Hauptinhalt in Fenstern von `stream_window_segments` Segmenten, die
+    übersetzt und sofort in temporäre Ausgabedateien geschrieben werden
+    (eine pro Sprache, am Ende atomar umbenannt). Der Speicherbedarf hängt
+    so nicht von der Dateigröße ab.
+    Gibt die Sprachen zurück, für die eine Übersetzung geschrieben wurde.
+    """
+    if target_langs is None:
+        target_langs = CONFIG['target_langs']
+    print(f"\nVerarbeite Datei: {file_path}")
 
     base_filename = os.path.basename(file_path)
     relative_dir = os.path.relpath(os.path.dirname(file_path), CONFIG['src_dir'])
+    src_lang = CONFIG['src_language']
+    max_segments, max_bytes = window_limits(CONFIG)
 
-    for target_lang in CONFIG['target_langs']:
-        if TRANSLATORS.get(target_lang) is None:
-            print(f"Überspringe {base_filename} nach {target_lang}, da Übersetzer nicht initialisiert wurde.", file=sys.stderr)
-            continue
+    written_langs = []
+    writers = {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            front_matter, body, has_front_matter = read_front_matter(f, file_path)
+            if has_front_matter:
+                body = skip_leading_whitespace(body)
+
+            for target_lang in target_langs:
+                target_file_path = os.path.normpath(os.path.join(CONFIG['output_dir'], target_lang, relative_dir, base_filename))
+                writer = AtomicTextWriter(target_file_path)
+                writer.write(_output_header(front_matter, target_lang))
+                # Mit Front Matter endet der Hauptinhalt ohne abschließenden Leerraum
+                writers[target_lang] = (writer, StrippedWriter(writer, rstrip=has_front_matter))
+
+            for window in iter_windows(iter_parts(body, GLOSSARY), max_segments, max_bytes):
+                for target_lang in list(writers):
+                    # Das Modell wird erst geladen, wenn ein Segment nicht aus der Translation Memory kommt
+                    translations = translate_parts(window, src_lang, target_lang)
+                    if TRANSLATORS.failed(target_lang):
+                        print(f"Überspringe {base_filename} nach {target_lang}, da Übersetzer nicht geladen werden konnte.", file=sys.stderr)
+                        writers.pop(target_lang)[0].discard()
+                        continue
+                    with metrics.stage("file_write"):
+                        writers[target_lang][1].write(render_markdown(window, translations, target_lang))
+
+        for target_lang, (writer, body_writer) in writers.items():
+            with metrics.stage("file_write"):
+                body_writer.close()
+                writer.commit()
+            metrics.count("outputs_written")
+            print(f"Übersetzt nach {target_lang}: {writer.path}")
+            written_langs.append(target_lang)
+    finally:
+        for writer, _ in writers.values():
+            writer.discard() # Nach commit() ohne Wirkung
+
+    return written_langs
+
+def render_document(text: str, target_lang: str, translate) -> str:
+    """
+    Übersetzt ein Dokument aus dem Speicher und liefert genau den Inhalt, den
+    process_markdown_file() schreiben würde. `translate(texts)` übersetzt die
+    Segment-Texte (im Prozess oder über den Übersetzungsdienst).
+    """
+    front_matter, body, has_front_matter = read_front_matter(io.StringIO(text))
+    if has_front_matter:
+        body = skip_leading_whitespace(body)
+    parts = list(iter_parts(body, GLOSSARY))
+    translations = translate([segment.text for segment in segments_of(parts)])
+    output = io.StringIO()
+    output.write(_output_header(front_matter, target_lang))
+    body_writer = StrippedWriter(output, rstrip=has_front_matter)
+    body_writer.write(render_markdown(parts, translations, target_lang))
+    body_writer.close()
+    return output.getvalue()
+
+def translate_for_service(texts: list, target_lang: str) -> list:
+    """Übersetzt Segment-Texte für den Dienst bzw. --preview (mit Translation Memory)."""
+    translations = translate_segment_texts(texts, CONFIG['src_language'], target_lang, TRANSLATION_MEMORY)
+    if TRANSLATORS.failed(target_lang):
+        raise RuntimeError(f"Übersetzer für {target_lang} konnte nicht geladen werden.")
+    return translations
+
+def service_digest() -> str:
+    """Kennung von Konfiguration und Modellen; Dienst und Client müssen übereinstimmen."""
+    model_ids = {lang: get_model_id(CONFIG, lang) for lang in CONFIG['target_langs']}
+    return translation_manifest.config_digest(dict(CONFIG, model_ids=model_ids),
+                                              OUTPUT_CONFIG_KEYS + ("model_ids",), PIPELINE_VERSION)
+
+def _provide_service_models(args, langs):
+    store = open_model_store(CONFIG)
+    if store is not None:
+        provide_models(store, langs, refresh=args.refresh_models)
+        store.close()
 
-        target_dir = os.path.join(CONFIG['output_dir'], target_lang, relative_dir)
-        os.makedirs(target_dir, exist_ok=True)
-        target_file_path = os.path.join(target_dir, base_filename)
+def _start_service():
+    """Im Inferenz-Thread des Dienstes: Translation Memory öffnen, alle Modelle laden."""
+    global TRANSLATION_MEMORY
+    TRANSLATION_MEMORY = open_translation_memory(CONFIG)
+    for lang in CONFIG['target_langs']:
+        TRANSLATORS.get(lang)
+    get_sentence_segmenter()
 
-        translated_content = translate_text(main_content, CONFIG['src_language'], target_lang)
+def _stop_service():
+    if TRANSLATION_MEMORY is not None:
+        TRANSLATION_MEMORY.close()
+        print(TRANSLATION_MEMORY.summary())
 
-        output_content = ""
-        if front_matter:
-            output_content += "---\n"
-            output_content += yaml.safe_dump(front_matter, allow_unicode=True, default_flow_style=False)
-            output_content += "---\n"
-        if CONFIG['insert_warnings'] and target_lang in CONFIG['warnings_mapping']:
-            output_content += CONFIG['warnings_mapping'][target_lang] + "\n\n"
+def serve_translations(args):
+    """
+    --serve: Hält die Modelle aller Zielsprachen geladen und beantwortet
+    Anfragen über den Socket (siehe translation_common/daemon.py), bis der
+    Prozess beendet wird.
+    """
+    load_config(args)
+    initialize_translators(CONFIG)
+    TRANSLATORS.max_size = max(TRANSLATORS.max_size, len(CONFIG['target_langs']))
+    _provide_service_models(args, CONFIG['target_langs'])
+    settings = daemon.daemon_settings(CONFIG, "huggingface")
+    daemon.serve("huggingface", args.address or settings['address'], CONFIG['target_langs'],
+                 translate_for_service, render_document, service_digest(), settings,
+                 initialize=_start_service, shutdown=_stop_service)
+
+def preview_file(args) -> str:
+    """
+    --preview: Übersetzt eine einzelne Datei nach --lang, ohne Manifest und
+    ohne DEV/ anzufassen. Läuft ein Übersetzungsdienst mit derselben
+    Konfiguration, übersetzt er; sonst wird im Prozess übersetzt.
+    """
+    global TRANSLATION_MEMORY
+    load_config(args)
+    initialize_translators(CONFIG)
+    lang = args.lang or CONFIG['target_langs'][0]
+    if lang not in CONFIG['target_langs']:
+        print(f"FEHLER: Zielsprache '{lang}' ist nicht konfiguriert (target_langs: {', '.join(CONFIG['target_langs'])}).", file=sys.stderr)
+        sys.exit(1)
+    with open(args.preview, 'r', encoding='utf-8') as f:
+        text = f.read()
+    address = args.address or daemon.daemon_settings(CONFIG, "huggingface")['address']
+    try:
+        response = daemon.request(address, {"lang": lang, "markdown": text, "config_digest": service_digest()})
+    except daemon.DaemonError as e:
+        print(f"WARNUNG: Übersetzungsdienst lehnt die Anfrage ab ({e}), übersetze selbst.", file=sys.stderr)
+        response = None
+    if response is not None:
+        print(f"Übersetzt vom Dienst unter {address}.")
+        return response['markdown']
+
+    _provide_service_models(args, [lang])
+    TRANSLATION_MEMORY = open_translation_memory(CONFIG)
+    try:
+        return render_document(text, lang, lambda texts: translate_for_service(texts, lang))
+    finally:
+        if TRANSLATION_MEMORY is not None:
+            TRANSLATION_MEMORY.close()
 
-        output_content += translated_content
+def _init_worker(config: dict, threads: int, model_paths: dict, model_versions: dict):
+    """
+    Initialisiert einen Worker (--jobs). Modelle lädt der Worker beim ersten
+    Segment und behält sie für alle weiteren Aufgaben; das Thread-Limit
+    greift über die Umgebungsvariablen, da torch erst dann importiert wird.
+    Die Modellordner und -versionen hat der Hauptprozess bereits aus dem
+    Modellspeicher bestimmt.
+    """
+    limit_threads(threads)
+    CONFIG.update(config)
+    MODEL_PATHS.update(model_paths)
+    MODEL_VERSIONS.update(model_versions)
+    initialize_translators(CONFIG)
+    global TRANSLATION_MEMORY
+    TRANSLATION_MEMORY = open_translation_memory(CONFIG)
+    if TRANSLATION_MEMORY is not None:
+        # Beim Beenden des Workers schreiben und schließen; verdrängt wird im Hauptprozess
+        atexit.register(TRANSLATION_MEMORY.close, evict=False)
+
+def _memory_counts() -> tuple:
+    memory = TRANSLATION_MEMORY
+    return (memory.hits, memory.misses) if memory is not None else (0, 0)
+
+def _translate_task(task) -> tuple:
+    """Übersetzt eine (Datei, Sprache)-Aufgabe im Worker."""
+    md_file, lang = task
+    hits, misses = _memory_counts()
+    written_langs = process_markdown_file(md_file, [lang])
+    after_hits, after_misses = _memory_counts()
+    return bool(written_langs), after_hits - hits, after_misses - misses, metrics.METRICS.drain()
 
-        with open(target_file_path, 'w', encoding='utf-8') as f:
-            f.write(output_content)
-        print(f"Übersetzt nach {target_lang}: {target_file_path}")
+def _translate_segments_task(task) -> tuple:
+    """Übersetzt ein Paket einmaliger Segmente (Duplikaterkennung) im Worker in alle seine Sprachen."""
+    langs, segments = task
+    hits, misses = _memory_counts()
+    translations = {lang: translate_segment_texts(segments, CONFIG['src_language'], lang, TRANSLATION_MEMORY)
+                    for lang in langs}
+    after_hits, after_misses = _memory_counts()
+    return translations, after_hits - hits, after_misses - misses, metrics.METRICS.drain()
 
-def main():
-    # Lade Konfiguration
+def iter_file_segments(file_path: str):
+    """Die Prosa-Segmente des Hauptinhalts einer Datei (wie in process_markdown_file)."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        _, body, has_front_matter = read_front_matter(f, file_path)
+        if has_front_matter:
+            body = skip_leading_whitespace(body)
+        for part in iter_parts(body, GLOSSARY):
+            if isinstance(part, Segment):
+                yield part.text
+
+def _planned_segments(item):
+    """Segmente und Zielsprachen einer Datei für den Plan (siehe plan_windows)."""
+    md_file, langs = item
+
+    def segments():
+        with metrics.stage("planning"):
+            yield from iter_file_segments(md_file)
+    return segments(), langs
+
+def translate_plan(plan: SegmentPlan, jobs: int):
+    """
+    Duplikaterkennung: Übersetzt jedes einmalige Segment eines Fensters von
+    Dateien pro Zielsprache genau einmal, in Paketen von
+    `stream_window_segments` (bei jobs > 1 in Worker-Prozessen). Ein Paket
+    wird nacheinander in alle seine Sprachen übersetzt, sodass die
+    Satzgrenzen nur einmal bestimmt werden. Die Dateien des Fensters
+    erhalten ihre Übersetzungen danach aus dem Plan.
+    """
+    src_lang = CONFIG['src_language']
+    max_segments, _ = window_limits(CONFIG)
+    work = [(langs, segments[start:start + max_segments])
+            for langs, segments in plan.groups().items()
+            for start in range(0, len(segments), max_segments)]
+    print(f"Übersetze {len(plan)} einmalige Segmente...")
+
+    if jobs > 1 and len(work) > 1:
+        jobs = min(jobs, len(work))
+        print(f"Verteile {len(work)} Pakete auf {jobs} Worker-Prozesse...")
+        with create_pool(jobs, _init_worker, (dict(CONFIG), threads_per_worker(jobs), dict(MODEL_PATHS), dict(MODEL_VERSIONS))) as pool:
+            results = list(pool.map(_translate_segments_task, work))
+        for (langs, segments), (translations, hits, misses, worker_metrics) in zip(work, results):
+            for lang in langs:
+                plan.record(segments, translations[lang], src_lang, lang, get_model_id(CONFIG, lang), _is_cacheable)
+            metrics.METRICS.merge(worker_metrics)
+            if TRANSLATION_MEMORY is not None:
+                TRANSLATION_MEMORY.hits += hits
+                TRANSLATION_MEMORY.misses += misses
+    else:
+        for langs, segments in work:
+            for lang in langs:
+                if not TRANSLATORS.failed(lang):
+                    translate_segment_texts(segments, src_lang, lang, plan)
+    plan.seal()
+
+def load_config(args):
+    """Lädt config.yaml (neben dem Skript, sonst im Arbeitsverzeichnis) in CONFIG und wendet --offline an."""
     config_file_path = os.path.join(os.path.dirname(__file__), 'config.yaml')
     if not os.path.exists(config_file_path):
         config_file_path = 'config.yaml'
@@ -259,22 +905,151 @@ def main():
             sys.exit(1)
     else:
         print(f"WARNUNG: Konfigurationsdatei '{config_file_path}' nicht gefunden. Verwende Standardkonfiguration.", file=sys.stderr)
+    if args.offline:
+        CONFIG['model_store'] = dict(CONFIG.get('model_store') or {}, offline=True)
+    if is_offline(CONFIG):
+        # Auch transformers (Tokenizer, Konfiguration) darf nichts nachladen; gilt für die Worker mit
+        os.environ["HF_HUB_OFFLINE"] = "1"
 
-    initialize_translators(CONFIG)
+def run(args):
+    load_config(args)
+
+    # Modelle werden erst beim ersten zu übersetzenden Segment geladen
+    # (bei --jobs > 1 nur in den Worker-Prozessen)
+    with metrics.stage("initialize"):
+        initialize_translators(CONFIG)
 
     src_dir = CONFIG['src_dir']
-    markdown_files = glob.glob(os.path.join(src_dir, '**', '*.md'), recursive=True)
+    markdown_files = sorted(glob.glob(os.path.join(src_dir, '**', '*.md'), recursive=True))
+
+    manifest_file = translation_manifest.manifest_path(CONFIG, CONFIG['output_dir'])
+    manifest = translation_manifest.load_manifest(manifest_file)
+    translation_manifest.prune_deleted_sources(manifest, src_dir, CONFIG['output_dir'])
 
     if not markdown_files:
+        translation_manifest.save_manifest(manifest_file, manifest)
         print(f"Keine Markdown-Dateien im Verzeichnis '{src_dir}' gefunden. Nichts zu übersetzen.")
-        sys.exit(0)
+        return
 
     print(f"Gefundene Dateien zur Übersetzung: {markdown_files}")
 
+    # Erst öffnen, wenn es Dateien gibt: Sie wird am Ende des Laufs geschlossen
+    global TRANSLATION_MEMORY
+    TRANSLATION_MEMORY = open_translation_memory(CONFIG)
+
+    config_hash = translation_manifest.config_digest(CONFIG, OUTPUT_CONFIG_KEYS, PIPELINE_VERSION)
+
+    # Mit --refresh-models zuerst alle Modelle aktualisieren: Neue Commits
+    # ändern die Modell-ID und damit, welche Ausgaben aktuell sind
+    store = open_model_store(CONFIG) if args.refresh_models else None
+    if store is not None:
+        provide_models(store, CONFIG['target_langs'], refresh=True)
+
+    # Aufgaben sammeln: eine pro (Datei, Sprache), deren Ausgabe nicht aktuell ist
+    tasks = []
+    entries = []
     for md_file in markdown_files:
-        process_markdown_file(md_file)
+        source_rel = Path(os.path.relpath(md_file, src_dir)).as_posix()
+        source_digest = translation_manifest.file_digest(md_file)
+        file_has_work = False
+        for lang in CONFIG['target_langs']:
+            entry = translation_manifest.make_entry(source_rel, lang, get_model_id(CONFIG, lang), config_hash, source_digest)
+            if not args.force and translation_manifest.is_up_to_date(
+                    manifest, entry, os.path.join(CONFIG['output_dir'], lang, source_rel)):
+                continue
+            tasks.append((md_file, lang))
+            entries.append(entry)
+            file_has_work = True
+        if not file_has_work:
+            print(f"Überspringe unveränderte Datei: {md_file}")
+            metrics.count("files_skipped")
 
+    langs_by_file = {}
+    for md_file, lang in tasks:
+        langs_by_file.setdefault(md_file, []).append(lang)
+
+    # Nur die Modelle der Sprachen mit Arbeit aus dem Modellspeicher
+    # bereitstellen, vor dem Start der Worker; erst jetzt heruntergeladene
+    # Modelle bringen ihre Version in die Manifest-Einträge
+    if store is None and tasks:
+        store = open_model_store(CONFIG)
+        if store is not None:
+            provide_models(store, sorted({lang for _, lang in tasks}))
+            for entry in entries:
+                entry["model"] = get_model_id(CONFIG, entry["lang"])
+
+    global SEGMENT_PLAN
+    if tasks and CONFIG.get('deduplicate_segments', True):
+        SEGMENT_PLAN = SegmentPlan(TRANSLATION_MEMORY, CONFIG.get('dedup_window_segments') or DEFAULT_MAX_SEGMENTS)
+
+    if args.jobs > 1 and len(tasks) > 1 and SEGMENT_PLAN is None:
+        jobs = min(args.jobs, len(tasks))
+        print(f"Übersetze {len(tasks)} Aufgaben mit {jobs} Worker-Prozessen...")
+        with create_pool(jobs, _init_worker, (dict(CONFIG), threads_per_worker(jobs), dict(MODEL_PATHS), dict(MODEL_VERSIONS))) as pool:
+            results = list(pool.map(_translate_task, tasks))
+        for _, hits, misses, worker_metrics in results:
+            metrics.METRICS.merge(worker_metrics)
+            if TRANSLATION_MEMORY is not None:
+                TRANSLATION_MEMORY.hits += hits
+                TRANSLATION_MEMORY.misses += misses
+        written = [result[0] for result in results]
+    else:
+        # Seriell: alle offenen Sprachen einer Datei in einem Durchgang. Mit
+        # Duplikaterkennung fensterweise: planen, einmalige Segmente
+        # übersetzen, dann die Dateien des Fensters aus dem Plan schreiben
+        items = list(langs_by_file.items())
+        windows = [items] if SEGMENT_PLAN is None else plan_windows(SEGMENT_PLAN, items, _planned_segments)
+        written_by_file = {}
+        for window in windows:
+            if SEGMENT_PLAN is not None:
+                translate_plan(SEGMENT_PLAN, args.jobs)
+            written_by_file.update((md_file, process_markdown_file(md_file, langs)) for md_file, langs in window)
+        written = [lang in written_by_file[md_file] for md_file, lang in tasks]
+
+    # Manifest in fester Reihenfolge aktualisieren (unabhängig von der Worker-Reihenfolge)
+    for entry, ok in zip(entries, written):
+        if ok:
+            translation_manifest.record(manifest, entry)
+
+    translation_manifest.save_manifest(manifest_file, manifest)
+    metrics.count("files_translated", len({md_file for (md_file, _), ok in zip(tasks, written) if ok}))
+    if SEGMENT_PLAN is not None:
+        metrics.count("segments_total", SEGMENT_PLAN.occurrences)
+        metrics.count("segments_unique", SEGMENT_PLAN.unique)
+        metrics.count("segments_from_plan", SEGMENT_PLAN.hits)
+        print(SEGMENT_PLAN.summary())
+    if TRANSLATION_MEMORY is not None:
+        metrics.count("tm_hits", TRANSLATION_MEMORY.hits)
+        metrics.count("tm_misses", TRANSLATION_MEMORY.misses)
+        TRANSLATION_MEMORY.close()
+        print(TRANSLATION_MEMORY.summary())
+    if store is not None:
+        store.close()
+        print(store.summary())
+    print(metrics.METRICS.summary("huggingface"))
     print("Übersetzungsprozess abgeschlossen.")
 
+def main(argv=None):
+    args = parse_args(argv)
+    if args.preview:
+        # Auf stdout steht nur die Übersetzung, alle Meldungen gehen nach stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            translated = preview_file(args)
+        if args.output:
+            write_text_atomic(args.output, translated)
+        else:
+            sys.stdout.write(translated)
+        return
+    try:
+        with metrics.profiled(args.profile):
+            if args.serve:
+                serve_translations(args)
+            else:
+                run(args)
+    finally:
+        # Auch bei Abbruch (oder sys.exit) schreiben, damit das Monitoring den Lauf sieht
+        if args.metrics:
+            metrics.write_report(args.metrics, metrics.METRICS, "huggingface")
+
 if __name__ == "__main__":
     main()
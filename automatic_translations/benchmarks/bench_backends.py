@@ -0,0 +1,184 @@
+"""
+Vergleich der Inferenz-Backends des Hugging Face Skripts (Qualität und Latenz).
+
+Jedes Backend (`transformers`, `torch-int8`, `ctranslate2`) läuft in einem
+eigenen Unterprozess, damit Ladezeit und Spitzen-Speicher (RSS) getrennt
+gemessen werden. Übersetzt wird der Hauptinhalt aller Dateien in `--src-dir`
+ohne Translation Memory. Ausgegeben werden pro Sprache die Quell-Tokens pro
+Sekunde und der BLEU-Wert gegenüber den vorhandenen Übersetzungen in
+`--reference-dir` (standardmäßig `DEV/`).
+
+Der BLEU-Wert ist ein Dokument-BLEU über die Prosa-Segmente (4-Gramme,
+Brevity Penalty, Wort-Tokenisierung) und dient dem relativen Vergleich der
+Backends untereinander, nicht als absoluter Qualitätswert.
+
+Aufruf (aus dem Repository-Root):
+    python automatic_translations/benchmarks/bench_backends.py --backend transformers --backend ctranslate2
+"""
+import argparse
+import json
+import math
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from bench_tokenizer import HF_SCRIPT, load_script
+from translation_common.markdown_segments import segment_markdown, segments_of
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+def _ngrams(tokens: list, n: int) -> Counter:
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def corpus_bleu(hypotheses: list, references: list, max_n: int = 4) -> float:
+    """Corpus-BLEU (0-100) über Paare aus Hypothese und Referenz."""
+    matches = [0] * max_n
+    totals = [0] * max_n
+    hyp_len = ref_len = 0
+    for hypothesis, reference in zip(hypotheses, references):
+        hyp_tokens = _WORDS.findall(hypothesis)
+        ref_tokens = _WORDS.findall(reference)
+        hyp_len += len(hyp_tokens)
+        ref_len += len(ref_tokens)
+        for n in range(1, max_n + 1):
+            hyp_ngrams = _ngrams(hyp_tokens, n)
+            ref_ngrams = _ngrams(ref_tokens, n)
+            matches[n - 1] += sum(min(count, ref_ngrams[gram]) for gram, count in hyp_ngrams.items())
+            totals[n - 1] += max(0, len(hyp_tokens) - n + 1)
+    if not hyp_len or not all(matches):
+        return 0.0
+    log_precision = sum(math.log(m / t) for m, t in zip(matches, totals)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return 100.0 * brevity * math.exp(log_precision)
+
+
+def prose(markdown: str) -> str:
+    """Die Prosa-Segmente eines Markdown-Texts, durch Leerzeichen verbunden."""
+    return " ".join(segment.source() for segment in segments_of(segment_markdown(markdown)))
+
+
+def reference_file(reference_dir: Path, lang: str, source_rel: Path):
+    """Sucht die vorhandene Übersetzung (`name.md` oder `name.<lang>.md`)."""
+    for candidate in (reference_dir / lang / source_rel,
+                      reference_dir / lang / source_rel.parent / f"{source_rel.stem}.{lang}.md"):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # Linux: KB
+
+
+def run_backend(backend: str, src_dir: Path, reference_dir: Path, langs: list) -> dict:
+    """Übersetzt den Korpus mit einem Backend (läuft im Unterprozess)."""
+    script = load_script(HF_SCRIPT, "translate_with_huggingface")
+    with open(HF_SCRIPT.parent / "config.yaml", "r", encoding="utf-8") as f:
+        script.CONFIG.update(yaml.safe_load(f) or {})
+    script.CONFIG["backend"] = backend
+    script.TRANSLATION_MEMORY = None
+    script.initialize_translators(script.CONFIG)
+    src_lang = script.CONFIG["src_language"]
+    langs = langs or script.CONFIG["target_langs"]
+
+    # translate_texts() zeitlich messen; Quell-Tokens werden außerhalb der Messung gezählt
+    translate_texts = script.translate_texts
+    counters = {"seconds": 0.0, "tokens": 0}
+
+    def timed_translate_texts(texts, src, tgt):
+        start = time.perf_counter()
+        results = translate_texts(texts, src, tgt)
+        counters["seconds"] += time.perf_counter() - start
+        tokenizer = script.TRANSLATORS.get(tgt).tokenizer
+        counters["tokens"] += sum(len(ids) for ids in tokenizer(texts)["input_ids"])
+        return results
+
+    script.translate_texts = timed_translate_texts
+
+    results = {"backend": backend, "langs": {}}
+    files = sorted(src_dir.rglob("*.md"))
+    for lang in langs:
+        load_start = time.perf_counter()
+        if script.TRANSLATORS.get(lang) is None:
+            results["langs"][lang] = {"error": "Modell nicht verfügbar"}
+            continue
+        load_seconds = time.perf_counter() - load_start
+        counters["seconds"], counters["tokens"] = 0.0, 0
+        hypotheses, references = [], []
+        for md_file in files:
+            _, main_content = script.read_markdown(str(md_file))
+            translated = script.translate_markdown(main_content, src_lang, lang)
+            reference = reference_file(reference_dir, lang, md_file.relative_to(src_dir))
+            if reference is not None:
+                hypotheses.append(prose(translated))
+                references.append(prose(reference.read_text(encoding="utf-8")))
+        results["langs"][lang] = {
+            "load_seconds": load_seconds,
+            "seconds": counters["seconds"],
+            "tokens": counters["tokens"],
+            "tokens_per_second": counters["tokens"] / counters["seconds"] if counters["seconds"] else 0.0,
+            "bleu": corpus_bleu(hypotheses, references) if references else None,
+            "documents": len(references),
+        }
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", help="Zu vergleichendes Backend (mehrfach möglich, Standard: alle)")
+    parser.add_argument("--lang", action="append", help="Zielsprache (mehrfach möglich, Standard: target_langs)")
+    parser.add_argument("--src-dir", default="DE", help="Quellordner mit Markdown-Dateien")
+    parser.add_argument("--reference-dir", default="DEV", help="Ordner mit den vorhandenen Übersetzungen")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    parser.add_argument("--run-backend", help=argparse.SUPPRESS) # intern: ein Backend im Unterprozess
+    args = parser.parse_args(argv)
+
+    src_dir, reference_dir = Path(args.src_dir), Path(args.reference_dir)
+    if args.run_backend:
+        print(json.dumps(run_backend(args.run_backend, src_dir, reference_dir, args.lang or [])))
+        return 0
+
+    script = load_script(HF_SCRIPT, "translate_with_huggingface")
+    all_results = []
+    for backend in args.backend or list(script.BACKENDS):
+        command = [sys.executable, __file__, "--run-backend", backend,
+                   "--src-dir", str(src_dir), "--reference-dir", str(reference_dir)]
+        for lang in args.lang or []:
+            command += ["--lang", lang]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"FEHLER: Backend '{backend}' fehlgeschlagen:\n{completed.stderr[-2000:]}", file=sys.stderr)
+            continue
+        all_results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"{'Backend':<13} {'Sprache':<8} {'Laden [s]':>9} {'Tokens':>8} {'Tokens/s':>9} {'BLEU':>6} {'RSS [MB]':>9}")
+    for result in all_results:
+        for lang, stats in result["langs"].items():
+            if "error" in stats:
+                print(f"{result['backend']:<13} {lang:<8} {stats['error']}")
+                continue
+            bleu = "-" if stats["bleu"] is None else f"{stats['bleu']:.1f}"
+            print(f"{result['backend']:<13} {lang:<8} {stats['load_seconds']:>9.2f} {stats['tokens']:>8} "
+                  f"{stats['tokens_per_second']:>9.1f} {bleu:>6} {result['peak_rss_mb']:>9.0f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(all_results, indent=2) + "\n", encoding="utf-8")
+    return 0 if all_results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
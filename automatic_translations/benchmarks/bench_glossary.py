@@ -0,0 +1,106 @@
+"""
+Micro-Benchmark: Aufwand des Glossars pro MB Eingabe.
+
+Maskiert die Prosa-Segmente aller Dateien in `--src-dir` mit dem Glossar
+aus config.yaml, ergänzt um synthetische Einträge bis zur jeweiligen Größe
+aus `--sizes`. Verglichen wird der Aho-Corasick-Automat aus
+translation_common/glossary.py mit einem regulären Ausdruck, der alle
+Einträge als Alternative enthält: Dessen Zeit wächst mit der Größe des
+Glossars, die des Automaten nicht.
+
+Aufruf (aus dem Repository-Root):
+    python automatic_translations/benchmarks/bench_glossary.py --src-dir DE --sizes 10 1000 10000
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from translation_common.glossary import Glossary
+from translation_common.markdown_segments import segment_markdown, segments_of
+
+DEFAULT_CONFIG = BENCH_DIR.parent / "automatic_translate_with_argos" / "config.yaml"
+
+
+def corpus_texts(src_dir: Path) -> list:
+    """Prosa-Segmente aller Markdown-Dateien (ohne Glossar maskiert)."""
+    texts = []
+    for path in sorted(src_dir.rglob("*.md")):
+        texts.extend(segment.text for segment in segments_of(segment_markdown(path.read_text(encoding="utf-8"))))
+    return texts
+
+
+def entries_of_size(protect: list, size: int) -> list:
+    """Die Einträge aus der Konfiguration, mit synthetischen Begriffen auf `size` aufgefüllt."""
+    entries = list(protect)[:size]
+    entries.extend(f"Produkt{index:05d}" for index in range(size - len(entries)))
+    return entries
+
+
+def regex_of(entries: list):
+    """Alle Einträge als eine Alternative (längste zuerst, "*" als Fortsetzung)."""
+    alternatives = []
+    for entry in sorted(entries, key=len, reverse=True):
+        if entry.endswith("*"):
+            alternatives.append(re.escape(entry.rstrip("*")) + r"[\w./-]*")
+        else:
+            alternatives.append(re.escape(entry) + r"\b")
+    return re.compile(r"\b(?:" + "|".join(alternatives) + ")" if alternatives else r"(?!)")
+
+
+def measure(texts: list, fn, repeat: int) -> tuple:
+    """Bester Lauf über `repeat` Wiederholungen: (Sekunden, Fundstellen)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = sum(fn(text) for text in texts)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = (seconds, found)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src-dir", default="DE", help="Quellordner mit Markdown-Dateien")
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG), help="config.yaml mit `glossary`")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="Anzahl der Glossareinträge")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen (bester Lauf zählt)")
+    args = parser.parse_args(argv)
+
+    texts = corpus_texts(Path(args.src_dir))
+    if not texts:
+        print(f"Keine Prosa in '{args.src_dir}' gefunden.", file=sys.stderr)
+        return 1
+    with open(args.config, "r", encoding="utf-8") as f:
+        protect = ((yaml.safe_load(f) or {}).get("glossary") or {}).get("protect") or []
+    size_mb = sum(len(text.encode("utf-8")) for text in texts) / 2**20
+
+    print(f"Eingabe: {len(texts)} Segmente, {size_mb:.3f} MB")
+    print(f"{'Einträge':>9} {'Verfahren':<13} {'Aufbau [s]':>11} {'Zeit [s]':>9} {'s/MB':>9} {'Fundstellen':>12}")
+    for size in args.sizes:
+        entries = entries_of_size(protect, size)
+        start = time.perf_counter()
+        glossary = Glossary(entries)
+        glossary_build = time.perf_counter() - start
+        start = time.perf_counter()
+        pattern = regex_of(entries)
+        pattern.search("") # Kompiliert den Ausdruck vollständig
+        regex_build = time.perf_counter() - start
+        rows = [
+            ("Aho-Corasick", glossary_build, measure(texts, lambda text: len(glossary.find(text)), args.repeat)),
+            ("Regex", regex_build, measure(texts, lambda text: sum(1 for _ in pattern.finditer(text)), args.repeat)),
+        ]
+        for label, build, (seconds, found) in rows:
+            print(f"{size:>9} {label:<13} {build:>11.3f} {seconds:>9.3f} {seconds / size_mb:>9.2f} {found:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Reproduzierbarer Benchmark der kompletten Übersetzungs-Pipeline, offline.
+
+Zwei Modi:
+- `fake`: Die Modelle werden durch Platzhalter ersetzt (siehe fake_models.py),
+  die den Text unverändert zurückgeben und eine einstellbare Rechenzeit pro
+  Token nachbilden. Gemessen wird der Aufwand der Pipeline selbst
+  (Segmentierung, Chunking, Batching, Translation Memory, Schreiben).
+- `real`: Die lokal vorhandenen Modelle werden verwendet (Hugging Face mit
+  HF_HUB_OFFLINE=1, Argos mit den installierten Paketen); gemessen wird der
+  Durchsatz von Anfang bis Ende.
+
+Jeder Lauf übersetzt eine Kopie des Korpus in einem temporären Verzeichnis
+mit `--force` in einem eigenen Prozess und liest die Messwerte aus dem
+`--metrics`-Bericht des Skripts. Neben `DE/` selbst (Faktor 1) werden
+synthetische Korpora aus N Kopien erzeugt, deren Prosa-Segmente pro Kopie
+verschieden sind, sodass weder Translation Memory noch Duplikaterkennung
+die Arbeit abkürzen. Die Ergebnisse werden an `--history` (JSON Lines)
+angehängt und mit dem letzten Lauf gleicher Einstellungen verglichen.
+
+Aufruf (aus dem Repository-Root):
+    python automatic_translations/benchmarks/bench_pipeline.py --scale 1 --scale 10 --scale 100
+    python automatic_translations/benchmarks/bench_pipeline.py --mode real --script huggingface --lang en
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import fake_models
+from bench_startup import SCRIPTS
+from translation_common.markdown_segments import render_markdown, segment_markdown, segments_of
+
+DEFAULT_HISTORY = ".cache/benchmarks/pipeline-history.jsonl"
+# Stufen, die in der Tabelle als Vorverarbeitung zusammengefasst werden
+PREPROCESSING_STAGES = ("sentence_segmentation", "tokenization", "chunking")
+
+
+def import_script(name: str):
+    """Importiert ein Übersetzungsskript unter seinem Modulnamen (für die spawn-Worker)."""
+    script_dir = str(SCRIPTS[name].parent)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    return importlib.import_module(SCRIPTS[name].stem)
+
+
+# Im Messprozess und in dessen Worker-Prozessen (spawn importiert dieses
+# Modul erneut) die Platzhalter-Modelle einsetzen.
+_FAKE_SETTINGS = fake_models.settings_from_env()
+if _FAKE_SETTINGS:
+    fake_models.install(import_script(_FAKE_SETTINGS["script"]), _FAKE_SETTINGS["script"], _FAKE_SETTINGS)
+
+
+def _split_front_matter(text: str):
+    """Trennt ein Front Matter (unverändert übernommen) vom Hauptinhalt."""
+    lines = text.splitlines(keepends=True)
+    if lines and lines[0].strip() == "---":
+        for index in range(1, len(lines)):
+            if lines[index].strip() == "---":
+                return "".join(lines[:index + 1]), "".join(lines[index + 1:])
+    return "", text
+
+
+def make_variant(text: str, copy: int) -> str:
+    """Kopie eines Markdown-Texts, deren Prosa-Segmente die Kopie-Nummer tragen."""
+    if copy == 0:
+        return text
+    front_matter, body = _split_front_matter(text)
+    parts = segment_markdown(body)
+    return front_matter + render_markdown(parts, [f"{segment.text} ({copy})" for segment in segments_of(parts)])
+
+
+def build_corpus(src_dir: Path, dest: Path, scale: int) -> int:
+    """Legt den Korpus mit `scale` Kopien in `dest` an. Gibt die Größe in Bytes zurück."""
+    size = 0
+    for md_file in sorted(src_dir.rglob("*.md")):
+        text = md_file.read_text(encoding="utf-8")
+        for copy in range(scale):
+            target = dest / (f"copy-{copy:03d}" if scale > 1 else "") / md_file.relative_to(src_dir)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            variant = make_variant(text, copy)
+            target.write_text(variant, encoding="utf-8")
+            size += len(variant.encode("utf-8"))
+    return size
+
+
+def write_config(name: str, workdir: Path, args):
+    """Konfiguration des Skripts mit Benchmark-Einstellungen ins Arbeitsverzeichnis schreiben."""
+    with open(SCRIPTS[name].parent / "config.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    config["src_dir"] = "DE"
+    config["output_dir"] = "DEV"
+    config.pop("manifest_file", None) # Manifest im Arbeitsordner (DEV/), nicht das des Repositorys
+    memory = dict(config.get("translation_memory") or {})
+    memory.update(enabled=args.tm, path=".cache/translation-memory.sqlite")
+    config["translation_memory"] = memory
+    store = dict(config.get("model_store") or {})
+    if args.mode == "fake":
+        store["enabled"] = False # Platzhalter-Modelle brauchen keine Pakete
+    else:
+        # Den Modellspeicher des Aufrufers verwenden statt pro Arbeitsordner neu zu laden
+        store["path"] = str(Path(store.get("path", ".cache/model-store")).resolve())
+    config["model_store"] = store
+    if args.lang:
+        config["target_langs"] = args.lang
+    with open(workdir / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+
+def run_script(name: str, jobs: int):
+    """Ein Lauf des Skripts im aktuellen Verzeichnis (läuft im Messprozess)."""
+    script = import_script(name)
+    if name == "huggingface":
+        # config.yaml aus dem Arbeitsverzeichnis statt neben dem Skript verwenden
+        script.__file__ = str(Path.cwd() / SCRIPTS[name].name)
+    script.main(["--force", "--jobs", str(jobs), "--metrics", "metrics.json"])
+
+
+def fake_settings(name: str, args) -> dict:
+    return {"script": name, "token_latency_ms": args.token_latency_ms,
+            "call_latency_ms": args.call_latency_ms, "spacy": args.spacy}
+
+
+def measure(name: str, scale: int, args) -> dict:
+    """Ein gemessener Lauf in einem frischen Arbeitsverzeichnis."""
+    env = dict(os.environ)
+    if args.mode == "fake":
+        env[fake_models.ENV_VAR] = json.dumps(fake_settings(name, args))
+    else:
+        env.update(HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+    with tempfile.TemporaryDirectory(prefix=f"bench-pipeline-{name}-") as tmp:
+        workdir = Path(tmp)
+        corpus_bytes = build_corpus(Path(args.src_dir), workdir / "DE", scale)
+        write_config(name, workdir, args)
+        command = [sys.executable, str(Path(__file__).resolve()), "--run-script", name, "--jobs", str(args.jobs)]
+        start = time.perf_counter()
+        with open(workdir / "run.log", "w", encoding="utf-8") as log:
+            completed = subprocess.run(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        wall_seconds = time.perf_counter() - start
+        if completed.returncode != 0 or not (workdir / "metrics.json").exists():
+            tail = (workdir / "run.log").read_text(encoding="utf-8")[-2000:]
+            raise RuntimeError(f"{name} (Faktor {scale}) fehlgeschlagen:\n{tail}")
+        report = json.loads((workdir / "metrics.json").read_text(encoding="utf-8"))
+
+    pairs = report["pairs"].values()
+    tokens = sum(entry["tokens"] for entry in pairs)
+    stages = {stage: entry["seconds"] for stage, entry in report["stages"].items()}
+    return {
+        "wall_seconds": wall_seconds,
+        "corpus_bytes": corpus_bytes,
+        "files": report["counters"].get("files_translated", 0),
+        "segments": sum(entry["segments"] for entry in pairs),
+        "tokens": tokens,
+        "tokens_per_second": tokens / wall_seconds if wall_seconds else 0.0,
+        "stages": stages,
+        "peak_rss_mb": max(report["peak_rss_bytes"], report["worker_peak_rss_bytes"]) / 2**20,
+    }
+
+
+def git_commit() -> str:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCH_DIR)
+    except OSError:
+        return ""
+    return completed.stdout.strip() if completed.returncode == 0 else ""
+
+
+def history_key(record: dict) -> tuple:
+    """Läufe sind vergleichbar, wenn diese Einstellungen übereinstimmen."""
+    return tuple(json.dumps(record.get(key), sort_keys=True)
+                 for key in ("mode", "script", "scale", "jobs", "langs", "tm", "fake"))
+
+
+def load_history(path: Path) -> list:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_run(history: list, record: dict):
+    key = history_key(record)
+    for entry in reversed(history):
+        if history_key(entry) == key:
+            return entry
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("fake", "real"), default="fake",
+                        help="fake: Platzhalter-Modelle (Pipeline-Aufwand), real: lokal vorhandene Modelle")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), action="append",
+                        help="Nur dieses Skript messen (mehrfach möglich)")
+    parser.add_argument("--scale", type=int, action="append",
+                        help="Korpus-Faktor (mehrfach möglich, Standard: 1 und 10)")
+    parser.add_argument("--lang", action="append", help="Zielsprache (mehrfach möglich, Standard: target_langs)")
+    parser.add_argument("--src-dir", default="DE", help="Quellordner mit Markdown-Dateien")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs des Skripts")
+    parser.add_argument("--tm", action="store_true", help="Translation Memory einschalten (startet leer)")
+    parser.add_argument("--token-latency-ms", type=float, default=0.0,
+                        help="fake: Rechenzeit pro Quell-Token in Millisekunden")
+    parser.add_argument("--call-latency-ms", type=float, default=0.0,
+                        help="fake: Rechenzeit pro Modellaufruf (Batch bzw. Chunk) in Millisekunden")
+    parser.add_argument("--spacy", action="store_true",
+                        help="fake: spaCy-Satzsegmentierung verwenden, falls installiert (sonst Regex)")
+    parser.add_argument("--repeat", type=int, default=1, help="Läufe pro Messung (Median der Wanduhrzeit)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON-Lines-Datei für den Verlauf")
+    parser.add_argument("--max-regression", type=float, metavar="PROZENT",
+                        help="Exit-Code 1, wenn ein Lauf mehr als PROZENT langsamer ist als der letzte vergleichbare")
+    parser.add_argument("--run-script", help=argparse.SUPPRESS) # intern: ein Lauf im Messprozess
+    args = parser.parse_args(argv)
+
+    if args.run_script:
+        run_script(args.run_script, args.jobs)
+        return 0
+
+    if not Path(args.src_dir).is_dir():
+        print(f"Quellordner '{args.src_dir}' existiert nicht.", file=sys.stderr)
+        return 1
+
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    commit = git_commit()
+    exit_code = 0
+    print(f"{'Skript':<12} {'Faktor':>6} {'Wall [s]':>9} {'Segmente':>9} {'Tokens/s':>10} {'Vorverarb. [s]':>14} "
+          f"{'Inferenz [s]':>12} {'Schreiben [s]':>13} {'RSS [MB]':>9}  Vergleich")
+    for name in args.script or sorted(SCRIPTS):
+        for scale in args.scale or [1, 10]:
+            try:
+                runs = [measure(name, scale, args) for _ in range(max(1, args.repeat))]
+            except RuntimeError as e:
+                print(f"FEHLER: {e}", file=sys.stderr)
+                exit_code = 1
+                continue
+            median = statistics.median(run["wall_seconds"] for run in runs)
+            result = min(runs, key=lambda run: abs(run["wall_seconds"] - median))
+            record = dict(result, timestamp=int(time.time()), commit=commit, mode=args.mode, script=name,
+                          scale=scale, jobs=args.jobs, langs=args.lang, tm=args.tm,
+                          fake=fake_settings(name, args) if args.mode == "fake" else None)
+
+            comparison = "erster Lauf"
+            previous = previous_run(history, record)
+            if previous:
+                change = 100.0 * (record["wall_seconds"] / previous["wall_seconds"] - 1)
+                comparison = f"{change:+.1f} % ggü. {previous.get('commit') or 'letztem Lauf'}"
+                if args.max_regression is not None and change > args.max_regression:
+                    comparison += " ZU LANGSAM"
+                    exit_code = 1
+            history.append(record)
+            history_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
+
+            stages = record["stages"]
+            preprocessing = sum(stages.get(stage, 0.0) for stage in PREPROCESSING_STAGES)
+            print(f"{name:<12} {scale:>6} {record['wall_seconds']:>9.2f} {record['segments']:>9} "
+                  f"{record['tokens_per_second']:>10.0f} {preprocessing:>14.2f} {stages.get('inference', 0.0):>12.2f} "
+                  f"{stages.get('file_write', 0.0):>13.2f} {record['peak_rss_mb']:>9.0f}  {comparison}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
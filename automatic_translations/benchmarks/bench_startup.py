@@ -0,0 +1,151 @@
+"""
+Benchmark: Startzeit der Übersetzungsskripte bei einem Lauf ohne Arbeit.
+
+Für jedes Skript wird ein temporäres Arbeitsverzeichnis mit einer Kopie von
+`--src-dir` angelegt und das Manifest so vorbelegt, dass alle Ausgaben als
+aktuell gelten (die Ausgabedateien sind Platzhalter, es wird nichts
+übersetzt). Gemessen wird die Wanduhrzeit kompletter Skriptläufe als
+Unterprozess mit `--offline`, damit kein Lauf den Paketindex aus dem Netz
+abruft. Zum Vergleich wird die reine Importzeit der schweren
+Abhängigkeiten ausgegeben, die ein solcher Lauf nicht mehr importiert.
+
+Aufruf (aus dem Repository-Root):
+    python automatic_translations/benchmarks/bench_startup.py --src-dir DE
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from bench_tokenizer import load_script
+from translation_common import manifest as translation_manifest
+
+SCRIPTS = {
+    "argos": BENCH_DIR.parent / "automatic_translate_with_argos" / "translate_with_argos.py",
+    "huggingface": BENCH_DIR.parent / "automatic_translate_with_huggingfaces" / "translate_with_huggingface.py",
+}
+HEAVY_MODULES = {
+    "argos": ["argostranslate.translate"],
+    "huggingface": ["torch", "transformers", "spacy"],
+}
+
+
+def effective_config(name: str, script_module) -> dict:
+    """Die Konfiguration, mit der das Skript laufen wird."""
+    config_path = SCRIPTS[name].parent / "config.yaml"
+    with open(config_path, "r", encoding="utf-8") as f:
+        loaded = yaml.safe_load(f) or {}
+    if name == "huggingface":
+        config = dict(script_module.CONFIG)
+        config.update(loaded)
+        return config
+    return loaded
+
+
+def model_ids(name: str, script_module, config: dict) -> dict:
+    """Modell-IDs pro Zielsprache, genau wie das Skript sie ins Manifest schreibt."""
+    target_langs = config.get("target_langs", [])
+    if name == "huggingface":
+        return {lang: script_module.get_model_id(config, lang) for lang in target_langs}
+    routes = script_module.load_translation_models(config.get("src_language", "de"), target_langs)
+    return {lang: script_module.get_model_id(route) for lang, route in routes.items() if route}
+
+
+def prepare_workdir(name: str, src_dir: Path, workdir: Path):
+    """Legt Quellen, Platzhalter-Ausgaben und ein vollständiges Manifest an."""
+    script_module = load_script(SCRIPTS[name], f"bench_startup_{name}")
+    config = effective_config(name, script_module)
+    shutil.copytree(src_dir, workdir / config.get("src_dir", "DE"))
+    shutil.copy(SCRIPTS[name].parent / "config.yaml", workdir / "config.yaml")
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        output_dir = Path(config.get("output_dir", "DEV"))
+        manifest_file = translation_manifest.manifest_path(config, output_dir)
+        manifest = translation_manifest.load_manifest(manifest_file)
+        config_hash = translation_manifest.config_digest(
+            config, script_module.OUTPUT_CONFIG_KEYS, script_module.PIPELINE_VERSION)
+        ids = model_ids(name, script_module, config)
+        source_dir = Path(config.get("src_dir", "DE"))
+        for md_file in sorted(source_dir.rglob("*.md")):
+            source_rel = md_file.relative_to(source_dir).as_posix()
+            digest = translation_manifest.file_digest(md_file)
+            for lang, model_id in ids.items():
+                output_file = output_dir / lang / source_rel
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                output_file.write_text("", encoding="utf-8")
+                translation_manifest.record(manifest, translation_manifest.make_entry(
+                    source_rel, lang, model_id, config_hash, digest))
+        translation_manifest.save_manifest(manifest_file, manifest)
+    finally:
+        os.chdir(cwd)
+
+
+def time_command(command: list, cwd: Path, repeat: int) -> list:
+    """Wanduhrzeiten von `repeat` Läufen eines Befehls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_time(module: str):
+    """Importzeit eines Moduls in einem frischen Interpreter (None, wenn nicht installiert)."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src-dir", default="DE", help="Quellordner mit Markdown-Dateien")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), action="append",
+                        help="Nur dieses Skript messen (mehrfach möglich)")
+    parser.add_argument("--repeat", type=int, default=5, help="Anzahl gemessener Läufe")
+    parser.add_argument("--budget", type=float, default=1.0, help="Zielzeit in Sekunden für einen Lauf ohne Arbeit")
+    args = parser.parse_args(argv)
+
+    src_dir = Path(args.src_dir).resolve()
+    if not src_dir.is_dir():
+        print(f"Quellordner '{args.src_dir}' existiert nicht.", file=sys.stderr)
+        return 1
+
+    exit_code = 0
+    print(f"{'Skript':<12} {'Min [s]':>8} {'Median [s]':>11} {'Max [s]':>8}  Ziel < {args.budget:.1f} s")
+    for name in args.script or sorted(SCRIPTS):
+        with tempfile.TemporaryDirectory(prefix=f"bench-startup-{name}-") as tmp:
+            workdir = Path(tmp)
+            prepare_workdir(name, src_dir, workdir)
+            timings = time_command([sys.executable, str(SCRIPTS[name]), "--offline"], workdir, args.repeat)
+        median = statistics.median(timings)
+        verdict = "ok" if median < args.budget else "ZU LANGSAM"
+        if median >= args.budget:
+            exit_code = 1
+        print(f"{name:<12} {min(timings):>8.3f} {median:>11.3f} {max(timings):>8.3f}  {verdict}")
+
+    print("\nImportzeit der Abhängigkeiten (fallen bei einem Lauf ohne Arbeit weg):")
+    for name in args.script or sorted(SCRIPTS):
+        for module in HEAVY_MODULES[name]:
+            seconds = import_time(module)
+            shown = "nicht installiert" if seconds is None else f"{seconds:.3f} s"
+            print(f"  {module:<26} {shown}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
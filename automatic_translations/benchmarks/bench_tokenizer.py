@@ -0,0 +1,171 @@
+"""
+Micro-Benchmark: Tokenizer-Zeit pro MB Eingabe im Hugging Face Skript.
+
+Vergleicht das frühere Verfahren (der wachsende Chunk wird bei jedem Satz
+neu tokenisiert, danach encode/decode/encode pro Chunk) mit dem aktuellen
+`chunk_text()`, das jeden Satz genau einmal tokenisiert.
+
+Eingabe sind die Prosa-Segmente aller Dateien in `--src-dir` sowie ein
+synthetischer langer Absatz, an dem der quadratische Aufwand des alten
+Verfahrens sichtbar wird.
+
+Aufruf (aus dem Repository-Root):
+    python automatic_translations/benchmarks/bench_tokenizer.py --model Helsinki-NLP/opus-mt-de-en
+"""
+import argparse
+import importlib.util
+import re
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+HF_SCRIPT = BENCH_DIR.parent / "automatic_translate_with_huggingfaces" / "translate_with_huggingface.py"
+
+
+def load_script(path: Path, name: str):
+    """Lädt ein Übersetzungsskript als Modul, ohne main() auszuführen."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TimedTokenizer:
+    """Misst die Zeit aller encode/decode/__call__-Aufrufe eines Tokenizers."""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self._tokenizer, name)
+
+    def _timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.calls += 1
+
+    def encode(self, *args, **kwargs):
+        return self._timed(self._tokenizer.encode, *args, **kwargs)
+
+    def decode(self, *args, **kwargs):
+        return self._timed(self._tokenizer.decode, *args, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        return self._timed(self._tokenizer, *args, **kwargs)
+
+
+def legacy_chunk_and_prepare(text: str, max_chunk_length_config: int, tokenizer) -> list:
+    """Das frühere Verfahren aus chunk_text() und translate_text() (nur Tokenizer-Arbeit)."""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    effective_max_chunk_length = min(max_chunk_length_config, tokenizer.model_max_length - 50)
+    chunks = []
+    current_chunk_sentences = []
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        sentence_tokens_length = len(tokenizer.encode(sentence, truncation=True, max_length=effective_max_chunk_length))
+        if sentence_tokens_length > effective_max_chunk_length:
+            if current_chunk_sentences:
+                chunks.append(" ".join(current_chunk_sentences))
+                current_chunk_sentences = []
+            chunks.append(sentence)
+            continue
+        prospective_chunk_content = " ".join(current_chunk_sentences + [sentence])
+        prospective_chunk_tokens_length = len(tokenizer.encode(prospective_chunk_content, truncation=True, max_length=effective_max_chunk_length))
+        if prospective_chunk_tokens_length <= effective_max_chunk_length:
+            current_chunk_sentences.append(sentence)
+        else:
+            if current_chunk_sentences:
+                chunks.append(" ".join(current_chunk_sentences))
+            current_chunk_sentences = [sentence]
+    if current_chunk_sentences:
+        chunks.append(" ".join(current_chunk_sentences))
+
+    prepared = []
+    input_max_length_for_model = tokenizer.model_max_length - 10
+    for chunk in chunks:
+        chunk_tokens = tokenizer.encode(chunk, truncation=True, max_length=input_max_length_for_model)
+        chunk_to_translate = tokenizer.decode(chunk_tokens, skip_special_tokens=True)
+        prepared.append((chunk_to_translate, len(tokenizer.encode(chunk_to_translate))))
+    return prepared
+
+
+def corpus_texts(src_dir: Path, segments_module) -> list:
+    """Prosa-Segmente aller Markdown-Dateien (so wie sie an chunk_text() gehen)."""
+    texts = []
+    for path in sorted(src_dir.rglob("*.md")):
+        parts = segments_module.segment_markdown(path.read_text(encoding="utf-8"))
+        texts.extend(segment.text for segment in segments_module.segments_of(parts))
+    return texts
+
+
+def synthetic_paragraph(texts: list, sentences: int) -> str:
+    """Ein langer Absatz aus wiederholten Korpus-Sätzen."""
+    pool = [text for text in texts if text.endswith((".", "!", "?"))] or texts
+    return " ".join(pool[i % len(pool)] for i in range(sentences))
+
+
+def measure(label: str, texts: list, fn, tokenizer, max_chunk_length: int, repeat: int) -> dict:
+    timed = TimedTokenizer(tokenizer)
+    size_mb = sum(len(text.encode("utf-8")) for text in texts) / 2**20
+    best = None
+    for _ in range(repeat):
+        timed.seconds, timed.calls = 0.0, 0
+        for text in texts:
+            fn(text, max_chunk_length, timed)
+        if best is None or timed.seconds < best[0]:
+            best = (timed.seconds, timed.calls)
+    seconds, calls = best
+    return {"label": label, "mb": size_mb, "seconds": seconds, "calls": calls,
+            "s_per_mb": seconds / size_mb if size_mb else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="Helsinki-NLP/opus-mt-de-en", help="Hugging Face Modell für den Tokenizer")
+    parser.add_argument("--src-dir", default="DE", help="Quellordner mit Markdown-Dateien")
+    parser.add_argument("--max-chunk-length", type=int, default=100, help="max_chunk_length wie in config.yaml")
+    parser.add_argument("--paragraph-sentences", type=int, default=400, help="Sätze im synthetischen Absatz")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen (bester Lauf zählt)")
+    args = parser.parse_args(argv)
+
+    script = load_script(HF_SCRIPT, "translate_with_huggingface")
+    from translation_common import markdown_segments
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    script.SPACY_NLP_MODEL = False # Nur Tokenizer-Zeit messen, Satzgrenzen per Regex
+
+    texts = corpus_texts(Path(args.src_dir), markdown_segments)
+    if not texts:
+        print(f"Keine Prosa in '{args.src_dir}' gefunden.", file=sys.stderr)
+        return 1
+    inputs = {
+        "Korpus-Segmente": texts,
+        f"Langer Absatz ({args.paragraph_sentences} Sätze)": [synthetic_paragraph(texts, args.paragraph_sentences)],
+    }
+
+    print(f"Tokenizer: {args.model}, max_chunk_length={args.max_chunk_length}")
+    print(f"{'Eingabe':<32} {'Verfahren':<8} {'MB':>7} {'Aufrufe':>9} {'Zeit [s]':>9} {'s/MB':>9}")
+    for name, data in inputs.items():
+        results = [
+            measure("vorher", data, legacy_chunk_and_prepare, tokenizer, args.max_chunk_length, args.repeat),
+            measure("nachher", data, script.chunk_text, tokenizer, args.max_chunk_length, args.repeat),
+        ]
+        for result in results:
+            print(f"{name:<32} {result['label']:<8} {result['mb']:>7.3f} {result['calls']:>9} "
+                  f"{result['seconds']:>9.3f} {result['s_per_mb']:>9.2f}")
+        if results[1]["seconds"]:
+            print(f"{'':<32} Faktor {results[0]['seconds'] / results[1]['seconds']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Platzhalter-Modelle für Benchmarks ohne Netzwerk und ohne echte Modelle.
+
+`install()` ersetzt in einem geladenen Übersetzungsskript die Stelle, an der
+Modelle geladen werden: `TRANSLATORS` im Hugging Face Skript bzw.
+`load_translation_models`/`MODELS` im Argos Skript. Alles davor und danach
+(Segmentierung, Chunking, Batching, Translation Memory, Schreiben) läuft
+unverändert. Die Platzhalter geben den Text unverändert zurück und warten
+pro Aufruf `call_latency_ms` plus pro Token `token_latency_ms`, um die
+Rechenzeit eines Modells nachzubilden.
+
+Die Einstellungen stehen in der Umgebungsvariablen `BENCH_FAKE_MODELS`
+(JSON), damit auch die Worker-Prozesse von `--jobs` (spawn) sie erhalten.
+"""
+import json
+import os
+import re
+import time
+
+ENV_VAR = "BENCH_FAKE_MODELS"
+
+_TOKENS = re.compile(r"\w+|[^\w\s]")
+
+
+def _wait(settings: dict, tokens: int):
+    seconds = (settings.get("call_latency_ms", 0.0) + tokens * settings.get("token_latency_ms", 0.0)) / 1000
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+class FakeTokenizer:
+    """Wort-Tokenizer mit der Schnittstelle, die `chunk_text()` nutzt."""
+
+    model_max_length = 512
+
+    def __init__(self):
+        self._ids = {}
+        self._tokens = []
+
+    def _id(self, token: str) -> int:
+        if token not in self._ids:
+            self._ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        return self._ids[token]
+
+    def __call__(self, texts, add_special_tokens: bool = True, **kwargs):
+        single = isinstance(texts, str)
+        eos = [0] if add_special_tokens else []
+        input_ids = [[self._id(token) for token in _TOKENS.findall(text)] + eos
+                     for text in ([texts] if single else texts)]
+        return {"input_ids": input_ids[0] if single else input_ids}
+
+    def decode(self, ids, skip_special_tokens: bool = True):
+        return " ".join(self._tokens[i] for i in ids)
+
+
+class FakeTranslator:
+    """Ersatz für die transformers-Pipeline: gibt die Eingaben unverändert zurück."""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.tokenizer = FakeTokenizer()
+
+    def __call__(self, texts, max_length=None, batch_size=None, **kwargs):
+        _wait(self.settings, sum(len(_TOKENS.findall(text)) for text in texts))
+        return [{"translation_text": text} for text in texts]
+
+
+class FakeArgosModel:
+    """Ersatz für ein Argos-Modell (`translate(text)`)."""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+
+    def translate(self, text: str) -> str:
+        _wait(self.settings, len(_TOKENS.findall(text)))
+        return text
+
+
+def _argos_routes(settings: dict):
+    """Routen wie bei den üblichen Argos-Paketen: nur src->pivot und pivot->Ziel."""
+    pivot = settings.get("pivot_lang", "en")
+
+    def load_translation_models(src_lang, target_langs, pivot_lang=pivot):
+        return {lang: [(src_lang, lang)] if lang == pivot_lang else [(src_lang, pivot_lang), (pivot_lang, lang)]
+                for lang in target_langs}
+
+    return load_translation_models
+
+
+def install(script, kind: str, settings: dict):
+    """Ersetzt das Laden der Modelle in `script` ("huggingface" oder "argos")."""
+    if kind == "huggingface":
+        script.TRANSLATORS = script.ModelCache(lambda lang: FakeTranslator(settings))
+        if not settings.get("spacy"):
+            script.SPACY_NLP_MODEL = False # Regex-Satzsegmentierung, unabhängig von installierten Modellen
+    elif kind == "argos":
+        script.load_translation_models = _argos_routes(settings)
+        script.MODELS = script.ModelCache(lambda step: FakeArgosModel(settings))
+        script._package_version = lambda from_code, to_code: "fake"
+    else:
+        raise ValueError(f"Unbekanntes Skript: {kind}")
+
+
+def settings_from_env():
+    """Die Einstellungen aus `BENCH_FAKE_MODELS` oder None."""
+    value = os.environ.get(ENV_VAR)
+    return json.loads(value) if value else None
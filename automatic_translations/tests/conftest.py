@@ -0,0 +1,5 @@
+"""Gemeinsame Einstellungen der Tests: translation_common importierbar machen."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,87 @@
+"""Tests für das Token-Budget beim Chunking des Argos-Skripts (chunk_text, translate_content)."""
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+ARGOS_DIR = Path(__file__).resolve().parent.parent / "automatic_translate_with_argos"
+sys.path.insert(0, str(ARGOS_DIR))
+argos = importlib.import_module("translate_with_argos")
+
+TEXT = ("Erster Satz mit fünf Wörtern. Zweiter Satz ist etwas länger als der erste! "
+        "Dritter Satz?\nNeue Zeile mit Text.\n")
+
+
+def words(text: str) -> int:
+    """Zählt Wörter als Tokens (Ersatz für SentencePiece)."""
+    return len(text.split())
+
+
+@pytest.mark.parametrize("budget", [1, 3, 6, 10, 1000])
+def test_chunks_reassemble_to_text(budget):
+    chunks = argos.chunk_text(TEXT, budget, words)
+    assert "".join(chunk for chunk, _ in chunks) == TEXT
+
+
+@pytest.mark.parametrize("budget", [1, 3, 6, 10])
+def test_chunks_stay_within_budget_and_report_their_size(budget):
+    for chunk, size in argos.chunk_text(TEXT, budget, words):
+        assert size == words(chunk)
+        assert size <= budget
+
+
+def test_sentences_are_packed_until_budget_is_reached():
+    chunks = [chunk for chunk, _ in argos.chunk_text(TEXT, 10, words)]
+    assert chunks == ["Erster Satz mit fünf Wörtern. ",
+                      "Zweiter Satz ist etwas länger als der erste! Dritter Satz?\n",
+                      "Neue Zeile mit Text.\n"]
+
+
+def test_text_within_budget_is_one_chunk():
+    assert argos.chunk_text(TEXT, 1000, words) == [(TEXT, words(TEXT))]
+
+
+def test_sentences_within_budget_are_measured_once():
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return words(text)
+
+    argos.chunk_text(TEXT, 10, counting) # Kein Satz über dem Budget
+    assert len(calls) == len(argos._sentence_units(TEXT))
+
+
+def test_without_tokenizer_budget_counts_characters():
+    chunks = argos.chunk_text(TEXT, 40)
+    assert "".join(chunk for chunk, _ in chunks) == TEXT
+    assert all(size == len(chunk) for chunk, size in chunks)
+
+
+def test_empty_text():
+    assert argos.chunk_text("", 10, words) == [("", 0)]
+    assert argos.chunk_text("  \n", 10, words) == [("", 0)]
+
+
+class StrippingModel:
+    """Wie Argos: liefert die Übersetzung ohne Rand-Leerraum."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def translate(self, chunk):
+        self.inputs.append(chunk)
+        return chunk.strip().upper()
+
+
+def test_translate_content_keeps_whitespace_between_chunks():
+    model = StrippingModel()
+    assert argos.translate_content(TEXT, model, 10, words) == TEXT.upper()
+    assert len(model.inputs) == 3
+    assert all(chunk == chunk.strip() for chunk in model.inputs)
+
+
+def test_translate_content_keeps_spaces_between_split_words():
+    text = "eins zwei drei vier fünf sechs"
+    assert argos.translate_content(text, StrippingModel(), 2, words) == text.upper()
@@ -0,0 +1,91 @@
+"""Tests für translation_common/daemon.py: ein Dienst im Testprozess mit Platzhalter-Übersetzer."""
+import asyncio
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from translation_common.daemon import DaemonError, MicroBatcher, _serve, _Service, request
+
+
+class FakeTranslator:
+    """Übersetzt in Großbuchstaben und merkt sich jeden Batch."""
+
+    def __init__(self):
+        self.batches = []
+        self.thread_names = set()
+
+    def __call__(self, texts, lang):
+        self.batches.append((lang, list(texts)))
+        self.thread_names.add(threading.current_thread().name)
+        return [text.upper() for text in texts]
+
+
+def render(markdown, lang, translate):
+    return "\n".join(translate(markdown.splitlines()))
+
+
+def run_service(socket_path, client, window_ms=200):
+    """Startet den Dienst auf `socket_path`, führt `client(address)` in einem Thread aus und beendet ihn."""
+    translator = FakeTranslator()
+    inference = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inferenz")
+    render_pool = ThreadPoolExecutor(max_workers=2)
+    batcher = MicroBatcher(translator, inference, window_ms, 256)
+    service = _Service("test", batcher, render, render_pool, "digest", ["en"])
+
+    async def main():
+        server = asyncio.ensure_future(_serve(service, str(socket_path)))
+        while not socket_path.exists():
+            if server.done():
+                server.result()
+            await asyncio.sleep(0.01)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, client, str(socket_path))
+        finally:
+            os.kill(os.getpid(), signal.SIGTERM) # Beendet den Dienst wie im Betrieb
+            await server
+
+    try:
+        result = asyncio.run(main())
+    finally:
+        render_pool.shutdown()
+        inference.shutdown()
+    return result, translator, batcher
+
+
+def test_concurrent_requests_are_batched_and_answered(tmp_path):
+    def client(address):
+        payloads = [{"lang": "en", "segments": ["Erster Text", "Gemeinsam"]},
+                    {"lang": "en", "segments": ["Gemeinsam", "Zweiter Text"]}]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            return list(pool.map(lambda payload: request(address, payload, timeout=10), payloads))
+
+    socket_path = tmp_path / "d.sock"
+    responses, translator, batcher = run_service(socket_path, client)
+
+    assert responses == [{"segments": ["ERSTER TEXT", "GEMEINSAM"]},
+                         {"segments": ["GEMEINSAM", "ZWEITER TEXT"]}]
+    assert [(lang, sorted(texts)) for lang, texts in translator.batches] == [
+        ("en", ["Erster Text", "Gemeinsam", "Zweiter Text"])] # Ein Batch, jedes Segment einmal
+    assert (batcher.requests, batcher.batches, batcher.segments) == (2, 1, 3)
+    assert all(name.startswith("inferenz") for name in translator.thread_names)
+    assert not socket_path.exists()
+
+
+def test_markdown_requests_and_errors(tmp_path):
+    def client(address):
+        markdown = request(address, {"lang": "en", "markdown": "Zeile eins\nZeile zwei"}, timeout=10)
+        with pytest.raises(DaemonError) as unknown_lang:
+            request(address, {"lang": "xx", "segments": ["Text"]}, timeout=10)
+        with pytest.raises(DaemonError) as other_config:
+            request(address, {"lang": "en", "segments": ["Text"], "config_digest": "anders"}, timeout=10)
+        return markdown, unknown_lang.value.status, other_config.value.status
+
+    responses, _, _ = run_service(tmp_path / "d.sock", client, window_ms=1)
+    assert responses == ({"markdown": "ZEILE EINS\nZEILE ZWEI"}, 400, 409)
+
+
+def test_request_without_service_returns_none(tmp_path):
+    assert request(str(tmp_path / "fehlt.sock"), {"lang": "en", "segments": []}) is None
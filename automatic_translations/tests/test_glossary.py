@@ -0,0 +1,76 @@
+"""Tests für translation_common/glossary.py."""
+import pickle
+
+import pytest
+
+from translation_common.glossary import Glossary, GlossaryTerm, load_glossary
+from translation_common.markdown_segments import render_markdown, segment_markdown, segments_of
+
+
+def found(glossary, text):
+    return [text[start:end] for start, end, _ in glossary.find(text)]
+
+
+def test_leftmost_longest_without_overlap():
+    glossary = Glossary(["Check", "Checkmk", "Checkmk Server", "mk Server"])
+    assert found(glossary, "Der Checkmk Server und Checkmk.") == ["Checkmk Server", "Checkmk"]
+
+
+def test_overlapping_entries_pick_leftmost_start():
+    glossary = Glossary(["ab cd", "cd ef"])
+    assert found(glossary, "ab cd ef") == ["ab cd"]
+
+
+def test_failure_links_find_entries_inside_partial_matches():
+    glossary = Glossary(["abcx", "bc"])
+    assert found(glossary, "abc bc") == ["bc"]
+    glossary = Glossary(["she", "he", "hers"])
+    assert found(glossary, "hers she he") == ["hers", "she", "he"]
+
+
+def test_matches_only_at_word_boundaries():
+    glossary = Glossary(["Checkmk", "host_group"])
+    assert found(glossary, "Checkmkx host_groups Checkmk_2 host_group.") == ["host_group"]
+
+
+def test_prefix_entries_extend_to_end_of_identifier():
+    glossary = Glossary(["checkmk.general.*", "/omd/sites/*"])
+    assert found(glossary, "Nutze checkmk.general.folder. Pfad: /omd/sites/mysite/etc") == \
+        ["checkmk.general.folder", "/omd/sites/mysite/etc"]
+
+
+def test_fixed_terms_only_as_standalone_words():
+    glossary = Glossary(["Checkmk"], {"Hostgruppen": {"en": "host groups"}})
+    assert found(glossary, "Hostgruppen-Daten und Checkmk-Hostgruppen") == ["Checkmk"]
+    assert found(glossary, "Die Hostgruppen.") == ["Hostgruppen"]
+
+
+def test_ignore_case():
+    glossary = Glossary(["Checkmk"], ignore_case=True)
+    assert found(glossary, "CHECKMK und checkmk") == ["CHECKMK", "checkmk"]
+    assert found(Glossary(["Checkmk"]), "CHECKMK") == []
+
+
+def test_size_of_glossary_does_not_change_matches():
+    glossary = Glossary(["Checkmk"] + [f"Produkt{index:05d}" for index in range(5000)])
+    assert len(glossary) == 5001
+    assert found(glossary, "Checkmk und Produkt04999, nicht Produkt5") == ["Checkmk", "Produkt04999"]
+
+
+def test_mask_and_render_with_fixed_translations():
+    glossary = Glossary(["Checkmk"], {"Hostgruppe": {"en": "host group"}})
+    parts = segment_markdown("Checkmk kennt jede Hostgruppe.\n", glossary)
+    (segment,) = segments_of(parts)
+    assert segment.text == "§0§ kennt jede §1§."
+    assert render_markdown(parts, ["§0§ knows every §1§."], "en") == "Checkmk knows every host group.\n"
+    assert render_markdown(parts, ["§0§ connaît chaque §1§."], "fr") == "Checkmk connaît chaque Hostgruppe.\n"
+
+
+def test_glossary_term_survives_pickling():
+    term = pickle.loads(pickle.dumps(GlossaryTerm("Hostgruppe", {"en": "host group"})))
+    assert term == "Hostgruppe" and term.translations == {"en": "host group"}
+
+
+@pytest.mark.parametrize("config", [{}, {"glossary": None}, {"glossary": {"protect": ["", "*"]}}])
+def test_load_glossary_without_entries(config):
+    assert load_glossary(config) is None
@@ -0,0 +1,50 @@
+"""Tests für das Chunking des Hugging Face Skripts (chunk_text, translate_texts)."""
+import importlib
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "automatic_translate_with_huggingfaces"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+hf = importlib.import_module("translate_with_huggingface")
+fake_models = importlib.import_module("fake_models")
+
+TEXT = "Erster Satz hier. Zweiter Satz folgt.\nDritter Satz  steht da.\n\tVierter Satz."
+
+
+class UpperTranslator(fake_models.FakeTranslator):
+    """Gibt die Chunks in Großbuchstaben zurück und merkt sich die Eingaben."""
+
+    def __init__(self):
+        super().__init__({})
+        self.inputs = []
+
+    def __call__(self, texts, max_length=None, batch_size=None, **kwargs):
+        self.inputs.extend(texts)
+        return [{"translation_text": text.upper()} for text in texts]
+
+
+def _install(monkeypatch, max_chunk_length):
+    translator = UpperTranslator()
+    monkeypatch.setattr(hf, "TRANSLATORS", hf.ModelCache(lambda lang: translator))
+    monkeypatch.setattr(hf, "SPACY_NLP_MODEL", False)
+    monkeypatch.setitem(hf.CONFIG, "max_chunk_length", max_chunk_length)
+    monkeypatch.setitem(hf.CONFIG, "batch_size", 2)
+    return translator
+
+
+def test_chunk_text_reports_the_original_separators():
+    chunks = hf.chunk_text(TEXT, 5, fake_models.FakeTokenizer())
+    assert [separator for _, _, separator in chunks] == [" ", "\n", "\n\t", ""]
+
+
+def test_translate_texts_keeps_separators_between_chunks(monkeypatch):
+    translator = _install(monkeypatch, 5)
+    assert hf.translate_texts([TEXT], "de", "en") == [TEXT.upper()]
+    assert len(translator.inputs) == 4
+
+
+def test_sentences_within_one_chunk_are_joined_for_the_model(monkeypatch):
+    translator = _install(monkeypatch, 100)
+    assert hf.translate_texts([TEXT], "de", "en") == ["ERSTER SATZ HIER. ZWEITER SATZ FOLGT. DRITTER SATZ  STEHT DA. VIERTER SATZ."]
+    assert len(translator.inputs) == 1
@@ -0,0 +1,73 @@
+"""Tests für translation_common/manifest.py."""
+import json
+
+from translation_common import manifest as translation_manifest
+
+
+def make_entry(source="a.md", lang="en", model="argos:de-en@1.9", config="c1", digest="d1"):
+    return translation_manifest.make_entry(source, lang, model, config, digest)
+
+
+def test_up_to_date_only_with_matching_entry_and_output(tmp_path):
+    manifest = translation_manifest.load_manifest(tmp_path / "missing.json")
+    output = tmp_path / "en" / "a.md"
+    entry = make_entry()
+    assert not translation_manifest.is_up_to_date(manifest, entry, output)
+    translation_manifest.record(manifest, entry)
+    assert not translation_manifest.is_up_to_date(manifest, entry, output) # Ausgabe fehlt
+    output.parent.mkdir()
+    output.write_text("Text", encoding="utf-8")
+    assert translation_manifest.is_up_to_date(manifest, entry, output)
+    for changed in (make_entry(digest="d2"), make_entry(model="argos:de-en@2.0"), make_entry(config="c2")):
+        assert not translation_manifest.is_up_to_date(manifest, changed, output)
+
+
+def test_config_digest_depends_on_relevant_keys_only():
+    config = {"src_language": "de", "glossary": {"protect": ["Checkmk"]}, "batch_size": 8}
+    keys = ("src_language", "glossary")
+    digest = translation_manifest.config_digest(config, keys, 1)
+    assert translation_manifest.config_digest(dict(config, batch_size=32), keys, 1) == digest
+    assert translation_manifest.config_digest(dict(config, glossary=None), keys, 1) != digest
+    assert translation_manifest.config_digest(config, keys, 2) != digest
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "DEV" / translation_manifest.DEFAULT_MANIFEST_NAME
+    manifest = translation_manifest.load_manifest(path)
+    translation_manifest.record(manifest, make_entry())
+    translation_manifest.save_manifest(path, manifest)
+    assert translation_manifest.load_manifest(path) == manifest
+
+
+def test_unreadable_or_foreign_manifest_starts_empty(tmp_path, capsys):
+    path = tmp_path / "manifest.json"
+    path.write_text("{kein json", encoding="utf-8")
+    assert translation_manifest.load_manifest(path)["entries"] == {}
+    path.write_text(json.dumps({"version": 99, "entries": {"en/a.md": {}}}), encoding="utf-8")
+    assert translation_manifest.load_manifest(path)["entries"] == {}
+    assert capsys.readouterr().err.count("WARNUNG") == 2
+
+
+def test_manifest_path_is_configurable(tmp_path):
+    assert translation_manifest.manifest_path({}, tmp_path) == tmp_path / ".translation-manifest.json"
+    assert translation_manifest.manifest_path({"manifest_file": "x.json"}, tmp_path).name == "x.json"
+
+
+def test_prune_removes_outputs_of_deleted_sources(tmp_path):
+    src_dir, output_dir = tmp_path / "DE", tmp_path / "DEV"
+    src_dir.mkdir()
+    (src_dir / "bleibt.md").write_text("Text", encoding="utf-8")
+    (output_dir / "en").mkdir(parents=True)
+    for name in ("bleibt.md", "geloescht.md", "fremd.md"):
+        (output_dir / "en" / name).write_text("Text", encoding="utf-8")
+    manifest = translation_manifest.load_manifest(tmp_path / "manifest.json")
+    translation_manifest.record(manifest, make_entry(source="bleibt.md"))
+    translation_manifest.record(manifest, make_entry(source="geloescht.md"))
+
+    removed = translation_manifest.prune_deleted_sources(manifest, src_dir, output_dir)
+
+    assert removed == ["en/geloescht.md"]
+    assert list(manifest["entries"]) == ["en/bleibt.md"]
+    assert not (output_dir / "en" / "geloescht.md").exists()
+    assert (output_dir / "en" / "bleibt.md").exists()
+    assert (output_dir / "en" / "fremd.md").exists() # Nicht im Manifest, wird nicht angefasst
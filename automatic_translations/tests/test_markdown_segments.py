@@ -0,0 +1,81 @@
+"""Tests für translation_common/markdown_segments.py."""
+from pathlib import Path
+
+import pytest
+
+from translation_common.markdown_segments import (Segment, has_prose, mask_inline, render_markdown,
+                                                  segment_markdown, segments_of)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DOCUMENT = """# Titel
+
+Text mit `code` und [Link](https://example.com) hier.  
+Zweite Zeile nach hartem Umbruch.
+
+```bash
+echo "nicht übersetzen"
+```
+
+| Spalte | Wert |
+|--------|------|
+| a      | 1    |
+
+- Punkt *eins*
+> Zitat
+"""
+
+
+def identity(parts):
+    return [segment.text for segment in segments_of(parts)]
+
+
+@pytest.mark.parametrize("text", [DOCUMENT, "", "\n\n", "Nur ein Satz ohne Zeilenende", "Zeile\r\nmit CRLF\r\n"])
+def test_round_trip_without_translation(text):
+    parts = segment_markdown(text)
+    assert render_markdown(parts, identity(parts)) == text
+
+
+@pytest.mark.parametrize("path", sorted((REPO_ROOT / "DE").glob("*.md")), ids=lambda path: path.name)
+def test_round_trip_of_source_documents(path):
+    text = path.read_text(encoding="utf-8")
+    parts = segment_markdown(text)
+    assert render_markdown(parts, identity(parts)) == text
+
+
+def test_code_and_tables_are_not_segments():
+    texts = [segment.text for segment in segments_of(segment_markdown(DOCUMENT))]
+    assert not any("echo" in text or "Spalte" in text for text in texts)
+    assert "Titel" in texts
+
+
+def test_hard_break_stays_inside_one_segment():
+    parts = segment_markdown("Erste Zeile  \nzweite Zeile\n")
+    segments = segments_of(parts)
+    assert [segment.text for segment in segments] == ["Erste Zeile  \nzweite Zeile"]
+    translated = render_markdown(parts, ["First line  \nsecond line"])
+    assert translated == "First line  \nsecond line\n"
+
+
+def test_inline_code_and_link_targets_are_masked():
+    masked, placeholders = mask_inline("Siehe `host_group` und [Doku](https://example.com).")
+    assert "host_group" not in masked and "example.com" not in masked
+    assert placeholders == ["`host_group`", "](https://example.com)"]
+
+
+def test_restore_puts_placeholders_back_in_translated_order():
+    segment = Segment("§0§ vor §1§", ["`a`", "`b`"])
+    assert segment.restore("§1§ before §0§") == "`b` before `a`"
+    assert segment.source() == "`a` vor `b`"
+
+
+def test_restore_appends_lost_placeholders(capsys):
+    segment = Segment("Text §0§", ["`code`"])
+    assert segment.restore("Text") == "Text `code`"
+    assert "Platzhalter" in capsys.readouterr().err
+
+
+def test_has_prose_ignores_placeholders_and_digits():
+    assert not has_prose("§0§ §1§")
+    assert not has_prose("§0§ 42")
+    assert has_prose("§0§ Text")
@@ -0,0 +1,55 @@
+"""Tests für translation_common/model_cache.py."""
+from translation_common import metrics
+from translation_common.model_cache import ModelCache
+
+
+def _recording_loader(loaded):
+    def loader(key):
+        loaded.append(key)
+        return f"modell-{key}"
+    return loader
+
+
+def test_models_are_loaded_on_first_get_only():
+    loaded = []
+    cache = ModelCache(_recording_loader(loaded))
+    assert loaded == []
+    assert "en" not in cache
+
+    assert cache.get("en") == "modell-en"
+    assert cache.get("en") == "modell-en"
+    assert loaded == ["en"]
+
+
+def test_least_recently_used_model_is_evicted():
+    loaded = []
+    cache = ModelCache(_recording_loader(loaded), max_size=2)
+    cache.get("en")
+    cache.get("fr")
+    cache.get("en")
+    cache.get("es")
+    assert cache.keys() == ["en", "es"]
+
+
+def test_failed_load_is_not_retried():
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        return None
+
+    cache = ModelCache(loader)
+    assert cache.get("en", "fallback") == "fallback"
+    assert cache.get("en") is None
+    assert calls == ["en"]
+    assert cache.failed("en")
+
+
+def test_loads_and_evictions_are_counted_in_metrics():
+    metrics.METRICS.drain()
+    cache = ModelCache(_recording_loader([]), max_size=1)
+    cache.get("en")
+    cache.get("fr")
+    counters = metrics.METRICS.drain()["counters"]
+    assert counters["models_loaded"] == 2
+    assert counters["models_evicted"] == 1
@@ -0,0 +1,118 @@
+"""Tests für translation_common/model_store.py und die Paketbereitstellung des Argos-Skripts."""
+import importlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from translation_common.model_store import ModelStore
+
+ARGOS_DIR = Path(__file__).resolve().parent.parent / "automatic_translate_with_argos"
+sys.path.insert(0, str(ARGOS_DIR))
+argos = importlib.import_module("translate_with_argos")
+
+
+def stage(store: ModelStore, files: dict) -> Path:
+    staging = store.staging()
+    for relative, content in files.items():
+        (staging / relative).parent.mkdir(parents=True, exist_ok=True)
+        (staging / relative).write_text(content, encoding="utf-8")
+    return staging
+
+
+def argos_package(from_code: str, to_code: str, version: str = "1.0") -> dict:
+    metadata = {"from_code": from_code, "to_code": to_code, "package_version": version}
+    return {f"translate-{from_code}_{to_code}/metadata.json": json.dumps(metadata),
+            f"translate-{from_code}_{to_code}/model.bin": f"gewichte {from_code}-{to_code} {version}"}
+
+
+def test_repeated_add_stores_identical_content_once(tmp_path):
+    store = ModelStore(tmp_path / "store", 1 << 20)
+    first = store.add("hf:modell", "a", stage(store, {"model.bin": "gewichte", "config.json": "{}"}))
+    second_staging = stage(store, {"config.json": "{}", "model.bin": "gewichte"})
+    second = store.add("hf:modell", "a", second_staging)
+
+    assert first == second
+    assert not second_staging.exists()
+    assert [path.name for path in (tmp_path / "store" / "objects").iterdir()] == [first.name]
+    assert store.resolve("hf:modell", "a") == first
+    assert store.total_bytes() == len("gewichte") + len("{}")
+
+
+def test_new_content_replaces_the_same_version(tmp_path):
+    store = ModelStore(tmp_path / "store", 1 << 20)
+    old = store.add("hf:modell", "a", stage(store, {"model.bin": "alt"}))
+    new = store.add("hf:modell", "a", stage(store, {"model.bin": "neu"}))
+    assert not old.exists()
+    assert store.resolve("hf:modell", "a") == new
+
+
+def test_corrupted_blob_is_rejected_and_removed(tmp_path, capsys):
+    store = ModelStore(tmp_path / "store", 1 << 20)
+    object_dir = store.add("hf:modell", "a", stage(store, {"model.bin": "gewichte"}))
+    blob = object_dir / "model.bin"
+    blob.write_text("GEWICHTE", encoding="utf-8") # Gleiche Größe, anderer Inhalt
+    stat = blob.stat()
+    os.utime(blob, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.resolve("hf:modell") is None
+    assert not object_dir.exists()
+    assert store.version("hf:modell") is None
+    assert "beschädigt" in capsys.readouterr().err
+
+
+def test_index_survives_reopening(tmp_path):
+    store = ModelStore(tmp_path / "store", 1 << 20)
+    object_dir = store.add("hf:modell", "a", stage(store, {"model.bin": "gewichte"}))
+    store.close()
+    reopened = ModelStore(tmp_path / "store", 1 << 20)
+    assert reopened.version("hf:modell") == "a"
+    assert reopened.resolve("hf:modell") == object_dir
+
+
+def test_least_recently_used_versions_are_evicted(tmp_path):
+    store = ModelStore(tmp_path / "store", 20)
+    old = store.add("hf:alt", "a", stage(store, {"model.bin": "x" * 15}))
+    store.used.clear() # Wie in einem späteren Lauf
+    store.add("hf:neu", "a", stage(store, {"model.bin": "y" * 15}))
+    store.evict()
+    assert not old.exists()
+    assert store.version("hf:alt") is None
+    assert store.version("hf:neu") == "a"
+
+
+@pytest.fixture
+def packages_dir(tmp_path, monkeypatch):
+    path = tmp_path / "argos-packages"
+    monkeypatch.setenv("ARGOS_PACKAGES_DIR", str(path))
+    monkeypatch.setattr(argos, "_INSTALLED_PACKAGES", None)
+    return path
+
+
+def test_packages_are_installed_from_the_store_offline(tmp_path, packages_dir, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("Offline darf nichts heruntergeladen werden")
+
+    monkeypatch.setattr(argos, "download", no_network)
+    store = ModelStore(tmp_path / "store", 1 << 20)
+    for from_code, to_code in (("de", "en"), ("en", "fr")):
+        store.add(f"argos:{from_code}-{to_code}", "1.0", stage(store, argos_package(from_code, to_code)))
+
+    argos.provide_packages(store, {"model_store": {"offline": True}}, "de", ["en", "fr"])
+
+    assert argos.installed_packages() == {("de", "en"): "1.0", ("en", "fr"): "1.0"}
+    assert (packages_dir / "translate-de_en").resolve() == store.resolve("argos:de-en") / "translate-de_en"
+
+
+def test_install_from_store_replaces_other_versions(tmp_path, packages_dir):
+    store = ModelStore(tmp_path / "store", 1 << 20)
+    old = store.add("argos:de-en", "1.0", stage(store, argos_package("de", "en", "1.0"))) / "translate-de_en"
+    argos._install_from_store(old, "de", "en")
+    new = store.add("argos:de-en", "2.0", stage(store, argos_package("de", "en", "2.0"))) / "translate-de_en"
+    argos._install_from_store(new, "de", "en")
+
+    installed = list(packages_dir.iterdir())
+    assert len(installed) == 1
+    assert installed[0].resolve() == new.resolve()
@@ -0,0 +1,17 @@
+"""Tests für translation_common/parallel.py."""
+import os
+
+from translation_common.parallel import THREAD_ENV_VARS, create_pool, limit_threads
+
+
+def _thread_env():
+    return {name: os.environ.get(name) for name in THREAD_ENV_VARS + ("ARGOS_INTER_THREADS",)}
+
+
+def test_create_pool_leaves_parent_environment_unchanged():
+    before = _thread_env()
+    with create_pool(2, limit_threads, (1,)) as pool:
+        worker_env = pool.submit(_thread_env).result()
+    assert _thread_env() == before
+    assert worker_env["OMP_NUM_THREADS"] == "1"
+    assert worker_env["ARGOS_INTER_THREADS"] == "1"
@@ -0,0 +1,40 @@
+"""Tests für translation_common/segment_plan.py."""
+from translation_common.segment_plan import SegmentPlan, plan_windows
+from translation_common.translation_memory import translate_segments
+
+FILES = {
+    "a.md": ["Voraussetzungen", "Erster Text nur in a."],
+    "b.md": ["Zweiter Text nur in b.", "Voraussetzungen"],
+}
+
+
+def _translate_window(plan, calls):
+    """Übersetzt die geplanten Segmente wie translate_plan() in einem Aufruf pro Sprachgruppe."""
+    for langs, segments in plan.groups().items():
+        for lang in langs:
+            calls.append(list(segments))
+            plan.record(segments, [segment.upper() for segment in segments], "de", lang, "modell")
+    plan.seal()
+
+
+def test_identical_segments_are_translated_once_and_filled_into_both_files():
+    plan = SegmentPlan()
+    calls = []
+    outputs = {}
+    for window in plan_windows(plan, sorted(FILES), lambda name: (FILES[name], ["en"])):
+        _translate_window(plan, calls)
+        for name in window:
+            outputs[name] = translate_segments(FILES[name], "de", "en", "modell",
+                                               lambda texts: calls.append(texts) or texts, memory=plan)
+
+    assert calls == [["Voraussetzungen", "Erster Text nur in a.", "Zweiter Text nur in b."]]
+    assert outputs["a.md"] == ["VORAUSSETZUNGEN", "ERSTER TEXT NUR IN A."]
+    assert outputs["b.md"] == ["ZWEITER TEXT NUR IN B.", "VORAUSSETZUNGEN"]
+    assert (plan.occurrences, plan.unique, plan.hits) == (4, 3, 4)
+
+
+def test_windows_are_bounded_by_max_segments():
+    plan = SegmentPlan(max_segments=2)
+    windows = list(plan_windows(plan, sorted(FILES), lambda name: (FILES[name], ["en"])))
+    assert windows == [["a.md"], ["b.md"]]
+    assert len(plan) == 0
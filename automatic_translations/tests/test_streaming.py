@@ -0,0 +1,90 @@
+"""Tests für translation_common/streaming.py und translation_common/atomic_io.py."""
+from pathlib import Path
+
+import pytest
+
+from translation_common.atomic_io import AtomicTextWriter, write_text_atomic
+from translation_common.markdown_segments import iter_parts, render_markdown, segments_of
+from translation_common.streaming import StrippedWriter, iter_windows, read_front_matter
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+SECTION = """## Abschnitt
+
+Ein Absatz mit `code` und **Betonung**.
+Zweite Zeile desselben Absatzes.
+
+```yaml
+key: wert
+```
+
+- Punkt eins
+- Punkt zwei
+
+"""
+
+
+def stream_copy(source: Path, target: Path, max_segments: int) -> int:
+    """Liest `source` fensterweise und schreibt es unübersetzt atomar nach `target`; gibt die Fensterzahl zurück."""
+    windows = 0
+    with open(source, "r", encoding="utf-8", newline="") as f:
+        _, body, _ = read_front_matter(f, source)
+        with AtomicTextWriter(target) as writer:
+            output = StrippedWriter(writer)
+            for window in iter_windows(iter_parts(body), max_segments):
+                windows += 1
+                output.write(render_markdown(window, [segment.text for segment in segments_of(window)]))
+            output.close()
+    return windows
+
+
+def test_streamed_round_trip_is_byte_identical(tmp_path):
+    source = tmp_path / "gross.md"
+    source.write_text("# Titel\n\n" + SECTION * 50, encoding="utf-8")
+    target = tmp_path / "kopie.md"
+    assert stream_copy(source, target, max_segments=4) > 1
+    assert target.read_bytes() == source.read_bytes()
+
+
+@pytest.mark.parametrize("path", sorted((REPO_ROOT / "DE").glob("*.md")), ids=lambda path: path.name)
+def test_streamed_round_trip_of_source_documents(path, tmp_path):
+    target = tmp_path / path.name
+    stream_copy(path, target, max_segments=2)
+    assert target.read_bytes() == path.read_bytes()
+
+
+def test_read_front_matter_leaves_the_body_lines(tmp_path):
+    front_matter, body, found = read_front_matter(iter(["---\n", "title: Test\n", "---\n", "Text\n"]))
+    assert found
+    assert front_matter == {"title": "Test"}
+    assert list(body) == ["Text\n"]
+
+
+def test_interrupted_write_keeps_the_old_file(tmp_path):
+    target = tmp_path / "ausgabe.md"
+    target.write_text("alter Inhalt\n", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with AtomicTextWriter(target) as writer:
+            writer.write("halb geschrieben")
+            raise RuntimeError("Abbruch")
+    assert target.read_text(encoding="utf-8") == "alter Inhalt\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["ausgabe.md"]
+
+
+def test_discarded_write_leaves_no_target(tmp_path):
+    target = tmp_path / "neu" / "ausgabe.md"
+    writer = AtomicTextWriter(target)
+    writer.write("Text")
+    writer.discard()
+    assert not target.exists()
+    assert list(target.parent.iterdir()) == []
+
+
+def test_commit_replaces_the_file_and_keeps_its_mode(tmp_path):
+    target = tmp_path / "ausgabe.md"
+    target.write_text("alt", encoding="utf-8")
+    target.chmod(0o640)
+    write_text_atomic(target, "neu")
+    assert target.read_text(encoding="utf-8") == "neu"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert [path.name for path in tmp_path.iterdir()] == ["ausgabe.md"]
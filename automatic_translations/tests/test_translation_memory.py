@@ -0,0 +1,102 @@
+"""Tests für translation_common/translation_memory.py."""
+import pytest
+
+from translation_common.translation_memory import (TranslationMemory, normalize_segment,
+                                                   open_translation_memory, translate_segments)
+
+
+@pytest.fixture
+def memory(tmp_path):
+    tm = TranslationMemory(tmp_path / "tm.sqlite", 1024 * 1024)
+    yield tm
+    tm.close()
+
+
+def test_normalize_strips_edges_and_line_ends():
+    assert normalize_segment("  Ein Satz.\r\nZweite Zeile \n") == "Ein Satz.\nZweite Zeile"
+
+
+def test_normalize_keeps_hard_breaks():
+    assert normalize_segment("Zeile eins   \nZeile zwei") == "Zeile eins  \nZeile zwei"
+    assert normalize_segment("Zeile eins  \nZeile zwei") != normalize_segment("Zeile eins\nZeile zwei")
+
+
+def test_lookup_after_store_uses_normalized_key(memory):
+    assert memory.lookup("Hallo Welt", "de", "en", "m") is None
+    memory.store("Hallo Welt", "de", "en", "m", "Hello world")
+    memory.flush()
+    assert memory.lookup("  Hallo Welt \n", "de", "en", "m") == "Hello world"
+    assert memory.lookup("Hallo Welt", "de", "fr", "m") is None
+    assert memory.lookup("Hallo Welt", "de", "en", "anderes-modell") is None
+    assert (memory.hits, memory.misses) == (1, 3)
+
+
+def test_entries_survive_reopening(tmp_path):
+    tm = TranslationMemory(tmp_path / "tm.sqlite", 1024 * 1024)
+    tm.store("Hallo", "de", "en", "m", "Hello")
+    tm.close()
+    tm = TranslationMemory(tmp_path / "tm.sqlite", 1024 * 1024)
+    assert tm.lookup("Hallo", "de", "en", "m") == "Hello"
+    tm.close()
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    tm = TranslationMemory(tmp_path / "tm.sqlite", 30)
+    tm.store("alt", "de", "en", "m", "x" * 10)
+    tm.flush()
+    tm.store("neu", "de", "en", "m", "y" * 10)
+    tm.flush()
+    tm.lookup("alt", "de", "en", "m") # "alt" wird dadurch zuletzt benutzt
+    tm.flush()
+    tm.store("neuer", "de", "en", "m", "z" * 10)
+    tm.flush()
+    tm.evict()
+    assert tm.evicted == 1
+    assert tm.lookup("neu", "de", "en", "m") is None
+    assert tm.lookup("alt", "de", "en", "m") == "x" * 10
+    assert tm.total_bytes() <= 30
+    tm.close()
+
+
+def test_summary_after_close_reports_size_and_evictions(tmp_path):
+    tm = TranslationMemory(tmp_path / "tm.sqlite", 20)
+    tm.store("eins", "de", "en", "m", "one" * 5)
+    tm.store("zwei", "de", "en", "m", "two" * 5)
+    tm.close()
+    summary = tm.summary() # Nach close(), ohne offene Verbindung
+    assert "1 Einträge verdrängt" in summary
+    assert summary.count("0.00 MB") == 2 # Belegt und Budget mit zwei Nachkommastellen
+
+
+def test_translate_segments_only_sends_misses(memory):
+    memory.store("Bekannt", "de", "en", "m", "Known")
+    memory.flush()
+    sent = []
+
+    def translate(batch):
+        sent.extend(batch)
+        return [text.upper() for text in batch]
+
+    result = translate_segments(["Bekannt", " Neu \n", "§0§"], "de", "en", "m", translate, memory)
+    assert sent == ["Neu"]
+    assert result == ["Known", " NEU \n", "§0§"]
+    assert memory.lookup("Neu", "de", "en", "m") == "NEU"
+
+
+def test_translate_segments_sends_hard_breaks_unchanged(memory):
+    sent = []
+
+    def translate(batch):
+        sent.extend(batch)
+        return batch
+
+    segment = "Erste Zeile  \nZweite Zeile"
+    assert translate_segments([segment], "de", "en", "m", translate, memory) == [segment]
+    assert sent == [segment]
+
+
+def test_open_translation_memory_can_be_disabled(tmp_path):
+    assert open_translation_memory({"translation_memory": {"enabled": False}}) is None
+    tm = open_translation_memory({"translation_memory": {"path": str(tmp_path / "tm.sqlite")}})
+    assert isinstance(tm, TranslationMemory)
+    tm.close()
@@ -0,0 +1,6 @@
+"""
+Gemeinsame Bausteine für die Übersetzungsskripte (Argos und Hugging Face).
+
+Das Paket wird zusammen mit den Skripten nach `.github/scripts/` kopiert,
+die Skripte finden es dort oder eine Ebene oberhalb ihres eigenen Ordners.
+"""
@@ -0,0 +1,73 @@
+"""
+Atomares Schreiben von Ausgabedateien.
+
+Es wird zunächst eine temporäre Datei im Zielordner geschrieben und diese
+anschließend per `os.replace` umbenannt. Leser sehen dadurch nie eine halb
+geschriebene Datei, auch wenn mehrere Prozesse parallel schreiben oder ein
+Lauf abgebrochen wird.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+
+class AtomicTextWriter:
+    """
+    Schreibt eine Textdatei stückweise in eine temporäre Datei im Zielordner.
+    `commit()` benennt sie in den Zielpfad um, `discard()` verwirft sie. Als
+    Kontextmanager wird bei normalem Ende übernommen, bei einer Ausnahme
+    verworfen.
+    """
+
+    def __init__(self, path, encoding: str = "utf-8"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # mkstemp legt die Datei mit 0600 an; Rechte der bisherigen Datei übernehmen
+        self._mode = self.path.stat().st_mode & 0o777 if self.path.exists() else 0o644
+        fd, self._tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent))
+        self._file = os.fdopen(fd, "w", encoding=encoding, newline="")
+        self.closed = False
+
+    def write(self, text: str):
+        self._file.write(text)
+
+    def commit(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._file.close()
+            os.chmod(self._tmp_name, self._mode)
+            os.replace(self._tmp_name, self.path)
+        except BaseException:
+            self._remove_tmp()
+            raise
+
+    def discard(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._file.close()
+        self._remove_tmp()
+
+    def _remove_tmp(self):
+        try:
+            os.unlink(self._tmp_name)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+def write_text_atomic(path, text: str, encoding: str = "utf-8"):
+    """Schreibt `text` atomar nach `path` (legt fehlende Ordner an)."""
+    with AtomicTextWriter(path, encoding) as f:
+        f.write(text)
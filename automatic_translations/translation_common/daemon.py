@@ -0,0 +1,331 @@
+"""
+Übersetzungsdienst für Editoren und pre-commit Hooks.
+
+`serve()` hält die Modelle eines Skripts geladen und nimmt über einen
+Unix-Socket (oder `host:port`, nur lokal) HTTP-Anfragen an:
+
+- `POST /translate` mit `{"lang": "en", "markdown": "..."}` liefert
+  `{"markdown": "..."}`, die Übersetzung so, wie das Skript sie schreiben
+  würde; mit `{"lang": "en", "segments": [...]}` werden einzelne
+  Textsegmente übersetzt (`{"segments": [...]}`).
+- `GET /health` liefert Zustand und Zähler des Dienstes.
+
+Gleichzeitige Anfragen werden pro Zielsprache kurz gesammelt
+(`batch_window_ms`) und gemeinsam als ein Batch übersetzt (Micro-Batching).
+Die Inferenz läuft in genau einem Thread, der auch die Translation Memory
+öffnet; das Zerlegen und Zusammensetzen der Dokumente in einem kleinen
+Thread-Pool. `request()` ist der passende Client; er liefert None, wenn
+kein Dienst läuft, damit der Aufrufer selbst übersetzen kann.
+"""
+import asyncio
+import http.client
+import ipaddress
+import json
+import os
+import re
+import signal
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_BATCH_WINDOW_MS = 10
+DEFAULT_MAX_BATCH_SEGMENTS = 256
+DEFAULT_RENDER_THREADS = 4
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+_TCP_ADDRESS = re.compile(r"(?P<host>[\w.\-]*):(?P<port>\d+)")
+
+_STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class DaemonError(Exception):
+    """Fehler einer Anfrage mit HTTP-Status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def daemon_settings(config: dict, engine: str) -> dict:
+    """Einstellungen aus `daemon` in der Konfiguration, mit Standardwerten."""
+    settings = {
+        "address": f".cache/translation-daemon-{engine}.sock",
+        "batch_window_ms": DEFAULT_BATCH_WINDOW_MS,
+        "max_batch_segments": DEFAULT_MAX_BATCH_SEGMENTS,
+    }
+    settings.update(config.get("daemon") or {})
+    return settings
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _tcp_address(address: str):
+    """
+    (host, port) für "host:port", sonst None (Pfad eines Unix-Sockets).
+    Der Dienst hat keine Authentifizierung; andere Hosts als localhost bzw.
+    Loopback-Adressen lösen ValueError aus.
+    """
+    match = _TCP_ADDRESS.fullmatch(address)
+    if not match:
+        return None
+    host = match.group("host") or "127.0.0.1"
+    if not _is_loopback(host):
+        raise ValueError(f"{address}: Der Übersetzungsdienst ist nur lokal erreichbar (localhost, 127.0.0.1).")
+    return host, int(match.group("port"))
+
+
+class MicroBatcher:
+    """
+    Sammelt Segmente gleichzeitiger Anfragen pro Zielsprache und übersetzt
+    sie gemeinsam mit `translate(texts, lang)` im Inferenz-Thread.
+    """
+
+    def __init__(self, translate, executor, window_ms: float, max_segments: int):
+        self.translate = translate
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_segments = max_segments
+        self.requests = 0
+        self.batches = 0
+        self.segments = 0
+        self._pending = {}
+        self._timers = {}
+
+    async def submit(self, texts: list, lang: str) -> list:
+        """Übersetzt `texts` nach `lang`, gemeinsam mit anderen wartenden Anfragen."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(lang, [])
+        pending.append((texts, future))
+        if sum(len(item[0]) for item in pending) >= self.max_segments:
+            self._start(lang)
+        elif lang not in self._timers:
+            self._timers[lang] = loop.call_later(self.window, self._start, lang)
+        return await future
+
+    def _start(self, lang: str):
+        timer = self._timers.pop(lang, None)
+        if timer is not None:
+            timer.cancel()
+        requests = self._pending.pop(lang, [])
+        if requests:
+            asyncio.ensure_future(self._flush(requests, lang))
+
+    async def _flush(self, requests: list, lang: str):
+        unique = list(dict.fromkeys(text for texts, _ in requests for text in texts))
+        self.requests += len(requests)
+        self.batches += 1
+        self.segments += len(unique)
+        try:
+            translations = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.translate, unique, lang)
+        except Exception as e:
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        translated = dict(zip(unique, translations))
+        for texts, future in requests:
+            if not future.done():
+                future.set_result([translated[text] for text in texts])
+
+
+class _Service:
+    """Zustand eines laufenden Dienstes und Behandlung der Anfragen."""
+
+    def __init__(self, engine: str, batcher: MicroBatcher, render, render_pool, config_digest: str, langs):
+        self.engine = engine
+        self.batcher = batcher
+        self.render = render
+        self.render_pool = render_pool
+        self.config_digest = config_digest
+        self.langs = list(langs)
+
+    def health(self) -> dict:
+        return {
+            "status": "ok", "engine": self.engine, "pid": os.getpid(), "langs": self.langs,
+            "config_digest": self.config_digest, "requests": self.batcher.requests,
+            "batches": self.batcher.batches, "segments": self.batcher.segments,
+        }
+
+    async def translate(self, payload: dict) -> dict:
+        lang = payload.get("lang")
+        if lang not in self.langs:
+            raise DaemonError(400, f"Unbekannte Zielsprache: {lang!r} (verfügbar: {', '.join(self.langs)})")
+        digest = payload.get("config_digest")
+        if digest and digest != self.config_digest:
+            raise DaemonError(409, "Der Dienst läuft mit einer anderen Konfiguration.")
+        if "segments" in payload:
+            segments = payload["segments"]
+            if not isinstance(segments, list) or not all(isinstance(text, str) for text in segments):
+                raise DaemonError(400, "'segments' muss eine Liste von Strings sein.")
+            return {"segments": await self.batcher.submit(segments, lang)}
+        markdown = payload.get("markdown")
+        if not isinstance(markdown, str):
+            raise DaemonError(400, "'markdown' oder 'segments' fehlt.")
+        loop = asyncio.get_running_loop()
+
+        def translate(texts: list) -> list:
+            # Aus dem Render-Thread: Segmente an den Batcher der Ereignisschleife
+            return asyncio.run_coroutine_threadsafe(self.batcher.submit(texts, lang), loop).result()
+
+        return {"markdown": await loop.run_in_executor(self.render_pool, self.render, markdown, lang, translate)}
+
+    async def handle(self, reader, writer):
+        status, body = 200, {}
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                raise DaemonError(400, "Ungültige Anfrage.")
+            method, path = request_line[0], request_line[1]
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_REQUEST_BYTES:
+                raise DaemonError(413, "Anfrage zu groß.")
+            data = await reader.readexactly(length) if length else b""
+            if method == "GET" and path == "/health":
+                body = self.health()
+            elif method == "POST" and path == "/translate":
+                try:
+                    payload = json.loads(data.decode("utf-8"))
+                except ValueError as e:
+                    raise DaemonError(400, f"Ungültiges JSON: {e}")
+                body = await self.translate(payload)
+            else:
+                raise DaemonError(404, f"Unbekannter Pfad: {method} {path}")
+        except DaemonError as e:
+            status, body = e.status, {"error": str(e)}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            print(f"FEHLER: Anfrage fehlgeschlagen: {e}", file=sys.stderr)
+            status, body = 500, {"error": str(e)}
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+
+def _socket_in_use(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+            return True
+        except OSError:
+            return False
+
+
+async def _serve(service: _Service, address: str):
+    tcp = _tcp_address(address)
+    if tcp is not None:
+        server = await asyncio.start_server(service.handle, tcp[0], tcp[1])
+    else:
+        path = Path(address)
+        if path.exists():
+            if _socket_in_use(path):
+                raise OSError(f"Unter {path} läuft bereits ein Dienst.")
+            path.unlink() # Übrig von einem abgebrochenen Dienst
+        path.parent.mkdir(parents=True, exist_ok=True)
+        server = await asyncio.start_unix_server(service.handle, str(path))
+        os.chmod(str(path), 0o600)
+    stop = asyncio.get_running_loop().create_future()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+    print(f"Übersetzungsdienst ({service.engine}) bereit unter {address} für {', '.join(service.langs)}.")
+    async with server:
+        await stop
+    if tcp is None:
+        Path(address).unlink()
+
+
+def serve(engine: str, address: str, langs, translate, render, config_digest: str, settings: dict,
+          initialize=None, shutdown=None):
+    """
+    Startet den Dienst und blockiert bis SIGINT/SIGTERM.
+    `translate(texts, lang)` übersetzt Segmente (im Inferenz-Thread, in dem
+    vorher `initialize()` läuft und zum Schluss `shutdown()`);
+    `render(markdown, lang, translate)` erzeugt ein übersetztes Dokument und
+    ruft dafür `translate(texts)` auf.
+    """
+    _tcp_address(address) # Nicht lokale Adressen abweisen, bevor Modelle geladen werden
+    inference = ThreadPoolExecutor(max_workers=1)
+    render_pool = ThreadPoolExecutor(max_workers=int(settings.get("render_threads", DEFAULT_RENDER_THREADS)))
+    try:
+        if initialize is not None:
+            inference.submit(initialize).result()
+        batcher = MicroBatcher(translate, inference, float(settings["batch_window_ms"]),
+                               int(settings["max_batch_segments"]))
+        service = _Service(engine, batcher, render, render_pool, config_digest, langs)
+        asyncio.run(_serve(service, address))
+        print(f"Übersetzungsdienst beendet: {batcher.requests} Anfragen in {batcher.batches} Batches "
+              f"({batcher.segments} Segmente).")
+    finally:
+        render_pool.shutdown()
+        if shutdown is not None:
+            inference.submit(shutdown).result()
+        inference.shutdown()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def request(address: str, payload: dict, timeout: float = 600):
+    """
+    Schickt eine Übersetzungsanfrage an den Dienst. Gibt die Antwort zurück
+    oder None, wenn unter `address` kein Dienst erreichbar ist oder er nicht
+    (rechtzeitig, mit gültigem JSON) antwortet. Lehnt der Dienst die Anfrage
+    ab, wird DaemonError ausgelöst.
+    """
+    try:
+        tcp = _tcp_address(address)
+    except ValueError as e:
+        print(f"WARNUNG: {e}", file=sys.stderr)
+        return None
+    if tcp is None and not Path(address).exists():
+        return None
+    connection = (http.client.HTTPConnection(tcp[0], tcp[1], timeout=timeout) if tcp is not None
+                  else _UnixHTTPConnection(address, timeout))
+    try:
+        connection.request("POST", "/translate", body=json.dumps(payload).encode("utf-8"),
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        body = json.loads(response.read().decode("utf-8"))
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None # Kein Dienst gestartet
+    except (OSError, ValueError, http.client.HTTPException) as e:
+        print(f"WARNUNG: Übersetzungsdienst unter {address} antwortet nicht ({e}).", file=sys.stderr)
+        return None
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise DaemonError(response.status, body.get("error", ""))
+    return body
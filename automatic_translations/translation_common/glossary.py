@@ -0,0 +1,199 @@
+"""
+Glossar: geschützte Begriffe und feste Übersetzungen.
+
+Produktnamen (Checkmk, Ansible), Bezeichner (`host_group`), Modulnamen
+(`checkmk.general.*`) und Pfade sollen nie übersetzt werden; andere Begriffe
+sollen in jeder Zielsprache immer gleich übersetzt werden. Alle Einträge
+werden in einen Aho-Corasick-Automaten übersetzt, der einen Text in einem
+Durchlauf durchsucht: Der Aufwand hängt von der Textlänge ab, nicht von der
+Größe des Glossars.
+
+`Glossary.mask()` ersetzt Fundstellen in einem (bereits maskierten)
+Prosa-Segment durch weitere Platzhalter (`§n§`, siehe markdown_segments);
+beim Zusammensetzen wird das Original eingesetzt bzw. bei festen
+Übersetzungen der Begriff der Zielsprache. Konfiguration:
+
+    glossary:
+      ignore_case: false
+      protect:            # nie übersetzen; "*" am Ende erlaubt beliebige Fortsetzung
+        - Checkmk
+        - checkmk.general.*
+      terms:              # feste Übersetzung pro Zielsprache, nur für eigenständige Wörter
+        Hostgruppe: {en: host group, fr: groupe d'hôtes}
+"""
+from collections import deque
+
+from .markdown_segments import PLACEHOLDER
+
+# Zeichen, um die ein Eintrag mit "*" am Ende verlängert wird (Modul- und Pfadnamen)
+_CONTINUATION = frozenset("._-/")
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _fold(text: str) -> str:
+    """Kleinschreibung, die die Länge erhält (für Positionen im Original)."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+class GlossaryTerm(str):
+    """Originaltext einer Fundstelle mit festen Übersetzungen ({Sprache: Begriff})."""
+
+    def __new__(cls, text: str, translations: dict):
+        term = super().__new__(cls, text)
+        term.translations = translations
+        return term
+
+    def __reduce__(self):
+        return GlossaryTerm, (str(self), self.translations)
+
+
+class Glossary:
+    """Aho-Corasick-Automat über alle Glossareinträge."""
+
+    def __init__(self, protect=(), terms=None, ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.entries = 0
+        # Zustände: Übergänge, Fehlerlink, eigener Treffer (Länge, Übersetzungen,
+        # Fortsetzung erlaubt) und nächster Zustand mit Treffer auf der Fehlerkette
+        self._goto = [{}]
+        self._fail = [0]
+        self._match = [None]
+        self._output = [0]
+        for pattern in protect:
+            self._add(str(pattern), None)
+        for pattern, translations in (terms or {}).items():
+            self._add(str(pattern), {str(lang): str(term) for lang, term in (translations or {}).items()})
+        self._build()
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def _add(self, pattern: str, translations):
+        prefix = pattern.endswith("*")
+        pattern = pattern.rstrip("*")
+        if not pattern.strip():
+            return
+        if self.ignore_case:
+            pattern = _fold(pattern)
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._match.append(None)
+                self._output.append(0)
+            state = following
+        self._match[state] = (len(pattern), translations, prefix)
+        self.entries += 1
+
+    def _build(self):
+        """Fehlerlinks und Trefferketten in Breitensuche setzen."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                fail = self._fail[following]
+                self._output[following] = fail if self._match[fail] is not None else self._output[fail]
+                queue.append(following)
+
+    def find(self, text: str) -> list:
+        """
+        Liefert die Fundstellen als [(Start, Ende, Übersetzungen), ...]:
+        von links nach rechts, jeweils die längste, ohne Überlappung und nur
+        an Wortgrenzen.
+        """
+        if not self.entries or not text:
+            return []
+        haystack = _fold(text) if self.ignore_case else text
+        goto, fail, match, output = self._goto, self._fail, self._match, self._output
+        longest = {} # Start -> (Ende, Übersetzungen) des längsten Treffers
+        state = 0
+        for position, char in enumerate(haystack):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            candidate = state if match[state] is not None else output[state]
+            while candidate:
+                length, translations, prefix = match[candidate]
+                start, end = position + 1 - length, position + 1
+                candidate = output[candidate]
+                if not self._at_boundary(text, start, end, prefix, translations is not None):
+                    continue
+                if prefix:
+                    end = self._extend(text, start, end)
+                if end > longest.get(start, (0,))[0]:
+                    longest[start] = (end, translations)
+        found = []
+        last_end = 0
+        for start in sorted(longest):
+            if start >= last_end:
+                end, translations = longest[start]
+                found.append((start, end, translations))
+                last_end = end
+        return found
+
+    @staticmethod
+    def _extend(text: str, start: int, end: int) -> int:
+        """Ende eines Eintrags mit "*": bis zum Ende des Bezeichners oder Pfads."""
+        while end < len(text) and (_is_word_char(text[end]) or text[end] in _CONTINUATION):
+            end += 1
+        while end > start + 1 and text[end - 1] in _CONTINUATION:
+            end -= 1 # Satzzeichen am Ende gehört nicht dazu
+        return end
+
+    @staticmethod
+    def _at_boundary(text: str, start: int, end: int, prefix: bool, standalone: bool) -> bool:
+        """
+        Fundstellen beginnen und enden an Wortgrenzen. Feste Übersetzungen
+        (`standalone`) gelten nur für eigenständige Wörter, nicht als Teil
+        eines Bindestrich-Kompositums ("Hostgruppen-Daten"), da die
+        Übersetzung sonst mitten im deutschen Wort stünde.
+        """
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return False
+        if not prefix and end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+            return False
+        if standalone and "-" in (text[start - 1:start], text[end:end + 1]):
+            return False
+        return True
+
+    def mask(self, text: str, placeholders: list) -> str:
+        """
+        Ersetzt Fundstellen durch Platzhalter, deren Werte an `placeholders`
+        angehängt werden (Original bzw. `GlossaryTerm`).
+        """
+        matches = self.find(text)
+        if not matches:
+            return text
+        output = []
+        position = 0
+        for start, end, translations in matches:
+            output.append(text[position:start])
+            original = text[start:end]
+            placeholders.append(GlossaryTerm(original, translations) if translations else original)
+            output.append(PLACEHOLDER.format(len(placeholders) - 1))
+            position = end
+        output.append(text[position:])
+        return "".join(output)
+
+
+def load_glossary(config: dict):
+    """Erzeugt das Glossar aus `glossary` in der Konfiguration oder None, wenn keins konfiguriert ist."""
+    settings = config.get("glossary") or {}
+    glossary = Glossary(settings.get("protect") or (), settings.get("terms") or {},
+                        bool(settings.get("ignore_case", False)))
+    return glossary if len(glossary) else None
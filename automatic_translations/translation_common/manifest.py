@@ -0,0 +1,121 @@
+"""
+Manifest für inkrementelle Übersetzungen.
+
+Das Manifest (standardmäßig `DEV/.translation-manifest.json`) merkt sich für
+jede erzeugte Ausgabedatei, aus welcher Quelldatei, mit welchem Modell und
+welcher Konfiguration sie entstanden ist und welchen Inhalt (SHA-256) die
+Quelle zu diesem Zeitpunkt hatte. Stimmt alles noch überein, muss die Datei
+nicht erneut übersetzt werden.
+"""
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from .atomic_io import write_text_atomic
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_NAME = ".translation-manifest.json"
+
+
+def file_digest(path) -> str:
+    """Berechnet den SHA-256-Hash einer Datei, ohne sie komplett zu laden."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_digest(config: dict, keys, pipeline_version: int) -> str:
+    """
+    Hash über die Konfigurationswerte, die das Übersetzungsergebnis beeinflussen.
+    `pipeline_version` wird erhöht, wenn sich die Ausgabe des Skripts ändert.
+    """
+    relevant = {key: config.get(key) for key in sorted(keys)}
+    relevant["_pipeline_version"] = pipeline_version
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def manifest_path(config: dict, output_base_dir) -> Path:
+    """Liefert den Pfad des Manifests (konfigurierbar über `manifest_file`)."""
+    configured = config.get("manifest_file")
+    if configured:
+        return Path(configured)
+    return Path(output_base_dir) / DEFAULT_MANIFEST_NAME
+
+
+def load_manifest(path) -> dict:
+    """Lädt das Manifest; bei fehlender oder defekter Datei wird neu begonnen."""
+    path = Path(path)
+    if not path.exists():
+        return {"version": MANIFEST_VERSION, "entries": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"WARNUNG: Manifest {path} konnte nicht gelesen werden ({e}). Alle Dateien werden übersetzt.", file=sys.stderr)
+        return {"version": MANIFEST_VERSION, "entries": {}}
+    if data.get("version") != MANIFEST_VERSION:
+        print(f"WARNUNG: Manifest {path} hat eine unbekannte Version. Alle Dateien werden übersetzt.", file=sys.stderr)
+        return {"version": MANIFEST_VERSION, "entries": {}}
+    data.setdefault("entries", {})
+    return data
+
+
+def save_manifest(path, manifest: dict):
+    """Schreibt das Manifest atomar (temporäre Datei + Umbenennen)."""
+    write_text_atomic(path, json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False) + "\n")
+
+
+def make_entry(source_rel: str, lang: str, model_id: str, config_hash: str, source_digest: str) -> dict:
+    """Erzeugt einen Manifest-Eintrag für eine Ausgabedatei."""
+    return {
+        "source": source_rel,
+        "lang": lang,
+        "model": model_id,
+        "config": config_hash,
+        "digest": source_digest,
+    }
+
+
+def output_key(lang: str, source_rel: str) -> str:
+    """Schlüssel eines Eintrags: Pfad der Ausgabedatei relativ zum Ausgabeordner."""
+    return f"{lang}/{source_rel}"
+
+
+def is_up_to_date(manifest: dict, entry: dict, output_file_path) -> bool:
+    """Prüft, ob die Ausgabedatei existiert und zum gespeicherten Eintrag passt."""
+    stored = manifest["entries"].get(output_key(entry["lang"], entry["source"]))
+    return stored == entry and Path(output_file_path).exists()
+
+
+def record(manifest: dict, entry: dict):
+    """Speichert bzw. aktualisiert einen Eintrag nach erfolgreicher Übersetzung."""
+    manifest["entries"][output_key(entry["lang"], entry["source"])] = entry
+
+
+def prune_deleted_sources(manifest: dict, src_dir, output_base_dir) -> list:
+    """
+    Entfernt Ausgabedateien (und ihre Einträge), deren Quelldatei nicht mehr
+    existiert. Es werden nur Dateien gelöscht, die im Manifest stehen.
+    """
+    src_dir = Path(src_dir)
+    output_base_dir = Path(output_base_dir)
+    removed = []
+    for key, entry in sorted(manifest["entries"].items()):
+        if (src_dir / entry["source"]).exists():
+            continue
+        output_file_path = output_base_dir / key
+        try:
+            output_file_path.unlink()
+            print(f"  -> Entferne verwaiste Übersetzung: {output_file_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"WARNUNG: Konnte {output_file_path} nicht entfernen: {e}", file=sys.stderr)
+            continue
+        del manifest["entries"][key]
+        removed.append(key)
+    return removed
@@ -0,0 +1,281 @@
+"""
+Markdown-Segmentierung für die Übersetzung.
+
+Ein Dokument wird in eine Folge von Teilen zerlegt: unveränderliche Teile
+(Strings) und übersetzbare Prosa-Segmente (`Segment`). Codeblöcke, Tabellen,
+HTML-Blöcke, Trennlinien und Link-Definitionen bleiben als Strings stehen und
+erreichen nie das Modell. Innerhalb der Prosa werden Inline-Code, Link-Ziele,
+URLs und HTML-Tags durch Platzhalter (`§0§`, `§1§`, ...) ersetzt und nach der
+Übersetzung wiederhergestellt, ebenso die Begriffe eines Glossars (siehe
+glossary.py). Setzt man die Teile mit den unübersetzten
+Segmenten wieder zusammen, ergibt sich das Original Byte für Byte.
+
+Die Erkennung folgt den Blockregeln von CommonMark, soweit sie für die
+HowTos relevant sind; eine zusätzliche Abhängigkeit ist nicht nötig.
+"""
+import re
+import sys
+
+PLACEHOLDER = "§{}§"
+_PLACEHOLDER_PATTERN = re.compile(r"§\s*(\d+)\s*§")
+
+_FENCE_OPEN = re.compile(r"^[ \t]*(`{3,}|~{3,})")
+_HTML_BLOCK = re.compile(r"^ {0,3}<(?:!--|/?[A-Za-z][A-Za-z0-9-]*(?:[\s/>]|$))")
+_THEMATIC_BREAK = re.compile(r"^ {0,3}(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,}|=+[ \t]*)$")
+_TABLE_ROW = re.compile(r"^[ \t]*\|")
+_TABLE_DELIMITER = re.compile(r"^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_LINK_DEFINITION = re.compile(r"^ {0,3}\[[^\]]+\]:\s")
+_INDENTED_CODE = re.compile(r"^(?: {4}|\t)")
+_HEADING = re.compile(r"^( {0,3}#{1,6}[ \t]+)(.*?)([ \t]+#+)?[ \t]*$")
+_LIST_ITEM = re.compile(r"^([ \t]*(?:[-*+]|\d{1,9}[.)])[ \t]+(?:\[[ xX]\][ \t]+)?)(.*)$")
+_BLOCKQUOTE = re.compile(r"^([ \t]*(?:>[ \t]?)+)(.*)$")
+
+# Inline-Konstrukte, die nicht übersetzt werden dürfen (Reihenfolge = Priorität).
+_INLINE_PROTECTED = re.compile(
+    r"(?P<code>(`+).+?\2)"
+    r"|(?P<image>!\[[^\]]*\]\([^)]*\))"
+    r"|(?P<target>\]\([^)]*\)|\]\[[^\]]*\])"
+    r"|(?P<autolink><(?:https?://|mailto:)[^>\s]+>)"
+    r"|(?P<html></?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>|<!--.*?-->)"
+    r"|(?P<url>(?:https?://|www\.)[^\s<>()\[\]`]+[^\s<>()\[\]`.,;:!?\"'])"
+    r"|(?P<entity>&(?:[A-Za-z]+|#\d+);)"
+    r"|(?P<marker>§)"
+)
+_HAS_LETTER = re.compile(r"[^\W\d_]")
+
+
+class Segment:
+    """Ein übersetzbares Prosa-Segment mit maskierten Inline-Konstrukten."""
+
+    __slots__ = ("text", "placeholders")
+
+    def __init__(self, text: str, placeholders: list):
+        self.text = text
+        self.placeholders = placeholders
+
+    def source(self) -> str:
+        """Der ursprüngliche, unmaskierte Text des Segments."""
+        return self.restore(self.text)
+
+    def restore(self, translated: str, lang: str = None) -> str:
+        """
+        Setzt die Platzhalter in einer Übersetzung wieder ein. Glossarbegriffe
+        mit fester Übersetzung erscheinen in der Zielsprache `lang`.
+        """
+        if not self.placeholders:
+            return translated
+        seen = set()
+
+        def _value(index):
+            value = self.placeholders[index]
+            translations = getattr(value, "translations", None)
+            return translations.get(lang, value) if translations and lang else value
+
+        def _replace(match):
+            index = int(match.group(1))
+            if index >= len(self.placeholders):
+                return ""
+            seen.add(index)
+            return _value(index)
+
+        restored = _PLACEHOLDER_PATTERN.sub(_replace, translated)
+        missing = [_value(index) for index in range(len(self.placeholders)) if index not in seen]
+        if missing:
+            print(f"WARNUNG: {len(missing)} Platzhalter gingen bei der Übersetzung verloren und werden angehängt.",
+                  file=sys.stderr)
+            restored = restored.rstrip() + " " + " ".join(missing)
+        return restored
+
+
+def mask_inline(text: str):
+    """
+    Ersetzt geschützte Inline-Konstrukte durch Platzhalter.
+    Gibt den maskierten Text und die Liste der Originale zurück.
+    """
+    placeholders = []
+
+    def _replace(match):
+        placeholders.append(match.group(0))
+        return PLACEHOLDER.format(len(placeholders) - 1)
+
+    return _INLINE_PROTECTED.sub(_replace, text), placeholders
+
+
+def has_prose(masked: str) -> bool:
+    """Prüft, ob ein maskierter Text außerhalb der Platzhalter Buchstaben enthält."""
+    return bool(_HAS_LETTER.search(_PLACEHOLDER_PATTERN.sub("", masked)))
+
+
+def _prose(text: str, glossary=None):
+    """
+    Zerlegt eine Prosa-Einheit in führenden Leerraum, Segment und
+    abschließenden Leerraum. Ohne übersetzbaren Inhalt bleibt alles wörtlich.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return [text]
+    masked, placeholders = mask_inline(stripped)
+    if not has_prose(masked):
+        return [text]
+    if glossary is not None:
+        masked = glossary.mask(masked, placeholders)
+    start = text.index(stripped)
+    parts = []
+    if start:
+        parts.append(text[:start])
+    parts.append(Segment(masked, placeholders))
+    if start + len(stripped) < len(text):
+        parts.append(text[start + len(stripped):])
+    return parts
+
+
+def _split_newline(line: str):
+    body = line.rstrip("\r\n")
+    return body, line[len(body):]
+
+
+def _is_block_start(line: str) -> bool:
+    """Prüft, ob eine Zeile einen neuen Block beginnt (beendet einen Absatz)."""
+    body, _ = _split_newline(line)
+    if not body.strip():
+        return True
+    return bool(
+        _FENCE_OPEN.match(body) or _HTML_BLOCK.match(body) or _THEMATIC_BREAK.match(body)
+        or _TABLE_ROW.match(body) or _LINK_DEFINITION.match(body) or _HEADING.match(body)
+        or _LIST_ITEM.match(body) or _BLOCKQUOTE.match(body)
+    )
+
+
+def iter_parts(lines, glossary=None):
+    """
+    Zerlegt Markdown-Zeilen (mit Zeilenenden) in wörtliche Teile (str) und
+    übersetzbare Segmente (`Segment`). Arbeitet als Generator über einem
+    beliebigen Zeilen-Iterator; wörtliche Blöcke (Code, Tabellen, HTML)
+    werden zeilenweise weitergereicht und nie als Ganzes gehalten. Mit
+    `glossary` werden dessen Begriffe in den Segmenten maskiert.
+    """
+    lines = iter(lines)
+    pending = next(lines, None)
+    previous_blank = True
+    in_list = False
+
+    def _advance():
+        nonlocal pending
+        current, pending = pending, next(lines, None)
+        return current
+
+    while pending is not None:
+        line = _advance()
+        body, newline = _split_newline(line)
+
+        # Leerzeilen
+        if not body.strip():
+            yield line
+            previous_blank = True
+            continue
+
+        # Fenced Code: bis zum passenden schließenden Zaun wörtlich übernehmen
+        fence = _FENCE_OPEN.match(body)
+        if fence:
+            marker = fence.group(1)
+            closing = re.compile(r"^[ \t]*" + re.escape(marker[0]) + "{" + str(len(marker)) + r",}[ \t]*$")
+            yield line
+            while pending is not None:
+                block_line = _advance()
+                yield block_line
+                if closing.match(block_line.rstrip("\r\n")):
+                    break
+            previous_blank = False
+            continue
+
+        # Eingerückter Code (nur nach Leerzeile und außerhalb von Listen)
+        if previous_blank and not in_list and _INDENTED_CODE.match(body):
+            yield line
+            while pending is not None and (_INDENTED_CODE.match(pending) or not pending.strip()):
+                yield _advance()
+            previous_blank = False
+            continue
+
+        # HTML-Blöcke: bis zur nächsten Leerzeile wörtlich
+        if _HTML_BLOCK.match(body):
+            yield line
+            while pending is not None and pending.strip():
+                yield _advance()
+            previous_blank = False
+            continue
+
+        # Tabellen (mit oder ohne führendes "|")
+        if _TABLE_ROW.match(body) or (pending is not None and "|" in body and "|" in pending
+                                      and _TABLE_DELIMITER.match(pending)):
+            yield line
+            while pending is not None and pending.strip() and "|" in pending:
+                yield _advance()
+            previous_blank = False
+            continue
+
+        previous_blank = False
+
+        # Trennlinien, Setext-Unterstreichungen und Link-Definitionen
+        if _THEMATIC_BREAK.match(body) or _LINK_DEFINITION.match(body):
+            yield line
+            in_list = False
+            continue
+
+        heading = _HEADING.match(body)
+        if heading:
+            yield heading.group(1)
+            yield from _prose(heading.group(2), glossary)
+            yield body[heading.end(2):] + newline
+            in_list = False
+            continue
+
+        list_item = _LIST_ITEM.match(body)
+        if list_item:
+            yield list_item.group(1)
+            yield from _prose(list_item.group(2), glossary)
+            yield newline
+            in_list = True
+            continue
+
+        quote = _BLOCKQUOTE.match(body)
+        if quote:
+            yield quote.group(1)
+            yield from _prose(quote.group(2), glossary)
+            yield newline
+            continue
+
+        # Absatz: zusammenhängende Zeilen bis zum nächsten Blockanfang
+        if not line[:1].isspace():
+            in_list = False
+        block = [line]
+        while pending is not None and not _is_block_start(pending):
+            block.append(_advance())
+        paragraph, trailing_newline = _split_newline("".join(block))
+        yield from _prose(paragraph, glossary)
+        yield trailing_newline
+
+
+def segment_markdown(text: str, glossary=None) -> list:
+    """Zerlegt einen Markdown-Text vollständig in Teile (siehe `iter_parts`)."""
+    return list(iter_parts(text.splitlines(keepends=True), glossary))
+
+
+def segments_of(parts: list) -> list:
+    """Liefert alle übersetzbaren Segmente einer Teil-Liste in Dokumentreihenfolge."""
+    return [part for part in parts if isinstance(part, Segment)]
+
+
+def render_markdown(parts: list, translations, lang: str = None) -> str:
+    """
+    Setzt das Dokument wieder zusammen. `translations` enthält die
+    (maskierten) Übersetzungen der Segmente in Dokumentreihenfolge, `lang`
+    die Zielsprache für feste Glossar-Übersetzungen.
+    """
+    translations = iter(translations)
+    output = []
+    for part in parts:
+        if isinstance(part, Segment):
+            output.append(part.restore(next(translations), lang))
+        else:
+            output.append(part)
+    return "".join(output)
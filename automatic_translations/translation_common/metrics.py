@@ -0,0 +1,223 @@
+"""
+Messwerte eines Übersetzungslaufs.
+
+Die Skripte messen ihre Stufen (Modell laden, Satzsegmentierung,
+Tokenisierung, Inferenz, Schreiben) mit `stage()` und melden pro
+Sprachpaar übersetzte Segmente und Tokens mit `record_pair()`; Verteilungen
+(z. B. die Größe der Chunks) sammelt `observe()` als Histogramm. Am Ende
+schreibt `write_report()` einen Bericht als JSON oder im Textformat des
+Prometheus node_exporter (Textfile-Collector). Worker-Prozesse (`--jobs`)
+geben ihre Werte mit `drain()` an den Hauptprozess zurück, der sie mit
+`merge()` übernimmt.
+"""
+import cProfile
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+from .atomic_io import write_text_atomic
+
+PROMETHEUS_SUFFIXES = (".prom", ".txt")
+# Obergrenzen der Histogramm-Klassen von observe(); darüber zählt "+Inf"
+HISTOGRAM_BOUNDS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+def peak_rss_bytes() -> int:
+    """Spitzen-Speicher (RSS) des aktuellen Prozesses (0, wenn nicht messbar)."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024 # Linux: KB
+
+
+class RunMetrics:
+    """Sammelt Zeiten pro Stufe, Zähler und Durchsatz pro Sprachpaar."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.pairs = {}
+        self.counters = {}
+        self.histograms = {}
+        self.worker_peak_rss = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        """Misst die Wanduhrzeit eines Blocks und addiert sie zur Stufe `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+
+    def record_pair(self, src_lang: str, tgt_lang: str, segments: int, tokens: int, seconds: float):
+        """Zählt übersetzte Segmente/Tokens und die Inferenzzeit eines Sprachpaars."""
+        entry = self.pairs.setdefault(f"{src_lang}-{tgt_lang}", {"segments": 0, "tokens": 0, "seconds": 0.0})
+        entry["segments"] += segments
+        entry["tokens"] += tokens
+        entry["seconds"] += seconds
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: int, limit: int = 0):
+        """Trägt einen Wert in das Histogramm `name` ein; `limit` ist die zulässige Obergrenze (z. B. ein Budget)."""
+        entry = self.histograms.setdefault(name, _empty_histogram())
+        index = 0
+        while index < len(HISTOGRAM_BOUNDS) and value > HISTOGRAM_BOUNDS[index]:
+            index += 1
+        entry["buckets"][index] += 1
+        entry["count"] += 1
+        entry["sum"] += value
+        entry["max"] = max(entry["max"], value)
+        entry["limit"] = max(entry["limit"], limit)
+
+    def drain(self) -> dict:
+        """Gibt die bisher gesammelten Werte zurück und setzt sie zurück (für Worker)."""
+        snapshot = {"stages": self.stages, "pairs": self.pairs, "counters": self.counters,
+                    "histograms": self.histograms, "peak_rss_bytes": peak_rss_bytes()}
+        self.stages, self.pairs, self.counters, self.histograms = {}, {}, {}, {}
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        """Übernimmt die Werte eines Workers."""
+        for name, entry in snapshot["stages"].items():
+            own = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            own["seconds"] += entry["seconds"]
+            own["calls"] += entry["calls"]
+        for pair, entry in snapshot["pairs"].items():
+            own = self.pairs.setdefault(pair, {"segments": 0, "tokens": 0, "seconds": 0.0})
+            for key in own:
+                own[key] += entry[key]
+        for name, value in snapshot["counters"].items():
+            self.count(name, value)
+        for name, entry in snapshot["histograms"].items():
+            own = self.histograms.setdefault(name, _empty_histogram())
+            own["buckets"] = [a + b for a, b in zip(own["buckets"], entry["buckets"])]
+            own["count"] += entry["count"]
+            own["sum"] += entry["sum"]
+            own["max"] = max(own["max"], entry["max"])
+            own["limit"] = max(own["limit"], entry["limit"])
+        self.worker_peak_rss = max(self.worker_peak_rss, snapshot["peak_rss_bytes"])
+
+    def to_dict(self, script: str) -> dict:
+        pairs = {}
+        for pair, entry in sorted(self.pairs.items()):
+            pairs[pair] = dict(entry, tokens_per_second=entry["tokens"] / entry["seconds"] if entry["seconds"] else 0.0)
+        return {
+            "script": script,
+            "timestamp": int(time.time()),
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": dict(sorted(self.stages.items())),
+            "pairs": pairs,
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": dict(sorted(self.histograms.items())),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "worker_peak_rss_bytes": self.worker_peak_rss,
+        }
+
+    def summary(self, script: str) -> str:
+        """Kurze Übersicht für das Ende des Logs."""
+        report = self.to_dict(script)
+        lines = [f"Laufzeit: {report['wall_seconds']:.2f} s, Spitzen-Speicher: {report['peak_rss_bytes'] / 2**20:.0f} MB"]
+        for name, entry in report["stages"].items():
+            lines.append(f"  {name:<22} {entry['seconds']:>9.2f} s ({entry['calls']} Aufrufe)")
+        for pair, entry in report["pairs"].items():
+            lines.append(f"  {pair:<22} {entry['segments']:>6} Segmente, {entry['tokens']:>8} Tokens, "
+                         f"{entry['tokens_per_second']:.1f} Tokens/s")
+        for name, entry in report["histograms"].items():
+            mean = entry["sum"] / entry["count"] if entry["count"] else 0.0
+            usage = f", im Mittel {mean / entry['limit']:.0%} von {entry['limit']}" if entry["limit"] else ""
+            lines.append(f"  {name:<22} {entry['count']:>6} Werte, Mittel {mean:.0f}, Maximum {entry['max']}{usage}")
+            classes = [f"≤{bound}: {n}" for bound, n in zip(HISTOGRAM_BOUNDS, entry["buckets"]) if n]
+            if entry["buckets"][-1]:
+                classes.append(f">{HISTOGRAM_BOUNDS[-1]}: {entry['buckets'][-1]}")
+            lines.append(f"  {'':<22} {', '.join(classes)}")
+        return "\n".join(lines)
+
+
+def _empty_histogram() -> dict:
+    return {"buckets": [0] * (len(HISTOGRAM_BOUNDS) + 1), "count": 0, "sum": 0, "max": 0, "limit": 0}
+
+
+def _prometheus(report: dict) -> str:
+    script = report["script"]
+    lines = []
+
+    def metric(name: str, help_text: str, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in (("script", script),) + labels)
+            lines.append(f"{name}{{{label_text}}} {value}")
+
+    stages = report["stages"].items()
+    pairs = report["pairs"].items()
+    metric("translation_run_seconds", "Wanduhrzeit des Laufs", [((), report["wall_seconds"])])
+    metric("translation_run_timestamp_seconds", "Ende des Laufs (Unix-Zeit)", [((), report["timestamp"])])
+    metric("translation_stage_seconds", "Wanduhrzeit pro Stufe", [((("stage", n),), e["seconds"]) for n, e in stages])
+    metric("translation_stage_calls", "Aufrufe pro Stufe", [((("stage", n),), e["calls"]) for n, e in stages])
+    metric("translation_pair_segments", "Übersetzte Segmente pro Sprachpaar", [((("pair", p),), e["segments"]) for p, e in pairs])
+    metric("translation_pair_tokens", "Übersetzte Quell-Tokens pro Sprachpaar", [((("pair", p),), e["tokens"]) for p, e in pairs])
+    metric("translation_pair_tokens_per_second", "Inferenz-Durchsatz pro Sprachpaar",
+           [((("pair", p),), e["tokens_per_second"]) for p, e in pairs])
+    metric("translation_events_total", "Zähler des Laufs (Dateien, Treffer, ...)",
+           [((("event", n),), v) for n, v in report["counters"].items()])
+    metric("translation_peak_rss_bytes", "Spitzen-Speicher",
+           [((("process", "main"),), report["peak_rss_bytes"]), ((("process", "worker"),), report["worker_peak_rss_bytes"])])
+    for name, entry in report["histograms"].items():
+        lines.append(f"# HELP translation_{name} Verteilung von {name}")
+        lines.append(f"# TYPE translation_{name} histogram")
+        cumulative = 0
+        for bound, n in zip(HISTOGRAM_BOUNDS + ("+Inf",), entry["buckets"]):
+            cumulative += n
+            lines.append(f'translation_{name}_bucket{{script="{script}",le="{bound}"}} {cumulative}')
+        lines.append(f'translation_{name}_sum{{script="{script}"}} {entry["sum"]}')
+        lines.append(f'translation_{name}_count{{script="{script}"}} {entry["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path, metrics: RunMetrics, script: str):
+    """Schreibt den Bericht; `.prom`/`.txt` ergibt das Prometheus-Textformat, sonst JSON."""
+    report = metrics.to_dict(script)
+    if Path(path).suffix in PROMETHEUS_SUFFIXES:
+        write_text_atomic(path, _prometheus(report))
+    else:
+        write_text_atomic(path, json.dumps(report, indent=2, sort_keys=True) + "\n")
+    print(f"Messwerte geschrieben nach {path}")
+
+
+@contextmanager
+def profiled(path):
+    """
+    Zeichnet den Block mit cProfile auf und schreibt die Statistik nach `path`
+    (auswertbar mit `python -m pstats` oder snakeviz). Ohne Pfad ohne Wirkung.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(path))
+        print(f"Profil geschrieben nach {path}")
+
+
+# Messwerte des aktuellen Prozesses
+METRICS = RunMetrics()
+stage = METRICS.stage
+record_pair = METRICS.record_pair
+count = METRICS.count
+observe = METRICS.observe
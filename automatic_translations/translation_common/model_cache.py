@@ -0,0 +1,69 @@
+"""
+Begrenzter Cache für Übersetzungsmodelle.
+
+Modelle werden erst geladen, wenn das erste Segment sie tatsächlich
+braucht, und bleiben danach im Speicher. Sind mehr als `max_size` Modelle
+geladen, wird das am längsten ungenutzte freigegeben (LRU). Fehlgeschlagene
+Ladeversuche werden gemerkt und nicht wiederholt. Ladevorgänge und
+Verdrängungen erscheinen in den Messwerten als `models_loaded` und
+`models_evicted`.
+"""
+import sys
+from collections import OrderedDict
+
+from . import metrics
+
+
+class ModelCache:
+    """Lädt Modelle bei Bedarf über `loader(key)` und hält höchstens `max_size` davon."""
+
+    def __init__(self, loader, max_size: int = 3):
+        self.loader = loader
+        self.max_size = max(1, int(max_size))
+        self._models = OrderedDict()
+        self._failed = set()
+
+    def get(self, key, default=None):
+        """Liefert das Modell für `key` und lädt es beim ersten Zugriff."""
+        if key in self._models:
+            self._models.move_to_end(key)
+            return self._models[key]
+        if key in self._failed:
+            return default
+        try:
+            model = self.loader(key)
+        except Exception as e:
+            print(f"FEHLER: Modell für '{key}' konnte nicht geladen werden: {e}", file=sys.stderr)
+            model = None
+        if model is None:
+            self._failed.add(key)
+            return default
+        metrics.count("models_loaded")
+        self.put(key, model)
+        return model
+
+    def put(self, key, model):
+        """Legt ein bereits geladenes Modell ab (verdrängt ggf. das älteste)."""
+        self._models[key] = model
+        self._models.move_to_end(key)
+        while len(self._models) > self.max_size:
+            evicted_key, _ = self._models.popitem(last=False)
+            metrics.count("models_evicted")
+            print(f"Gebe Modell '{evicted_key}' frei (Cache-Limit {self.max_size}).")
+
+    def failed(self, key) -> bool:
+        """True, wenn das Laden für `key` fehlgeschlagen ist."""
+        return key in self._failed
+
+    def clear(self):
+        self._models.clear()
+        self._failed.clear()
+
+    def __contains__(self, key) -> bool:
+        return key in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def keys(self):
+        return list(self._models.keys())
@@ -0,0 +1,211 @@
+"""
+Lokaler, inhaltsadressierter Modellspeicher.
+
+Modelle (entpackte Argos-Pakete, Hugging Face Snapshots) liegen unter dem
+SHA-256 ihres Inhalts in `objects/<digest>/`; `index.json` ordnet jedem
+Eintrag Name und Version zu (z. B. "argos:de-en" / "1.9" oder
+"hf:Helsinki-NLP/opus-mt-de-en" / Commit). Beim Auflösen werden die Dateien
+gegen die gespeicherten Prüfsummen geprüft; neu gehasht wird nur eine Datei,
+deren Größe oder Änderungszeit sich geändert hat. Ist der Speicher gefüllt,
+kommt ein Lauf ohne Netzwerk aus, und der Ordner kann als CI-Cache
+gesichert und wiederhergestellt werden. Überschreitet er sein Byte-Budget,
+werden die am längsten ungenutzten Versionen verdrängt (LRU).
+"""
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from .atomic_io import write_text_atomic
+
+INDEX_VERSION = 1
+DEFAULT_PATH = ".cache/model-store"
+DEFAULT_MAX_SIZE_MB = 4096
+DOWNLOAD_RETRIES = 3
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download(url: str, target, timeout: int = 300):
+    """Lädt `url` nach `target` (mit Wiederholungen)."""
+    for attempt in range(1, DOWNLOAD_RETRIES + 1):
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response, open(target, "wb") as f:
+                shutil.copyfileobj(response, f, 1 << 20)
+            return
+        except OSError as e:
+            if attempt == DOWNLOAD_RETRIES:
+                raise
+            print(f"WARNUNG: Download von {url} fehlgeschlagen ({e}), Versuch {attempt + 1}...", file=sys.stderr)
+            time.sleep(2 * attempt)
+
+
+class ModelStore:
+    """Modellversionen unter ihrer Inhalts-Prüfsumme, mit LRU-Verdrängung nach Größe."""
+
+    def __init__(self, path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.downloads = 0
+        self.evicted = 0
+        self.used = set()
+        self._entries = self._load_index()
+
+    def _load_index(self) -> dict:
+        try:
+            data = json.loads((self.path / "index.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"WARNUNG: Index des Modellspeichers nicht lesbar ({e}), beginne leer.", file=sys.stderr)
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def save(self):
+        write_text_atomic(self.path / "index.json",
+                          json.dumps({"version": INDEX_VERSION, "entries": self._entries}, indent=2, sort_keys=True) + "\n")
+
+    def object_dir(self, digest: str) -> Path:
+        return self.path / "objects" / digest
+
+    def _versions(self, name: str) -> list:
+        """[(digest, Eintrag), ...] von `name`, neueste zuerst."""
+        found = [(digest, entry) for digest, entry in self._entries.items() if entry["name"] == name]
+        return sorted(found, key=lambda item: item[1]["created"], reverse=True)
+
+    def version(self, name: str):
+        """Die neueste gespeicherte Version von `name` (ohne Prüfung) oder None."""
+        versions = self._versions(name)
+        return versions[0][1]["version"] if versions else None
+
+    def resolve(self, name: str, version=None):
+        """
+        Liefert den Ordner der neuesten (bzw. der angegebenen) Version von
+        `name` oder None. Beschädigte Einträge werden entfernt.
+        """
+        for digest, entry in self._versions(name):
+            if version is not None and entry["version"] != str(version):
+                continue
+            if not self.verify(digest):
+                print(f"WARNUNG: {name} {entry['version']} im Modellspeicher ist beschädigt und wird entfernt.", file=sys.stderr)
+                self.remove(digest)
+                continue
+            entry["last_used"] = time.time()
+            self.used.add(digest)
+            return self.object_dir(digest)
+        return None
+
+    def verify(self, digest: str) -> bool:
+        """Prüft die Dateien eines Eintrags gegen ihre SHA-256-Prüfsummen."""
+        entry = self._entries[digest]
+        root = self.object_dir(digest)
+        stamps = entry.setdefault("stamps", {})
+        for relative, checksum in entry["files"].items():
+            try:
+                stat = (root / relative).stat()
+            except OSError:
+                return False
+            stamp = [stat.st_size, stat.st_mtime_ns]
+            if stamps.get(relative) == stamp:
+                continue
+            if file_sha256(root / relative) != checksum:
+                return False
+            stamps[relative] = stamp
+        return True
+
+    def staging(self) -> Path:
+        """Leerer Ordner im Speicher für einen Download (wird von `add` übernommen)."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=".staging-", dir=str(self.path)))
+
+    def add(self, name: str, version: str, staging_dir) -> Path:
+        """
+        Übernimmt den Inhalt von `staging_dir` (siehe `staging`) als Version
+        `version` von `name` und liefert den Ordner des Eintrags.
+        """
+        staging_dir = Path(staging_dir)
+        files = {}
+        for path in sorted(staging_dir.rglob("*")):
+            if path.is_file():
+                files[path.relative_to(staging_dir).as_posix()] = file_sha256(path)
+        digest = hashlib.sha256("".join(f"{relative}\0{checksum}\n" for relative, checksum in files.items())
+                                .encode("utf-8")).hexdigest()
+        target = self.object_dir(digest)
+        if target.exists():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            staging_dir.rename(target)
+        for other, entry in list(self._entries.items()):
+            if other != digest and entry["name"] == name and entry["version"] == str(version):
+                self.remove(other)
+        now = time.time()
+        self._entries[digest] = {
+            "name": name, "version": str(version), "files": files, "created": now, "last_used": now,
+            "size": sum((target / relative).stat().st_size for relative in files),
+        }
+        self.verify(digest) # Zeitstempel für spätere Prüfungen ohne Hashen
+        self.downloads += 1
+        self.used.add(digest)
+        return target
+
+    def remove(self, digest: str):
+        shutil.rmtree(self.object_dir(digest), ignore_errors=True)
+        self._entries.pop(digest, None)
+
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def evict(self):
+        """Verdrängt die am längsten ungenutzten Versionen, bis das Budget eingehalten wird."""
+        excess = self.total_bytes() - self.max_bytes
+        for digest, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_used"]):
+            if excess <= 0:
+                break
+            if digest in self.used:
+                continue # In diesem Lauf verwendet
+            print(f"  -> Verdränge {entry['name']} {entry['version']} aus dem Modellspeicher")
+            excess -= entry["size"]
+            self.remove(digest)
+            self.evicted += 1
+
+    def summary(self) -> str:
+        """Kurze Statistik für das Ende eines Laufs."""
+        names = {entry["name"] for entry in self._entries.values()}
+        return (f"Modellspeicher: {len(names)} Modelle ({len(self._entries)} Versionen), "
+                f"{self.total_bytes() / 2**20:.0f} MB von {self.max_bytes / 2**20:.0f} MB belegt, "
+                f"{self.downloads} heruntergeladen, {self.evicted} verdrängt")
+
+    def close(self):
+        """Wendet das Größenbudget an und schreibt den Index."""
+        self.evict()
+        self.save()
+
+
+def open_model_store(config: dict):
+    """
+    Öffnet den Modellspeicher gemäß `model_store` in der Konfiguration.
+    Gibt None zurück, wenn er deaktiviert ist.
+    """
+    settings = config.get("model_store") or {}
+    if not settings.get("enabled", True):
+        return None
+    max_bytes = int(float(settings.get("max_size_mb", DEFAULT_MAX_SIZE_MB)) * 1024 * 1024)
+    return ModelStore(settings.get("path", DEFAULT_PATH), max_bytes)
+
+
+def is_offline(config: dict) -> bool:
+    """True, wenn Modelle nur aus dem Speicher kommen dürfen (`model_store.offline` bzw. --offline)."""
+    return bool((config.get("model_store") or {}).get("offline", False))
@@ -0,0 +1,51 @@
+"""
+Prozess-Pool für parallele Übersetzungen (`--jobs N`).
+
+Jeder Worker lädt seine Modelle einmal im Initializer und behält sie für
+alle Aufgaben. Damit sich die Worker nicht gegenseitig die Kerne streitig
+machen, wird die Zahl der Rechen-Threads pro Worker begrenzt (OpenMP/MKL
+für PyTorch, CTranslate2 für Argos).
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Umgebungsvariablen, über die die Bibliotheken ihre Thread-Anzahl lesen.
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "ARGOS_INTRA_THREADS", # CTranslate2 intra_threads in argostranslate.settings
+)
+
+
+def threads_per_worker(jobs: int) -> int:
+    """Verteilt die verfügbaren Kerne gleichmäßig auf die Worker."""
+    return max(1, (os.cpu_count() or 1) // max(1, jobs))
+
+
+def limit_threads(threads: int):
+    """
+    Setzt die Thread-Limits für den aktuellen Prozess. Wird im Initializer
+    der Worker aufgerufen, vor dem Import von torch/ctranslate2, die die
+    Umgebungsvariablen erst beim Laden lesen.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ["ARGOS_INTER_THREADS"] = "1"
+
+
+def create_pool(jobs: int, initializer, initargs=()) -> ProcessPoolExecutor:
+    """
+    Startet `jobs` Worker-Prozesse. Es wird "spawn" verwendet, da ein fork
+    nach dem Import von torch/ctranslate2 hängen bleiben kann. Die
+    Thread-Limits setzt erst `initializer` im Worker (mit
+    `threads_per_worker(jobs)`); der Hauptprozess behält alle Kerne für
+    die Übersetzungen, die bei ihm bleiben.
+    """
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
@@ -0,0 +1,151 @@
+"""
+Duplikaterkennung über alle Dateien eines Laufs.
+
+Vor der Übersetzung werden die Segmente aller zu übersetzenden Dateien
+gesammelt (`add`). Jedes Segment wird pro Zielsprache nur einmal übersetzt,
+auch wenn es in vielen Dateien vorkommt (Voraussetzungen, Hinweise,
+"Fazit"-Abschnitte). Der Plan verhält sich danach wie eine Translation
+Memory (`lookup`/`store`/`flush`) und wird beim Schreiben der Dateien an
+`translate_segments()` übergeben, sodass jede Datei ihre Übersetzungen aus
+dem Speicher erhält. Eine persistente Translation Memory kann darunter
+liegen, ist aber nicht nötig.
+
+Damit der Speicherbedarf begrenzt bleibt, hält der Plan höchstens
+`max_segments` einmalige Segmente (`dedup_window_segments`): `plan_windows()`
+teilt die Dateien in Fenster, die jeweils geplant, übersetzt, geschrieben
+und wieder verworfen werden. Duplikate über Fenstergrenzen hinweg findet
+nur die Translation Memory; Segmente einer Datei, die den Plan überlaufen,
+werden beim Schreiben wie ohne Duplikaterkennung übersetzt.
+"""
+from .translation_memory import normalize_segment
+
+DEFAULT_MAX_SEGMENTS = 20000
+
+
+class SegmentPlan:
+    """Einmalige Segmente eines Fensters von Dateien und ihre Übersetzungen im Speicher."""
+
+    def __init__(self, memory=None, max_segments: int = DEFAULT_MAX_SEGMENTS):
+        self.memory = memory
+        self.max_segments = max(1, int(max_segments))
+        # Zähler über alle Fenster des Laufs
+        self.occurrences = 0
+        self.unique = 0 # Zu übersetzende (Segment, Zielsprache)-Paare
+        self.overflow = 0 # Segmente (pro Zielsprache), die nicht mehr in den Plan passten
+        self.hits = 0 # Beim Schreiben aus dem Plan übernommene Übersetzungen
+        # normalisiertes Segment -> (erster Originaltext, Zielsprachen), in Einfügereihenfolge
+        self._targets = {}
+        self._translations = {}
+        self.sealed = False
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    @property
+    def full(self) -> bool:
+        return len(self._targets) >= self.max_segments
+
+    def add(self, segments, target_langs):
+        """Nimmt die Segmente einer Datei auf, die in `target_langs` übersetzt werden soll."""
+        for segment in segments:
+            if not segment.strip():
+                continue
+            key = normalize_segment(segment)
+            planned = self._targets.get(key)
+            if planned is None:
+                if self.full:
+                    self.overflow += len(target_langs)
+                    continue
+                planned = self._targets[key] = (segment.strip(), set())
+            self.occurrences += len(target_langs)
+            self.unique += len(set(target_langs) - planned[1])
+            planned[1].update(target_langs)
+
+    def seal(self):
+        """
+        Nach der Übersetzung des Fensters: Übersetzungen übergelaufener
+        Segmente beim Schreiben gehen nur noch in die Translation Memory.
+        """
+        self.sealed = True
+
+    def clear(self):
+        """Verwirft Segmente und Übersetzungen des Fensters; die Zähler bleiben."""
+        self._targets.clear()
+        self._translations.clear()
+        self.sealed = False
+
+    def groups(self) -> dict:
+        """Segmente gruppiert nach der Menge ihrer Zielsprachen ({(Sprachen, ...): [Segmente]})."""
+        groups = {}
+        for segment, langs in self._targets.values():
+            groups.setdefault(tuple(sorted(langs)), []).append(segment)
+        return groups
+
+    def _key(self, segment: str, src_lang: str, tgt_lang: str, model_id: str) -> tuple:
+        return model_id, src_lang, tgt_lang, normalize_segment(segment)
+
+    def lookup(self, segment: str, src_lang: str, tgt_lang: str, model_id: str):
+        """Übersetzung aus dem Plan, sonst aus der Translation Memory, sonst None."""
+        key = self._key(segment, src_lang, tgt_lang, model_id)
+        if key in self._translations:
+            self.hits += 1
+            return self._translations[key]
+        if self.memory is None:
+            return None
+        translation = self.memory.lookup(segment, src_lang, tgt_lang, model_id)
+        if translation is not None and not self.sealed:
+            self._translations[key] = translation
+        return translation
+
+    def store(self, segment: str, src_lang: str, tgt_lang: str, model_id: str, translation: str):
+        if not self.sealed:
+            self.record([segment], [translation], src_lang, tgt_lang, model_id)
+        if self.memory is not None:
+            self.memory.store(segment, src_lang, tgt_lang, model_id, translation)
+
+    def record(self, segments: list, translations: list, src_lang: str, tgt_lang: str, model_id: str,
+               is_cacheable=None):
+        """
+        Übernimmt Übersetzungen (z. B. aus einem Worker) nur in den Plan;
+        solche, für die `is_cacheable(translation)` False liefert, nicht.
+        """
+        for segment, translation in zip(segments, translations):
+            if is_cacheable is None or is_cacheable(translation):
+                self._translations[self._key(segment, src_lang, tgt_lang, model_id)] = translation
+
+    def flush(self):
+        if self.memory is not None:
+            self.memory.flush()
+
+    def summary(self) -> str:
+        """Kurze Statistik für das Ende eines Laufs."""
+        duplicates = self.occurrences - self.unique
+        ratio = (100.0 * duplicates / self.occurrences) if self.occurrences else 0.0
+        summary = (f"Duplikaterkennung: {self.occurrences} Segmente (pro Zielsprache), davon {self.unique} "
+                   f"einmalig übersetzt, {duplicates} Duplikate ({ratio:.1f} %), "
+                   f"{self.hits} Übersetzungen aus dem Plan übernommen")
+        if self.overflow:
+            summary += f", {self.overflow} ohne Plan (dedup_window_segments erreicht)"
+        return summary
+
+
+def plan_windows(plan: SegmentPlan, tasks, segments_of):
+    """
+    Nimmt die Aufgaben (Dateien) nacheinander in den Plan auf, wobei
+    `segments_of(task)` (Segmente, Zielsprachen) liefert, und gibt die
+    Aufgaben eines Fensters zurück, sobald der Plan voll ist (bzw. am Ende).
+    Der Aufrufer übersetzt und schreibt das Fenster; beim nächsten Schritt
+    wird der Plan geleert.
+    """
+    window = []
+    for task in tasks:
+        segments, target_langs = segments_of(task)
+        plan.add(segments, target_langs)
+        window.append(task)
+        if plan.full:
+            yield window
+            plan.clear()
+            window = []
+    if window:
+        yield window
+        plan.clear()
@@ -0,0 +1,135 @@
+"""
+Streaming-Verarbeitung von Markdown-Dateien mit begrenztem Speicherbedarf.
+
+Eine Datei wird zeilenweise gelesen: Zuerst nur das Front Matter, danach
+läuft der Hauptinhalt als Zeilen-Iterator durch die Segmentierung
+(`iter_parts`). `iter_windows` fasst die Teile zu Fenstern mit höchstens
+`max_segments` Segmenten bzw. `max_bytes` Text zusammen; jedes Fenster wird
+übersetzt und sofort in die (temporäre) Ausgabedatei geschrieben. Im
+Speicher liegt so immer nur ein Fenster, unabhängig von der Dateigröße.
+"""
+import itertools
+import sys
+
+import yaml
+
+from .markdown_segments import Segment
+
+DEFAULT_WINDOW_SEGMENTS = 128
+DEFAULT_WINDOW_BYTES = 1 << 20
+# Ohne schließendes "---" nach so vielen Zeichen gilt der Anfang nicht als Front Matter
+MAX_FRONT_MATTER_BYTES = 1 << 16
+
+
+def read_front_matter(lines, file_path=""):
+    """
+    Liest das Front Matter vom Anfang eines Zeilen-Iterators.
+    Gibt (Front Matter, restliche Zeilen, gefunden) zurück. Fehlt das
+    schließende "---" oder ist das YAML ungültig, gehört alles zum Hauptinhalt.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(()), False
+    if not first.startswith("---"):
+        return {}, itertools.chain([first], lines), False
+
+    buffered = [first]
+    size = len(first)
+    for line in lines:
+        buffered.append(line)
+        size += len(line)
+        if line.rstrip("\r\n").strip() == "---":
+            break
+        if size > MAX_FRONT_MATTER_BYTES:
+            return {}, itertools.chain(buffered, lines), False
+    else:
+        return {}, iter(buffered), False
+
+    try:
+        front_matter = yaml.safe_load("".join(buffered[1:-1])) or {}
+    except yaml.YAMLError as e:
+        print(f"WARNUNG: YAML-Fehler in {file_path}: {e}", file=sys.stderr)
+        return {}, itertools.chain(buffered, lines), False
+    return front_matter, lines, True
+
+
+def skip_leading_whitespace(lines):
+    """Überspringt führenden Leerraum (wie `str.lstrip()` auf dem ganzen Text)."""
+    lines = iter(lines)
+    for line in lines:
+        stripped = line.lstrip()
+        if stripped:
+            yield stripped
+            break
+    yield from lines
+
+
+class StrippedWriter:
+    """
+    Schreibt Text durch und entfernt dabei führenden (`lstrip`) und/oder
+    abschließenden (`rstrip`) Leerraum des gesamten Datenstroms, ohne ihn zu
+    puffern: Leerraum am Ende wird erst geschrieben, wenn noch Text folgt.
+    """
+
+    def __init__(self, target, lstrip: bool = False, rstrip: bool = False):
+        self.target = target
+        self.lstrip = lstrip
+        self.rstrip = rstrip
+        self._started = False
+        self._pending = ""
+
+    def write(self, text: str):
+        if not text:
+            return
+        if self.lstrip and not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+        self._started = True
+        if not self.rstrip:
+            self.target.write(text)
+            return
+        body = text.rstrip()
+        if body:
+            self.target.write(self._pending + body)
+            self._pending = text[len(body):]
+        else:
+            self._pending += text
+
+    def close(self):
+        """Schreibt zurückgehaltenen Leerraum, falls nicht `rstrip` gilt."""
+        if not self.rstrip:
+            self.target.write(self._pending)
+        self._pending = ""
+
+
+def iter_windows(parts, max_segments: int = DEFAULT_WINDOW_SEGMENTS, max_bytes: int = DEFAULT_WINDOW_BYTES):
+    """
+    Fasst einen Strom von Teilen (str/`Segment`) zu Listen zusammen, die
+    höchstens `max_segments` Segmente bzw. etwa `max_bytes` Zeichen enthalten.
+    """
+    window = []
+    segments = 0
+    size = 0
+    for part in parts:
+        window.append(part)
+        if isinstance(part, Segment):
+            segments += 1
+            size += len(part.text)
+        else:
+            size += len(part)
+        if segments >= max_segments or size >= max_bytes:
+            yield window
+            window = []
+            segments = 0
+            size = 0
+    if window:
+        yield window
+
+
+def window_limits(config: dict):
+    """Fenstergröße aus der Konfiguration (`stream_window_segments`, `stream_window_kb`)."""
+    max_segments = int(config.get("stream_window_segments") or DEFAULT_WINDOW_SEGMENTS)
+    max_bytes = int(config.get("stream_window_kb") or DEFAULT_WINDOW_BYTES // 1024) * 1024
+    return max(1, max_segments), max(1, max_bytes)
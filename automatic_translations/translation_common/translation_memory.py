@@ -0,0 +1,195 @@
+"""
+Persistente Translation Memory (Segment-Cache) auf SQLite-Basis.
+
+Übersetzte Segmente werden unter (normalisiertes Segment, Quellsprache,
+Zielsprache, Modell) abgelegt und über Läufe und Sprachen hinweg
+wiederverwendet. Nur Cache-Fehlschläge erreichen das Modell. Überschreitet
+die Datenbank ihr Größenbudget, werden die am längsten nicht mehr genutzten
+Einträge verdrängt (LRU).
+"""
+import hashlib
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from .markdown_segments import has_prose
+
+SCHEMA_VERSION = 1
+DEFAULT_PATH = ".cache/translation-memory.sqlite"
+DEFAULT_MAX_SIZE_MB = 64
+
+
+def normalize_segment(text: str) -> str:
+    """
+    Normalisiert ein Segment für den Cache-Schlüssel (Rand- und
+    Zeilenend-Leerraum). Harte Zeilenumbrüche (zwei oder mehr Leerzeichen am
+    Zeilenende) bleiben als zwei Leerzeichen unterscheidbar.
+    """
+    lines = []
+    for line in text.strip().replace("\r\n", "\n").split("\n"):
+        stripped = line.rstrip()
+        lines.append(stripped + "  " if line.endswith("  ") and stripped else stripped)
+    return "\n".join(lines)
+
+
+def _segment_key(normalized: str, src_lang: str, tgt_lang: str, model_id: str) -> str:
+    payload = "\0".join((model_id, src_lang, tgt_lang, normalized))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """Segment-Cache mit LRU-Verdrängung nach Größe und Treffer-Zählern."""
+
+    def __init__(self, path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._closed_bytes = None # Größe nach close(), für summary()
+        # Schreibzugriffe werden gesammelt und in flush() in einer kurzen
+        # Transaktion geschrieben, damit parallele Worker sich nicht blockieren.
+        self._touched = []
+        self._pending = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS segments")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " key TEXT PRIMARY KEY, src TEXT, tgt TEXT, model TEXT,"
+            " source TEXT, target TEXT, size INTEGER, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used)")
+        self._conn.commit()
+
+    def lookup(self, segment: str, src_lang: str, tgt_lang: str, model_id: str):
+        """Liefert die gespeicherte Übersetzung oder None."""
+        key = _segment_key(normalize_segment(segment), src_lang, tgt_lang, model_id)
+        row = self._conn.execute("SELECT target FROM segments WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append((time.time(), key))
+        return row[0]
+
+    def store(self, segment: str, src_lang: str, tgt_lang: str, model_id: str, translation: str):
+        """Legt eine Übersetzung ab (überschreibt einen vorhandenen Eintrag)."""
+        normalized = normalize_segment(segment)
+        key = _segment_key(normalized, src_lang, tgt_lang, model_id)
+        size = len(normalized.encode("utf-8")) + len(translation.encode("utf-8"))
+        self._pending.append((key, src_lang, tgt_lang, model_id, normalized, translation, size, time.time()))
+
+    def flush(self):
+        """Schreibt gesammelte Zugriffe und neue Einträge in die Datenbank."""
+        if not self._touched and not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany("UPDATE segments SET last_used = ? WHERE key = ?", self._touched)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments (key, src, tgt, model, source, target, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._touched = []
+        self._pending = []
+
+    def total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM segments").fetchone()[0]
+
+    def evict(self):
+        """Verdrängt die am längsten ungenutzten Einträge, bis das Budget eingehalten wird."""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM segments ORDER BY last_used ASC"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM segments WHERE key = ?", doomed)
+        self.evicted += len(doomed)
+
+    def summary(self) -> str:
+        """Kurze Statistik für das Ende eines Laufs."""
+        lookups = self.hits + self.misses
+        ratio = (100.0 * self.hits / lookups) if lookups else 0.0
+        size = self._closed_bytes if self._closed_bytes is not None else self.total_bytes()
+        return (f"Translation Memory: {self.hits} Treffer, {self.misses} Fehlschläge "
+                f"(Trefferquote {ratio:.1f} %), {size / 2**20:.2f} MB von "
+                f"{self.max_bytes / 2**20:.2f} MB belegt, {self.evicted} Einträge verdrängt")
+
+    def close(self, evict: bool = True):
+        """
+        Schreibt alle Änderungen und wendet das Größenbudget an. Worker-Prozesse
+        schließen mit `evict=False`; verdrängt wird einmal im Hauptprozess.
+        `summary()` danach zeigt Größe und Verdrängungen nach dem Schließen.
+        """
+        self.flush()
+        if evict:
+            self.evict()
+        self._conn.commit()
+        self._closed_bytes = self.total_bytes()
+        self._conn.close()
+
+
+def translate_segments(segments: list, src_lang: str, tgt_lang: str, model_id: str, translate_batch_fn,
+                       memory=None, is_cacheable=None) -> list:
+    """
+    Übersetzt eine Liste von Segmenten. Alle Segmente ohne Eintrag in der
+    Translation Memory (oder alle, wenn `memory` None ist) werden gesammelt
+    in einem Aufruf an `translate_batch_fn(segments)` übergeben, der die
+    Übersetzungen in derselben Reihenfolge liefert. Das Modell erhält das
+    Segment ohne Rand-Leerraum, aber sonst unverändert (normalisiert wird
+    nur der Cache-Schlüssel); führender und abschließender Leerraum des
+    Originals bleibt erhalten. Ergebnisse, für
+    die `is_cacheable(translation)` False liefert (z. B. Fehlermarker),
+    werden nicht gespeichert. Segmente ohne Text außerhalb der Platzhalter
+    (z. B. nur Glossarbegriffe) bleiben unverändert.
+    """
+    results = list(segments)
+    misses = []
+    translatable = [index for index, segment in enumerate(segments) if has_prose(segment)]
+    for index in translatable:
+        segment = segments[index]
+        translation = memory.lookup(segment, src_lang, tgt_lang, model_id) if memory is not None else None
+        if translation is None:
+            misses.append(index)
+        else:
+            results[index] = translation
+    if misses:
+        translations = translate_batch_fn([segments[index].strip() for index in misses])
+        for index, translation in zip(misses, translations):
+            if memory is not None and (is_cacheable is None or is_cacheable(translation)):
+                memory.store(segments[index], src_lang, tgt_lang, model_id, translation)
+            results[index] = translation
+    for index in translatable:
+        segment = segments[index]
+        leading = segment[:len(segment) - len(segment.lstrip())]
+        trailing = segment[len(segment.rstrip()):]
+        results[index] = leading + results[index] + trailing
+    if memory is not None:
+        memory.flush()
+    return results
+
+
+def open_translation_memory(config: dict):
+    """
+    Öffnet die Translation Memory gemäß `translation_memory` in der Konfiguration.
+    Gibt None zurück, wenn sie deaktiviert ist oder nicht geöffnet werden kann.
+    """
+    settings = config.get("translation_memory") or {}
+    if not settings.get("enabled", True):
+        return None
+    path = settings.get("path", DEFAULT_PATH)
+    max_bytes = int(float(settings.get("max_size_mb", DEFAULT_MAX_SIZE_MB)) * 1024 * 1024)
+    try:
+        return TranslationMemory(path, max_bytes)
+    except sqlite3.Error as e:
+        print(f"WARNUNG: Translation Memory {path} konnte nicht geöffnet werden ({e}). Fahre ohne Cache fort.", file=sys.stderr)
+        return None